@@ -2,102 +2,499 @@
 
 from __future__ import annotations
 
+import asyncio
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.schemas.responses import ExecutionResponse, TestResultResponse
+from app.core import events
+from app.core.config import settings
+from app.core.cache import response_cache
+from app.core.database import get_db, get_read_db, open_read_session, open_session
+from app.core.pagination import (
+    EXECUTION_CURSOR,
+    NEXT_CURSOR_HEADER,
+    RESULT_CURSOR,
+    paginate,
+    parse_cursor,
+)
+from app.core.replicas import wants_primary
+from app.core.serialization import RowEncoder
+from app.schemas.responses import (
+    ExecutionBulkRequest,
+    ExecutionDiffResponse,
+    ExecutionFinalizeRequest,
+    ExecutionOpenRequest,
+    ExecutionResponse,
+    TestResultIn,
+    TestResultResponse,
+)
 from app.services import history_service
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+SSE_MEDIA_TYPE = "text/event-stream"
+RESULT_FIELDS = tuple(TestResultResponse.model_fields)
+
+# Listagens codificadas direto das linhas (ver core/serialization.py)
+EXECUTIONS_JSON = RowEncoder(ExecutionResponse)
+RESULTS_JSON = RowEncoder(TestResultResponse)
+
 
 @router.get("", response_model=list[ExecutionResponse])
 async def list_executions(
+    request: Request,
     project_id: UUID | None = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Lista execuções, opcionalmente filtradas por projeto."""
-    executions = await history_service.get_executions(
-        db, project_id=project_id, limit=limit,
-    )
-    result = []
-    for e in executions:
-        projeto_nome = ""
-        if e.project:
-            projeto_nome = e.project.nome
-        result.append(
-            ExecutionResponse(
-                id=e.id,
-                project_id=e.project_id,
-                projeto_nome=projeto_nome,
-                ambiente=e.ambiente,
-                started_at=e.started_at,
-                finished_at=e.finished_at,
-                score=e.score or 0.0,
-                total=e.total or 0,
-                passed=e.passed or 0,
-                failed=e.failed or 0,
-                errors=e.errors or 0,
-                skipped=e.skipped or 0,
-                duracao_ms=e.duracao_ms or 0.0,
-            )
+    """Lista execuções, opcionalmente filtradas por projeto (mais recentes primeiro)."""
+
+    async def build():
+        rows = await history_service.get_executions(
+            db,
+            project_id=project_id,
+            limit=limit + 1,
+            after=parse_cursor(cursor, EXECUTION_CURSOR),
         )
-    return result
+        page, next_cursor = paginate(rows, limit, key=lambda r: (r.started_at, r.id))
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return EXECUTIONS_JSON.dumps(page), headers
 
+    return await response_cache.respond(request, build, project_id=project_id)
 
-@router.get("/{execution_id}", response_model=ExecutionResponse)
-async def get_execution(execution_id: UUID, db: AsyncSession = Depends(get_db)):
-    """Detalhes de uma execução."""
-    execution = await history_service.get_execution_by_id(db, execution_id)
-    if not execution:
-        raise HTTPException(status_code=404, detail="Execução não encontrada")
 
-    projeto_nome = ""
-    if execution.project:
-        projeto_nome = execution.project.nome
+@router.post("/bulk", response_model=ExecutionResponse, status_code=201)
+async def bulk_ingest_execution(
+    body: ExecutionBulkRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Ingestão em lote de uma execução completa, numa única transação."""
+    scores = [s.model_dump() for s in body.scores] if body.scores is not None else None
+    execution = await history_service.ingest_execution(
+        db,
+        project_name=body.project_name,
+        ambiente=body.ambiente,
+        results=[r.model_dump() for r in body.results],
+        started_at=body.started_at,
+        finished_at=body.finished_at,
+        duracao_ms=body.duracao_ms,
+        scores=scores,
+    )
+    await db.commit()
+    await response_cache.bump(execution.project_id)
 
     return ExecutionResponse(
         id=execution.id,
         project_id=execution.project_id,
-        projeto_nome=projeto_nome,
+        projeto_nome=body.project_name,
         ambiente=execution.ambiente,
         started_at=execution.started_at,
         finished_at=execution.finished_at,
-        score=execution.score or 0.0,
-        total=execution.total or 0,
-        passed=execution.passed or 0,
-        failed=execution.failed or 0,
-        errors=execution.errors or 0,
-        skipped=execution.skipped or 0,
-        duracao_ms=execution.duracao_ms or 0.0,
+        score=execution.score,
+        total=execution.total,
+        passed=execution.passed,
+        failed=execution.failed,
+        errors=execution.errors,
+        skipped=execution.skipped,
+        duracao_ms=execution.duracao_ms,
     )
 
 
-@router.get("/{execution_id}/results", response_model=list[TestResultResponse])
-async def get_execution_results(
+@router.post("", response_model=ExecutionResponse, status_code=201)
+async def open_execution(
+    body: ExecutionOpenRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Abre uma execução para receber resultados via streaming."""
+    execution = await history_service.open_execution(
+        db,
+        project_name=body.project_name,
+        ambiente=body.ambiente,
+        started_at=body.started_at,
+    )
+    await db.commit()
+    await response_cache.bump(execution.project_id)
+
+    row = await history_service.get_execution_row(db, execution.id)
+    return ExecutionResponse(**row._mapping)
+
+
+def _parse_ndjson_line(line: bytes, line_no: int) -> dict:
+    try:
+        return TestResultIn.model_validate_json(line).model_dump()
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Linha {line_no} inválida: {exc.errors(include_url=False)}",
+        ) from exc
+
+
+async def _iter_ndjson_batches(
+    request: Request,
+    batch_size: int,
+    max_line_bytes: int,
+) -> AsyncIterator[list[dict]]:
+    """Lê o corpo NDJSON incrementalmente, em lotes de até ``batch_size`` linhas.
+
+    Só a linha parcial corrente e o lote em construção ficam em memória.
+    """
+    buffer = b""
+    batch: list[dict] = []
+    line_no = 0
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > max_line_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Linha {line_no + len(lines) + 1} excede {max_line_bytes} bytes",
+            )
+        for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            batch.append(_parse_ndjson_line(line, line_no))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    if buffer.strip():
+        batch.append(_parse_ndjson_line(buffer, line_no + 1))
+    if batch:
+        yield batch
+
+
+@router.post(
+    "/{execution_id}/results:stream",
+    response_model=ExecutionResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-ndjson": {"schema": TestResultIn.model_json_schema()}},
+            "required": True,
+        },
+    },
+)
+async def stream_execution_results(
     execution_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    """Resultados individuais de uma execução."""
-    execution = await history_service.get_execution_by_id(db, execution_id)
-    if not execution:
+    """Acrescenta resultados (NDJSON, um teste por linha) a uma execução aberta.
+
+    Cada lote é gravado e commitado assim que completo; pode ser chamado
+    várias vezes para a mesma execução antes de finalizá-la.
+    """
+    state = await history_service.get_execution_state(db, execution_id)
+    if not state:
         raise HTTPException(status_code=404, detail="Execução não encontrada")
+    if state.finished_at is not None:
+        raise HTTPException(status_code=409, detail="Execução já finalizada")
 
-    results = await history_service.get_test_results(db, execution_id)
-    return [
-        TestResultResponse(
-            id=r.id,
-            nome=r.nome,
-            tipo=r.tipo,
-            status=r.status,
-            duracao_ms=r.duracao_ms or 0.0,
-            detalhes=r.detalhes or "",
-            severidade=r.severidade or "info",
-            grupo=r.grupo or "",
+    async for batch in _iter_ndjson_batches(
+        request, settings.ingest_batch_size, settings.ingest_max_line_bytes,
+    ):
+        await history_service.append_results(
+            db, execution_id, state.project_id, state.started_at, batch,
         )
-        for r in results
-    ]
+        await db.commit()
+        await response_cache.bump(state.project_id)
+
+    row = await history_service.get_execution_row(db, execution_id)
+    return ExecutionResponse(**row._mapping)
+
+
+@router.post("/{execution_id}/finalize", response_model=ExecutionResponse)
+async def finalize_execution(
+    execution_id: UUID,
+    body: ExecutionFinalizeRequest | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Finaliza uma execução aberta: totais, score e score por runner."""
+    body = body or ExecutionFinalizeRequest()
+    state = await history_service.get_execution_state(db, execution_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    if state.finished_at is not None:
+        raise HTTPException(status_code=409, detail="Execução já finalizada")
+
+    scores = [s.model_dump() for s in body.scores] if body.scores is not None else None
+    finalized = await history_service.finalize_execution(
+        db,
+        execution_id=execution_id,
+        project_id=state.project_id,
+        started_at=state.started_at,
+        finished_at=body.finished_at,
+        duracao_ms=body.duracao_ms,
+        scores=scores,
+    )
+    if not finalized:
+        raise HTTPException(status_code=409, detail="Execução já finalizada")
+    await db.commit()
+    await response_cache.bump(state.project_id)
+
+    row = await history_service.get_execution_row(db, execution_id)
+    return ExecutionResponse(**row._mapping)
+
+
+@router.get("/{execution_id}", response_model=ExecutionResponse)
+async def get_execution(execution_id: UUID, db: AsyncSession = Depends(get_read_db)):
+    """Detalhes de uma execução."""
+    row = await history_service.get_execution_row(db, execution_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return ExecutionResponse(**row._mapping)
+
+
+@router.get("/{execution_a}/diff/{execution_b}", response_model=ExecutionDiffResponse)
+async def diff_executions(
+    execution_a: UUID,
+    execution_b: UUID,
+    request: Request,
+    latency_ratio: float = Query(0.5, ge=0, description="Variação relativa mínima de duracao_ms"),
+    latency_min_ms: float = Query(100.0, ge=0, description="Variação absoluta mínima de duracao_ms"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Diferenças entre duas execuções (``a`` = base, ``b`` = comparada).
+
+    Devolve só os testes que mudaram: novas falhas, correções, testes
+    adicionados/removidos e variações de latência acima dos dois limiares.
+    Com as duas execuções finalizadas o resultado é imutável e fica em cache
+    pelo par de ids.
+    """
+    a = await history_service.get_execution_state(db, execution_a)
+    b = await history_service.get_execution_state(db, execution_b)
+    if not a or not b:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+
+    async def build():
+        changes = await history_service.diff_executions(
+            db, a, b, latency_ratio=latency_ratio, latency_min_ms=latency_min_ms,
+        )
+        summary = dict.fromkeys(history_service.DIFF_CHANGES, 0)
+        for c in changes:
+            summary[c["change"]] += 1
+        return ExecutionDiffResponse(
+            execution_a=a.id, execution_b=b.id, summary=summary, changes=changes,
+        ), {}
+
+    finished = a.finished_at is not None and b.finished_at is not None
+    if not finished:
+        payload, _ = await build()
+        return payload
+    return await response_cache.respond(request, build, immutable=True)
+
+
+def _encode_ndjson(rows: Sequence) -> bytes:
+    return "".join(
+        json.dumps(
+            {f: getattr(r, f) for f in RESULT_FIELDS},
+            default=str,
+            ensure_ascii=False,
+        )
+        + "\n"
+        for r in rows
+    ).encode()
+
+
+def _encode_csv(rows: Sequence, header: bool = False) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(RESULT_FIELDS)
+    writer.writerows(tuple(getattr(r, f) for f in RESULT_FIELDS) for r in rows)
+    return buf.getvalue().encode()
+
+
+async def _stream_results(
+    execution_id: UUID,
+    media_type: str,
+    archive_path: str | None,
+    started_at: datetime,
+    primary: bool = False,
+) -> AsyncIterator[bytes]:
+    """Codifica os resultados bloco a bloco; memória proporcional ao bloco."""
+    if media_type == CSV_MEDIA_TYPE:
+        yield _encode_csv((), header=True)
+    async with open_read_session(primary=primary) as session:
+        async for chunk in history_service.stream_test_results(
+            session, execution_id, settings.stream_chunk_size,
+            archive_path=archive_path, started_at=started_at,
+        ):
+            if media_type == CSV_MEDIA_TYPE:
+                yield _encode_csv(chunk)
+            else:
+                yield _encode_ndjson(chunk)
+
+
+def _negotiate_stream(accept: str) -> str | None:
+    """Formato de streaming pedido no Accept, ou None para o JSON padrão."""
+    for media_type in (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+@router.get(
+    "/{execution_id}/results",
+    response_model=list[TestResultResponse],
+    responses={
+        200: {
+            "content": {
+                NDJSON_MEDIA_TYPE: {"schema": TestResultResponse.model_json_schema()},
+                CSV_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+async def get_execution_results(
+    execution_id: UUID,
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=5000),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Resultados individuais de uma execução.
+
+    Na ordem de gravação. Sem ``limit``/``cursor`` devolve todos os
+    resultados; com eles, pagina por essa ordem. Com ``Accept: application/x-ndjson`` ou ``text/csv``
+    a resposta é transmitida em streaming (sempre completa, sem paginação).
+    """
+    state = await history_service.get_execution_state(db, execution_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+
+    media_type = _negotiate_stream(request.headers.get("accept", ""))
+    if media_type is not None:
+        return StreamingResponse(
+            _stream_results(
+                execution_id, media_type, state.archive_path, state.started_at, wants_primary(request),
+            ),
+            media_type=media_type,
+        )
+
+    if limit is None and cursor is None:
+        rows = await history_service.get_test_results(
+            db, execution_id, archive_path=state.archive_path, started_at=state.started_at,
+        )
+        return Response(content=RESULTS_JSON.dumps(rows), media_type="application/json")
+
+    limit = limit or 1000
+    rows = await history_service.get_test_results(
+        db,
+        execution_id,
+        limit=limit + 1,
+        after=parse_cursor(cursor, RESULT_CURSOR),
+        archive_path=state.archive_path,
+        started_at=state.started_at,
+    )
+    page, next_cursor = paginate(rows, limit, key=lambda r: (r.seq,))
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=RESULTS_JSON.dumps(page), media_type="application/json", headers=headers)
+
+
+# ── Eventos ao vivo ───────────────────────────────────────────────────
+
+async def _execution_events(execution_id: UUID) -> AsyncIterator[dict]:
+    """Snapshot da execução seguido dos eventos ao vivo, até ``finished``.
+
+    A assinatura é feita antes do snapshot, então nada gravado entre os dois
+    se perde. Emite ``keepalive`` quando não há eventos no intervalo.
+    """
+    sub = events.broker.subscribe(str(execution_id))
+    try:
+        async with open_session() as session:
+            row = await history_service.get_execution_row(session, execution_id)
+        if row is None:
+            return
+        yield {
+            "type": "snapshot",
+            "execution": ExecutionResponse(**row._mapping).model_dump(mode="json"),
+        }
+        if row.finished_at is not None:
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.get(), timeout=settings.events_keepalive_seconds)
+            except TimeoutError:
+                yield {"type": "keepalive"}
+                continue
+            yield event
+            if event["type"] == "finished":
+                return
+    finally:
+        events.broker.unsubscribe(sub)
+
+
+def _encode_sse(event: dict, seq: int) -> bytes:
+    if event["type"] == "keepalive":
+        return b": keepalive\n\n"
+    data = json.dumps(event, default=str, ensure_ascii=False)
+    return f"id: {seq}\nevent: {event['type']}\ndata: {data}\n\n".encode()
+
+
+async def _stream_sse(execution_id: UUID) -> AsyncIterator[bytes]:
+    seq = 0
+    async for event in _execution_events(execution_id):
+        seq += 1
+        yield _encode_sse(event, seq)
+
+
+@router.get(
+    "/{execution_id}/events",
+    responses={200: {"content": {SSE_MEDIA_TYPE: {"schema": {"type": "string"}}}}},
+)
+async def execution_events(execution_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Progresso ao vivo (Server-Sent Events).
+
+    Eventos: ``snapshot`` (estado atual), ``results`` (resultados recém
+    gravados), ``progress`` (contadores), ``finished`` (totais finais) e
+    ``lagged`` (eventos descartados por lentidão do cliente — releia o
+    estado). O stream termina após ``finished``. Também disponível via
+    WebSocket na mesma rota.
+    """
+    if not await history_service.get_execution_state(db, execution_id):
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return StreamingResponse(
+        _stream_sse(execution_id),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/{execution_id}/events")
+async def execution_events_ws(websocket: WebSocket, execution_id: UUID):
+    """Mesmos eventos de ``GET /{id}/events``, um JSON por mensagem."""
+    await websocket.accept()
+    stream = _execution_events(execution_id)
+    sent = False
+    try:
+        async for event in stream:
+            await websocket.send_text(json.dumps(event, default=str, ensure_ascii=False))
+            sent = True
+        await websocket.close(code=1000 if sent else 4404)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.aclose()
@@ -4,6 +4,10 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
+from app.core import database, events
+from app.core.cache import response_cache
+from app.core.lifespan import startup_stats
+
 router = APIRouter()
 
 
@@ -11,3 +15,27 @@ router = APIRouter()
 async def health():
     """Status da API."""
     return {"status": "ok", "service": "coder-compliance-api"}
+
+
+@router.get("/health/cache")
+async def cache_stats():
+    """Contadores do cache de respostas (hit rate, 304s, queries economizadas)."""
+    return response_cache.stats()
+
+
+@router.get("/health/events")
+async def events_stats():
+    """Assinantes ativos do stream de eventos neste processo."""
+    return {**events.broker.stats(), "bridge": events.bridge is not None}
+
+
+@router.get("/health/replicas")
+async def replicas_stats():
+    """Replicas de leitura: disponibilidade, leituras e falhas; leituras no primario."""
+    return database.replica_set.stats()
+
+
+@router.get("/health/startup")
+async def startup_times():
+    """Tempos de partida deste processo: boot, aquecimento, primeiro request."""
+    return startup_stats()
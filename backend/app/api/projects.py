@@ -2,111 +2,219 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.cache import response_cache
+from app.core.database import get_db, get_read_db
+from app.core.pagination import (
+    EXECUTION_CURSOR,
+    NEXT_CURSOR_HEADER,
+    SCORE_HISTORY_CURSOR,
+    paginate,
+    parse_cursor,
+)
+from app.core.serialization import RowEncoder
 from app.schemas.responses import (
     ExecutionResponse,
     ProjectResponse,
     ScoreHistoryResponse,
+    ProjectUpdateRequest,
+    ScoreRollupResponse,
+    TestStatsResponse,
 )
 from app.services import history_service
+from app.services.downsampling import downsample_series
 
 router = APIRouter()
 
+# Listagens codificadas direto das linhas (ver core/serialization.py)
+PROJECTS_JSON = RowEncoder(ProjectResponse)
+EXECUTIONS_JSON = RowEncoder(ExecutionResponse)
+SCORE_HISTORY_JSON = RowEncoder(ScoreHistoryResponse)
+SCORE_ROLLUPS_JSON = RowEncoder(ScoreRollupResponse)
+TEST_STATS_JSON = RowEncoder(TestStatsResponse)
+
 
 @router.get("", response_model=list[ProjectResponse])
-async def list_projects(db: AsyncSession = Depends(get_db)):
+async def list_projects(request: Request, db: AsyncSession = Depends(get_read_db)):
     """Lista todos os projetos com último score (query otimizada)."""
-    rows = await history_service.get_projects_with_last_score(db)
-    return [
-        ProjectResponse(
-            id=row["project"].id,
-            nome=row["project"].nome,
-            descricao=row["project"].descricao or "",
-            stack=row["project"].stack or "",
-            last_score=row["last_score"],
-            last_execution_at=row["last_execution_at"],
-            created_at=row["project"].created_at,
-        )
-        for row in rows
-    ]
+
+    async def build():
+        rows = await history_service.get_projects_with_last_score(db)
+        return PROJECTS_JSON.dumps(rows), {}
+
+    return await response_cache.respond(request, build)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_project(project_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db)):
     """Detalhes de um projeto."""
-    project = await history_service.get_project_by_id(db, project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-    last_exec = await history_service.get_last_execution_for_project(db, project.id)
-    return ProjectResponse(
-        id=project.id,
-        nome=project.nome,
-        descricao=project.descricao or "",
-        stack=project.stack or "",
-        last_score=last_exec.score if last_exec else None,
-        last_execution_at=last_exec.started_at if last_exec else None,
-        created_at=project.created_at,
-    )
+    async def build():
+        row = await history_service.get_project_row(db, project_id)
+        if not row:
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        return ProjectResponse(**row._mapping), {}
+
+    return await response_cache.respond(request, build, project_id=project_id)
+
+
+@router.patch("/{project_id}", response_model=ProjectResponse)
+async def update_project(
+    project_id: UUID,
+    body: ProjectUpdateRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Atualiza configurações do projeto (retenção do histórico)."""
+    if "retention_days" in body.model_fields_set:
+        updated = await history_service.update_project_retention(
+            db, project_id, body.retention_days,
+        )
+        if not updated:
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        await db.commit()
+        await response_cache.bump(project_id)
+
+    row = await history_service.get_project_row(db, project_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return ProjectResponse(**row._mapping)
 
 
 @router.get("/{project_id}/executions", response_model=list[ExecutionResponse])
 async def get_project_executions(
     project_id: UUID,
-    limit: int = 20,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Últimas execuções de um projeto."""
-    project = await history_service.get_project_by_id(db, project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-    executions = await history_service.get_executions(db, project_id=project_id, limit=limit)
-    return [
-        ExecutionResponse(
-            id=e.id,
-            project_id=e.project_id,
-            projeto_nome=project.nome,
-            ambiente=e.ambiente,
-            started_at=e.started_at,
-            finished_at=e.finished_at,
-            score=e.score or 0.0,
-            total=e.total or 0,
-            passed=e.passed or 0,
-            failed=e.failed or 0,
-            errors=e.errors or 0,
-            skipped=e.skipped or 0,
-            duracao_ms=e.duracao_ms or 0.0,
+    async def build():
+        if not await history_service.project_exists(db, project_id):
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+
+        rows = await history_service.get_executions(
+            db,
+            project_id=project_id,
+            limit=limit + 1,
+            after=parse_cursor(cursor, EXECUTION_CURSOR),
         )
-        for e in executions
-    ]
+        page, next_cursor = paginate(rows, limit, key=lambda r: (r.started_at, r.id))
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return EXECUTIONS_JSON.dumps(page), headers
+
+    return await response_cache.respond(request, build, project_id=project_id, queries=2)
 
 
-@router.get("/{project_id}/history", response_model=list[ScoreHistoryResponse])
+def _ts(value: datetime | None) -> float:
+    return value.timestamp() if value else 0.0
+
+
+@router.get(
+    "/{project_id}/history",
+    response_model=list[ScoreHistoryResponse] | list[ScoreRollupResponse],
+)
 async def get_project_history(
     project_id: UUID,
-    limit: int = 30,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    limit: int = Query(30, ge=1, le=500),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    bucket: Literal["hour", "day", "week"] | None = Query(
+        None, description="Agrega por intervalo (usa score_rollups)",
+    ),
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    max_points: int | None = Query(
+        None, ge=3, le=5000, description="Máximo de pontos por runner (LTTB)",
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Histórico de scores por runner (para gráfico)."""
-    project = await history_service.get_project_by_id(db, project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    """Histórico de scores por runner (para gráfico).
+
+    Sem ``bucket`` devolve os registros brutos (paginados, mais recentes
+    primeiro). Com ``bucket`` devolve os rollups do intervalo ``[from, to)``
+    em ordem cronológica, sem paginação; ``max_points`` reduz cada série
+    preservando a forma da curva e exige ``bucket`` (numa página a redução
+    não teria a janela inteira). Intervalos sem score ficam de fora da série
+    reduzida.
+    """
+    if max_points and bucket is None:
+        raise HTTPException(status_code=400, detail="max_points exige bucket")
+
+    async def build():
+        if not await history_service.project_exists(db, project_id):
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+
+        if bucket is not None:
+            rows = await history_service.get_score_rollups(
+                db, project_id=project_id, bucket=bucket, start=start, end=end,
+            )
+            if max_points:
+                rows = downsample_series(
+                    [r for r in rows if r.score is not None],
+                    max_points,
+                    series=lambda r: r.runner_type,
+                    x=lambda r: _ts(r.bucket_start),
+                    y=lambda r: r.score,
+                )
+            return SCORE_ROLLUPS_JSON.dumps(rows), {}
+
+        rows = await history_service.get_score_history(
+            db,
+            project_id=project_id,
+            limit=limit + 1,
+            after=parse_cursor(cursor, SCORE_HISTORY_CURSOR),
+            start=start,
+            end=end,
+        )
+        page, next_cursor = paginate(rows, limit, key=lambda r: (r.recorded_at, r.id))
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return SCORE_HISTORY_JSON.dumps(page), headers
+
+    return await response_cache.respond(request, build, project_id=project_id, queries=2)
+
 
-    history = await history_service.get_score_history(db, project_id=project_id, limit=limit)
-    return [
-        ScoreHistoryResponse(
-            execution_id=h.execution_id,
-            runner_type=h.runner_type,
-            score=h.score or 0.0,
-            total=h.total or 0,
-            passed=h.passed or 0,
-            recorded_at=h.recorded_at,
+@router.get("/{project_id}/tests/stats", response_model=list[TestStatsResponse])
+async def get_project_test_stats(
+    project_id: UUID,
+    request: Request,
+    executions: int = Query(20, ge=2, le=500, description="Janela: últimas N execuções finalizadas"),
+    tipo: str | None = Query(None),
+    grupo: str | None = Query(None),
+    flaky_only: bool = Query(False, description="Só testes que trocaram de status na janela"),
+    min_runs: int = Query(1, ge=1),
+    sort: Literal["flaky", "pass_rate", "p95", "nome"] = Query("flaky"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Taxa de aprovação, trocas de status (flakiness), última falha e
+    mediana/p95 de ``duracao_ms`` por teste ``(tipo, grupo, nome)``.
+
+    ``flip_rate`` = trocas pass↔falha / (execuções − 1); resultados ``skip``
+    não entram na conta. Ordenado pelos mais instáveis por padrão.
+    """
+
+    async def build():
+        if not await history_service.project_exists(db, project_id):
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        rows = await history_service.get_test_stats(
+            db,
+            project_id,
+            executions=executions,
+            tipo=tipo,
+            grupo=grupo,
+            flaky_only=flaky_only,
+            min_runs=min_runs,
+            sort=sort,
+            limit=limit,
         )
-        for h in history
-    ]
+        return TEST_STATS_JSON.dumps(rows), {}
+
+    return await response_cache.respond(request, build, project_id=project_id, queries=2)
@@ -1,23 +1,80 @@
-"""Endpoint para disparar auditorias via API.
+"""Endpoints da fila de auditorias.
 
-Na versao academica, o motor de execucao nao esta incluido.
-Este endpoint retorna uma mensagem informativa.
+POST enfileira o job e retorna imediatamente; a execucao fica com
+``worker.py``. GET consulta estado e progresso.
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from uuid import UUID
 
-from app.schemas.responses import RunRequest, RunResponse
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db, get_read_db
+from app.models.db_models import Run
+from app.schemas.responses import (
+    RunRequest,
+    RunResponse,
+    RunStatusResponse,
+    ScoreHistoryResponse,
+)
+from app.services import compliance_service, history_service, run_queue
+from app.services.compliance_service import RunnerUnavailableError
 
 router = APIRouter()
 
 
-@router.post("", response_model=RunResponse)
-async def run_tests(request: RunRequest):
-    """Dispara auditoria para um projeto (stub academico)."""
-    raise HTTPException(
-        status_code=501,
-        detail="Motor de auditoria nao disponivel nesta versao. "
-        "Consulte os dados existentes via GET /api/projects e /api/executions.",
+async def _run_status(db: AsyncSession, run: Run) -> RunStatusResponse:
+    status = RunStatusResponse.model_validate(run)
+    if run.status == run_queue.DONE and run.execution_id:
+        row = await history_service.get_execution_row(db, run.execution_id)
+        if row:
+            status.result = RunResponse(
+                execution_id=row.id,
+                score=row.score,
+                total=row.total,
+                passed=row.passed,
+                failed=row.failed,
+                message="Auditoria concluída",
+                runners=[
+                    ScoreHistoryResponse(**r._mapping)
+                    for r in await history_service.get_execution_scores(db, row.id)
+                ],
+            )
+    return status
+
+
+@router.post("", response_model=RunStatusResponse, status_code=202)
+async def run_tests(request: RunRequest, db: AsyncSession = Depends(get_db)):
+    """Enfileira uma auditoria para um projeto."""
+    if request.environment != "local" and not request.confirm:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Auditoria em '{request.environment}' requer confirm=true",
+        )
+    try:
+        compliance_service.resolve_types(request.types)
+    except RunnerUnavailableError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    run = await run_queue.enqueue(
+        db,
+        project_name=request.project_name,
+        types=request.types,
+        environment=request.environment,
+        options=request.model_dump(
+            include={"target_url", "concurrency", "rate", "http2", "incremental", "config_hash"}, exclude_none=True,
+        ),
     )
+    await db.commit()
+    return await _run_status(db, run)
+
+
+@router.get("/{run_id}", response_model=RunStatusResponse)
+async def get_run(run_id: UUID, db: AsyncSession = Depends(get_read_db)):
+    """Estado e progresso de uma auditoria."""
+    run = await run_queue.get_run(db, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run não encontrado")
+    return await _run_status(db, run)
@@ -0,0 +1,78 @@
+"""Endpoint de busca textual nos resultados."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.database import get_read_db
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    SEARCH_RECENT_CURSOR,
+    SEARCH_RELEVANCE_CURSOR,
+    paginate,
+    parse_cursor,
+)
+from app.core.serialization import RowEncoder
+from app.schemas.responses import SearchHitResponse
+from app.services import history_service
+
+router = APIRouter()
+
+SEARCH_HITS_JSON = RowEncoder(SearchHitResponse)
+
+
+@router.get("", response_model=list[SearchHitResponse])
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Termos (fts) ou trecho (substring)"),
+    mode: Literal["fts", "substring"] = Query("fts"),
+    project_id: UUID | None = Query(None),
+    since: datetime | None = Query(None, description="Execuções iniciadas a partir de"),
+    until: datetime | None = Query(None, description="Execuções iniciadas antes de"),
+    status: list[Literal["pass", "fail", "error", "skip"]] | None = Query(None),
+    tipo: str | None = Query(None),
+    sort: Literal["relevance", "recent"] = Query("relevance"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Busca no nome dos testes e nos ``detalhes`` dos resultados.
+
+    ``fts`` aceita a sintaxe de busca web (``"frase exata"``, ``-termo``,
+    ``or``) e traz ``snippet`` com os termos marcados; ``substring`` procura
+    o trecho literal (mínimo de 3 caracteres). Resultados de execuções
+    arquivadas não entram.
+    """
+    if mode == "substring" and len(q.strip()) < 3:
+        raise HTTPException(status_code=422, detail="Busca por trecho exige ao menos 3 caracteres")
+    cursor_types = SEARCH_RELEVANCE_CURSOR if sort == "relevance" else SEARCH_RECENT_CURSOR
+
+    def page_key(r):
+        key = (r.started_at, r.execution_id, r.seq)
+        return (r.rank, *key) if sort == "relevance" else key
+
+    async def build():
+        rows = await history_service.search_results(
+            db,
+            q.strip(),
+            mode=mode,
+            project_id=project_id,
+            since=since,
+            until=until,
+            status=status,
+            tipo=tipo,
+            sort=sort,
+            limit=limit + 1,
+            after=parse_cursor(cursor, cursor_types),
+        )
+        page, next_cursor = paginate(rows, limit, key=page_key)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return SEARCH_HITS_JSON.dumps(page), headers
+
+    return await response_cache.respond(request, build, project_id=project_id)
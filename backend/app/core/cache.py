@@ -0,0 +1,232 @@
+"""Cache de respostas HTTP com ETag e GET condicional.
+
+As chaves combinam rota + query string + contadores de versao. Cada projeto
+tem seu contador, e ha um contador global para listagens que cruzam projetos;
+a ingestao de uma execucao incrementa os dois (``bump``), o que invalida de
+uma vez todas as respostas derivadas sem precisar enumerar chaves.
+
+O backend e plugavel (``CacheBackend``). O padrao e um LRU+TTL em processo;
+com varios workers, cada processo tem seu proprio cache e seus contadores.
+A invalidacao entre processos (outros workers da API, o worker de
+auditorias) vem pelo ``NOTIFY`` dos eventos: a bridge de cada processo chama
+``invalidate`` (ver ``events``). Sem PostgreSQL nao ha esse aviso, e
+``serve.py`` desliga o cache quando sobe mais de um worker; o worker de
+auditorias entao so aparece nas respostas em cache apos o TTL.
+
+Requests de read-your-writes (``replicas.wants_primary``) nao leem nem gravam
+o cache: uma entrada pode ter sido montada antes da escrita do cliente, ou a
+partir de uma replica atrasada.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+from uuid import UUID
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.replicas import wants_primary
+
+GLOBAL_SCOPE = "global"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Corpo ja serializado de uma resposta, com ETag e headers extras."""
+
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class CacheBackend(Protocol):
+    """Interface de armazenamento do cache (em processo ou compartilhado)."""
+
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def set(self, key: str, value: CachedResponse, ttl: float) -> None: ...
+
+    async def get_version(self, scope: str) -> int: ...
+
+    async def incr_version(self, scope: str) -> int: ...
+
+
+class MemoryCacheBackend:
+    """LRU com TTL em memoria do processo."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> CachedResponse | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    async def incr_version(self, scope: str) -> int:
+        self._versions[scope] = self._versions.get(scope, 0) + 1
+        return self._versions[scope]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def encode_json(payload: Any) -> bytes:
+    """Serializa como o JSONResponse do FastAPI (mesmo formato no fio)."""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _request_key(request: Request) -> str:
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return f"{request.url.path}?{query}"
+
+
+def _immutable_key(request: Request) -> str:
+    return f"{_request_key(request)}#immutable"
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """Cache de respostas JSON versionado por projeto.
+
+    ``build`` devolve ``(payload, headers)`` e so e chamado em cache miss; o
+    numero de queries que ele executa (``queries``) alimenta o contador de
+    queries economizadas.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 60.0, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.queries_saved = 0
+        self.generation = 0  # local; ``invalidate(None)`` descarta todas as chaves
+
+    def set_backend(self, backend: CacheBackend) -> None:
+        """Troca o backend (ex.: um cache compartilhado entre workers)."""
+        self.backend = backend
+
+    async def bump(self, project_id: UUID | str) -> None:
+        """Invalida as respostas do projeto e as listagens globais."""
+        await self.backend.incr_version(f"project:{project_id}")
+        await self.backend.incr_version(GLOBAL_SCOPE)
+
+    async def invalidate(self, project_id: UUID | str | None) -> None:
+        """Aviso de escrita de outro processo; ``None`` (avisos perdidos) invalida tudo."""
+        if project_id is None:
+            self.generation += 1
+        else:
+            await self.bump(project_id)
+
+    async def _key(self, request: Request, project_id: UUID | None) -> str:
+        scope = f"project:{project_id}" if project_id else GLOBAL_SCOPE
+        version = await self.backend.get_version(scope)
+        return f"{_request_key(request)}#{scope}@{version}.{self.generation}"
+
+    async def respond(
+        self,
+        request: Request,
+        build: Callable[[], Awaitable[tuple[Any, dict[str, str]]]],
+        project_id: UUID | None = None,
+        queries: int = 1,
+        immutable: bool = False,
+    ) -> Response:
+        """Responde do cache quando possivel, com ETag forte e 304 condicional.
+
+        O payload de ``build`` pode vir ja codificado (``bytes``, ex.:
+        ``RowEncoder.dumps``); senao passa por ``encode_json``.
+        ``immutable`` marca respostas que nunca mudam para a mesma URL (ex.:
+        diff entre execucoes finalizadas): a chave ignora os contadores de
+        versao e o TTL e ``settings.cache_immutable_ttl_seconds``. Com
+        ``wants_primary(request)`` o cache e ignorado (leitura e gravacao).
+        """
+        entry = None
+        key = None
+        if self.enabled and not wants_primary(request):
+            key = _immutable_key(request) if immutable else await self._key(request, project_id)
+            entry = await self.backend.get(key)
+
+        if entry is not None:
+            self.hits += 1
+            self.queries_saved += queries
+        else:
+            self.misses += 1
+            payload, headers = await build()
+            body = payload if isinstance(payload, bytes) else encode_json(payload)
+            entry = CachedResponse(body=body, etag=_etag(body), headers=headers)
+            if key is not None:
+                ttl = settings.cache_immutable_ttl_seconds if immutable else self.ttl
+                await self.backend.set(key, entry, ttl)
+
+        cache_control = (
+            f"max-age={int(settings.cache_immutable_ttl_seconds)}, immutable" if immutable else "no-cache"
+        )
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": cache_control}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        """Contadores de uso do cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "queries_saved": self.queries_saved,
+        }
+
+
+response_cache = ResponseCache(
+    MemoryCacheBackend(settings.cache_max_entries),
+    ttl=settings.cache_ttl_seconds,
+    enabled=settings.cache_enabled,
+)
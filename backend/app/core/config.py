@@ -10,16 +10,101 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     """Settings carregados do .env."""
 
-    # Database (Supabase PostgreSQL)
+    # Database (Supabase PostgreSQL ou sqlite+aiosqlite:///arquivo.db)
     db_url: str = ""
+    # Pool e timeout do primario (escritas e leituras sem replica)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_statement_timeout_ms: int = 0  # 0 = sem limite
+    # Replicas de leitura (lista JSON ou separada por virgulas) e seu pool
+    db_replica_urls: str = ""
+    db_read_pool_size: int = 10
+    db_read_max_overflow: int = 10
+    db_read_pool_timeout: float = 5.0
+    db_read_statement_timeout_ms: int = 30_000
+    db_replica_retry_seconds: float = 30.0  # quarentena de uma replica que falhou
+    db_read_your_writes_seconds: float = 5.0  # leituras no primario apos uma escrita
+    # Pragmas do SQLite (ver core/dialects.py)
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_mb: int = 64
+    sqlite_mmap_size_mb: int = 256
 
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_cors_origins: str = '["http://localhost:5173"]'
+    # Producao (serve.py): processos, drenagem no shutdown e aquecimento no startup
+    api_workers: int = 0  # 0 = numero de CPUs
+    api_graceful_timeout: int = 30  # segundos para terminar requests em andamento
+    db_warmup: bool = True
+
+    # Ingestao
+    ingest_batch_size: int = 1000
+    ingest_max_line_bytes: int = 1_048_576
+
+    # Redacao de segredos em ``detalhes`` na ingestao (ver redaction.py)
+    redaction_enabled: bool = True
+    redaction_min_entropy: float = 3.5  # bits/caractere (hex: 3.0)
+    redaction_min_token_length: int = 24
+
+    # Resumo por projeto: janela (em execucoes) da taxa de aprovacao movel
+    summary_window: int = 10
+
+    # Retencao e arquivamento (0 = sem expiracao)
+    retention_days: int = 0
+    archive_dir: str = "archive"
+    partition_months_ahead: int = 3
+
+    # Fila de auditorias (worker.py)
+    worker_concurrency: int = 4
+    run_lease_seconds: int = 60
+    run_heartbeat_seconds: int = 15
+    run_poll_seconds: float = 1.0
+    run_max_attempts: int = 3
+
+    # Motor de probes HTTP (runners api/security)
+    probe_concurrency: int = 16
+    probe_rate: float = 0.0  # req/s por alvo (0 = sem limite)
+    probe_timeout_seconds: float = 10.0
+    probe_http2: bool = False
+    probe_max_connections: int = 100
+    probe_latency_threshold_ms: float = 2000.0
+    probe_rate_limit_burst: int = 30
+
+    # Eventos ao vivo (SSE/WebSocket; NOTIFY entre workers)
+    events_enabled: bool = True
+    events_buffer_size: int = 256
+    events_keepalive_seconds: float = 15.0
+
+    # Streaming de leitura (NDJSON/CSV)
+    stream_chunk_size: int = 1000
+
+    # Cache de respostas (ETag / GET condicional)
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 60.0
+    cache_max_entries: int = 1024
+    cache_immutable_ttl_seconds: float = 3600.0
+
+    # Metricas (GET /api/metrics, formato Prometheus) e log de queries lentas
+    metrics_enabled: bool = True
+    slow_query_ms: float = 500.0  # 0 = desligado
+    slow_query_max_chars: int = 1000
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
+    @property
+    def replica_urls(self) -> list[str]:
+        """Parseia a lista de replicas de leitura."""
+        raw = self.db_replica_urls.strip()
+        if raw.startswith("["):
+            try:
+                return [u for u in json.loads(raw) if u]
+            except (json.JSONDecodeError, TypeError):
+                return []
+        return [u.strip() for u in raw.split(",") if u.strip()]
+
     @property
     def cors_origins(self) -> list[str]:
         """Parseia a lista de origens CORS."""
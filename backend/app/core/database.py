@@ -1,30 +1,184 @@
-"""Database — SQLAlchemy async engine para Supabase PostgreSQL."""
+"""Database — SQLAlchemy async engine para Supabase PostgreSQL ou SQLite.
+
+Com ``DB_URL=sqlite+aiosqlite:///arquivo.db`` o backend roda sem servidor de
+banco (instalacoes de um no so): pragmas e funcoes SQL vem de
+``dialects.configure_sqlite`` e o schema e criado por ``init_schema`` no
+startup. Em PostgreSQL o schema vem de ``supabase_schema.sql``.
+
+Com ``DB_REPLICA_URLS`` as rotas GET leem das replicas (``get_read_db``,
+ver ``replicas.py``); escritas e leituras logo apos uma escrita do mesmo
+cliente ficam no primario. Pool e ``statement_timeout`` sao configurados por
+papel (``DB_*`` para o primario, ``DB_READ_*`` para as replicas).
+"""
 
 from __future__ import annotations
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
 
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import dialects, metrics
 from app.core.config import settings
+from app.core.replicas import ReplicaSet, wants_primary
+from app.models.db_models import Base
+
+
+def create_engine(db_url: str, **kwargs) -> AsyncEngine:
+    """Engine async para ``db_url``, com os ajustes do dialeto."""
+    url = make_url(db_url)
+    if url.get_backend_name() == "sqlite":
+        if url.database and url.database != ":memory:":
+            Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+        engine = create_async_engine(url, **kwargs)
+        dialects.configure_sqlite(engine.sync_engine)
+        return engine
+    return create_async_engine(url, **kwargs)
+
+
+async def init_schema(engine: AsyncEngine) -> None:
+    """Cria as tabelas que faltam em SQLite (idempotente; no-op em PostgreSQL)."""
+    if engine.dialect.name != "sqlite":
+        return
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
 
-engine = None
-async_session_factory = None
+def pool_options(
+    db_url: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: float,
+    statement_timeout_ms: int,
+) -> dict:
+    """Argumentos de ``create_engine`` para um papel (primario ou replica).
 
-if settings.db_url:
-    engine = create_async_engine(
+    SQLite usa o pool padrao do dialeto. Em PostgreSQL (asyncpg) o
+    ``statement_timeout`` vai como parametro de sessao de cada conexao.
+    """
+    if make_url(db_url).get_backend_name() == "sqlite":
+        return {}
+    options = {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+    if statement_timeout_ms > 0:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout_ms)}}
+    return options
+
+
+def _session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(bind, class_=AsyncSession, expire_on_commit=False)
+
+
+engine: AsyncEngine | None = None
+async_session_factory: async_sessionmaker | None = None
+read_engines: list[AsyncEngine] = []
+replica_set = ReplicaSet([], [], settings.db_replica_retry_seconds)
+
+
+def connect() -> None:
+    """Cria os engines (primario e replicas) de ``settings``; idempotente.
+
+    Chamado no lifespan do app (cada processo de ``serve.py`` cria os seus,
+    depois do fork) e no inicio do worker e dos benchmarks. ``open_session``
+    tambem conecta sob demanda, para scripts que nao passam pelo lifespan.
+    """
+    global engine, async_session_factory, read_engines, replica_set
+    if engine is not None or not settings.db_url:
+        return
+    engine = create_engine(
         settings.db_url,
         echo=False,
-        pool_size=5,
-        max_overflow=10,
-        pool_pre_ping=True,
+        **pool_options(
+            settings.db_url,
+            settings.db_pool_size,
+            settings.db_max_overflow,
+            settings.db_pool_timeout,
+            settings.db_statement_timeout_ms,
+        ),
     )
-    async_session_factory = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False,
+    if settings.metrics_enabled:
+        metrics.instrument_engine(engine)
+    async_session_factory = _session_factory(engine)
+
+    read_engines = []
+    for i, url in enumerate(settings.replica_urls):
+        read_engines.append(create_engine(
+            url,
+            echo=False,
+            **pool_options(
+                url,
+                settings.db_read_pool_size,
+                settings.db_read_max_overflow,
+                settings.db_read_pool_timeout,
+                settings.db_read_statement_timeout_ms,
+            ),
+        ))
+        if settings.metrics_enabled:
+            metrics.instrument_engine(read_engines[-1], f"replica-{i}")
+    replica_set = ReplicaSet(
+        [f"replica-{i}" for i in range(len(read_engines))],
+        [_session_factory(e) for e in read_engines],
+        settings.db_replica_retry_seconds,
     )
 
 
-async def get_db():
-    """Dependency FastAPI que fornece uma sessão async do banco."""
+async def dispose() -> None:
+    """Fecha as conexoes de todos os engines (shutdown do app ou do worker)."""
+    global engine, async_session_factory, read_engines, replica_set
+    for e in [engine, *read_engines]:
+        if e is not None:
+            await e.dispose()
+    engine = async_session_factory = None
+    read_engines = []
+    replica_set = ReplicaSet([], [], settings.db_replica_retry_seconds)
+
+
+def open_session() -> AsyncSession:
+    """Abre uma sessão avulsa, fora do ciclo de vida das dependências.
+
+    Usada por respostas em streaming, cujo gerador roda depois que as
+    dependências do endpoint já foram encerradas.
+    """
+    connect()
     if async_session_factory is None:
         raise RuntimeError("DB_URL não configurada. Verifique o .env")
-    async with async_session_factory() as session:
+    return async_session_factory()
+
+
+async def get_db():
+    """Dependency FastAPI que fornece uma sessão async do banco."""
+    async with open_session() as session:
+        yield session
+
+
+@asynccontextmanager
+async def open_read_session(primary: bool = False) -> AsyncIterator[AsyncSession]:
+    """Sessao de leitura: uma replica disponivel (round-robin) ou o primario.
+
+    ``primary`` forca o primario (read-your-writes). Sem replicas, ou com
+    todas fora do ar, tambem cai no primario.
+    """
+    connect()
+    picked = None if primary else await replica_set.open()
+    if picked is None:
+        replica_set.primary_reads += 1
+        async with open_session() as session:
+            yield session
+        return
+    session, _ = picked
+    async with session:
+        yield session
+
+
+async def get_read_db(request: Request):
+    """Dependency das rotas GET: sessao de leitura (ver ``open_read_session``)."""
+    async with open_read_session(primary=wants_primary(request)) as session:
         yield session
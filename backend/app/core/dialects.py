@@ -0,0 +1,109 @@
+"""Portabilidade entre PostgreSQL e SQLite.
+
+O backend roda em PostgreSQL (Supabase) ou, em instalacoes de um no so, em
+SQLite (``DB_URL=sqlite+aiosqlite:///./coder_compliance.db``). As queries de
+``history_service`` sao as mesmas nos dois; o que difere fica aqui:
+
+- ``configure_sqlite``: pragmas de cada conexao (WAL, ``synchronous=NORMAL``,
+  chaves estrangeiras, ``busy_timeout``, cache e mmap) e a funcao
+  ``result_id`` (em PostgreSQL ela vem de ``supabase_schema.sql``);
+- ``greatest``/``least``: em SQLite viram ``max``/``min`` escalares, com a
+  mesma semantica de ignorar NULL;
+- ``insert_for``: INSERT com ``on_conflict_do_update``/``do_nothing`` do
+  dialeto da sessao.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import ReturnTypeFromArgs
+
+from app.core.config import settings
+
+
+def dialect_name(db: AsyncSession) -> str:
+    """Nome do dialeto da sessao (``postgresql`` ou ``sqlite``)."""
+    return db.get_bind().dialect.name
+
+
+def insert_for(db: AsyncSession, table):
+    """``insert`` com suporte a ON CONFLICT no dialeto de ``db``."""
+    return (sqlite_insert if dialect_name(db) == "sqlite" else pg_insert)(table)
+
+
+# ── greatest/least ─────────────────────────────────────────────────────
+
+# Registradas por nome: ``func.greatest``/``func.least`` passam a usar estas
+# classes assim que o modulo e importado.
+class greatest(ReturnTypeFromArgs):  # noqa: N801
+    inherit_cache = True
+
+
+class least(ReturnTypeFromArgs):  # noqa: N801
+    inherit_cache = True
+
+
+def _scalar_extreme(fn: str, element, compiler, **kw) -> str:
+    # max()/min() escalares do SQLite devolvem NULL se algum argumento e
+    # NULL; ``coalesce`` de cada argumento com os demais ignora os nulos.
+    args = [compiler.process(arg, **kw) for arg in element.clauses]
+    if len(args) < 2:
+        return args[0] if args else "NULL"
+    rotated = [
+        f"coalesce({', '.join([a, *args[:i], *args[i + 1:]])})" for i, a in enumerate(args)
+    ]
+    return f"{fn}({', '.join(rotated)})"
+
+
+@compiles(greatest, "sqlite")
+def _greatest_sqlite(element, compiler, **kw):
+    return _scalar_extreme("max", element, compiler, **kw)
+
+
+@compiles(least, "sqlite")
+def _least_sqlite(element, compiler, **kw):
+    return _scalar_extreme("min", element, compiler, **kw)
+
+
+# ── SQLite ─────────────────────────────────────────────────────────────
+
+def _sqlite_pragmas() -> dict[str, object]:
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "cache_size": -settings.sqlite_cache_size_mb * 1024,  # negativo = KiB
+        "temp_store": "MEMORY",
+        "mmap_size": settings.sqlite_mmap_size_mb * 1024 * 1024,
+    }
+
+
+def _sqlite_result_id(execution_id: str | None, seq: int | None) -> str | None:
+    """``result_id`` para SQLite: o UUID e gravado como 32 hex (``Uuid``)."""
+    if execution_id is None or seq is None:
+        return None
+    return hashlib.md5(f"{uuid.UUID(execution_id)}:{seq}".encode()).hexdigest()
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """Aplica pragmas e registra funcoes em cada conexao nova de ``engine``."""
+    pragmas = _sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        dbapi_connection.create_function("result_id", 2, _sqlite_result_id, deterministic=True)
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
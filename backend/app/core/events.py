@@ -0,0 +1,306 @@
+"""Eventos ao vivo das execucoes (SSE/WebSocket em /api/executions/{id}/events).
+
+Fluxo: a ingestao chama ``publish`` dentro da sua transacao. Em PostgreSQL o
+evento vai como ``NOTIFY`` no canal ``EVENTS_CHANNEL`` — entregue somente no
+commit e a todos os processos da API, inclusive o worker de auditorias; cada
+processo da API mantem uma conexao ``LISTEN`` (``PgEventBridge``) que repassa
+os eventos ao ``EventBroker`` local. Sem PostgreSQL, o evento e entregue
+direto ao broker do proprio processo apos o commit.
+
+O mesmo canal invalida o cache de respostas entre processos: o envelope de
+eventos que mudam o projeto leva ``project`` (``publish(..., project_id=...)``),
+e escritas sem evento ao vivo usam ``touch``; a bridge chama ``on_project``
+(``response_cache.invalidate``) em cada processo da API. Sem PostgreSQL nao ha
+entrega entre processos; ``serve.py`` desliga o cache com varios workers.
+
+Cada assinante tem um buffer limitado: se o cliente nao acompanha, os eventos
+mais antigos sao descartados e o proximo evento entregue e um ``lagged`` com a
+contagem perdida (o cliente deve reler o estado). Publicar nunca bloqueia.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import event as sa_event
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "cc_execution_events"
+# Limite do payload do NOTIFY e 8000 bytes; folga para o envelope
+NOTIFY_MAX_BYTES = 7500
+
+_PENDING_KEY = "pending_events"
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+# ── Broker em processo ────────────────────────────────────────────────
+
+class Subscription:
+    """Fila limitada de eventos de um assinante (descarta os mais antigos)."""
+
+    __slots__ = ("key", "maxsize", "dropped", "_queue", "_ready")
+
+    def __init__(self, key: str, maxsize: int):
+        self.key = key
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._queue: deque[dict] = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, event: dict) -> None:
+        if len(self._queue) >= self.maxsize:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(event)
+        self._ready.set()
+
+    def mark_lagged(self) -> None:
+        self.dropped += 1
+        self._ready.set()
+
+    async def get(self) -> dict:
+        """Proximo evento; ``lagged`` vem antes, mesmo com a fila vazia."""
+        while not self._queue and not self.dropped:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return {"type": "lagged", "dropped": dropped}
+        return self._queue.popleft()
+
+
+class EventBroker:
+    """Pub/sub em processo, por chave (id da execucao)."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, key: str, maxsize: int | None = None) -> Subscription:
+        sub = Subscription(key, maxsize or settings.events_buffer_size)
+        self._subscribers.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.key)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.key]
+
+    def publish_local(self, key: str, events: Sequence[dict]) -> None:
+        for sub in self._subscribers.get(key, ()):
+            for ev in events:
+                sub.put(ev)
+
+    def mark_lagged(self) -> None:
+        """Sinaliza a todos os assinantes que eventos podem ter se perdido."""
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.mark_lagged()
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
+
+
+broker = EventBroker()
+
+
+# ── Publicacao (lado da ingestao) ──────────────────────────────────────
+
+def _encode_payloads(key: str, events: Sequence[dict], project_id: UUID | str | None = None) -> list[str]:
+    """Um payload de NOTIFY por evento, abaixo de ``NOTIFY_MAX_BYTES``.
+
+    Eventos ``results`` grandes sao divididos em varios; ``detalhes`` muito
+    longos sao truncados no evento (o resultado gravado fica intacto). Com
+    ``project_id``, os eventos que nao sao ``results`` (um ``progress`` ou
+    ``finished`` por lote) levam ``project`` no envelope.
+    """
+    prefix = f'{{"key":{_dumps(key)},"event":'
+    tagged = f'{{"key":{_dumps(key)},"project":{_dumps(str(project_id))},"event":' if project_id else prefix
+    budget = NOTIFY_MAX_BYTES - len(prefix) - 64
+    payloads: list[str] = []
+
+    def emit_results(rows: list[str]) -> None:
+        payloads.append(f'{prefix}{{"type":"results","results":[{",".join(rows)}]}}}}')
+
+    for ev in events:
+        if ev.get("type") != "results":
+            payloads.append(f"{tagged}{_dumps(ev)}}}")
+            continue
+        rows: list[str] = []
+        size = 0
+        for r in ev["results"]:
+            encoded = _dumps(r)
+            if len(encoded.encode()) > budget:
+                encoded = _dumps({**r, "detalhes": str(r.get("detalhes", ""))[:1000] + "…"})
+            n = len(encoded.encode()) + 1
+            if rows and size + n > budget:
+                emit_results(rows)
+                rows, size = [], 0
+            rows.append(encoded)
+            size += n
+        if rows:
+            emit_results(rows)
+    return payloads
+
+
+_NOTIFY_BATCH = text("SELECT count(pg_notify(:channel, p)) FROM unnest(CAST(:payloads AS text[])) AS p")
+
+
+async def publish(
+    db: AsyncSession, key: str, events: Sequence[dict], project_id: UUID | str | None = None,
+) -> None:
+    """Publica eventos de ``key`` na transacao de ``db`` (entregues no commit).
+
+    ``project_id`` invalida o cache de respostas do projeto nos outros
+    processos (PostgreSQL).
+    """
+    if not settings.events_enabled or not events:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        # Todos os payloads do lote num unico comando (um round trip por lote)
+        payloads = _encode_payloads(key, events, project_id)
+        await db.execute(_NOTIFY_BATCH, {"channel": EVENTS_CHANNEL, "payloads": payloads})
+        return
+    db.sync_session.info.setdefault(_PENDING_KEY, []).append((key, list(events)))
+
+
+async def touch(db: AsyncSession, project_id: UUID | str) -> None:
+    """Invalida o cache do projeto nos processos da API no commit (PostgreSQL; sem evento)."""
+    if not settings.events_enabled or db.get_bind().dialect.name != "postgresql":
+        return
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": EVENTS_CHANNEL, "payload": _dumps({"project": str(project_id)})},
+    )
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session) -> None:
+    for key, events in session.info.pop(_PENDING_KEY, ()):
+        broker.publish_local(key, events)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# ── Bridge LISTEN/NOTIFY (lado da API) ─────────────────────────────────
+
+class PgEventBridge:
+    """Conexao asyncpg dedicada em ``LISTEN`` que alimenta o broker local.
+
+    Reconecta sozinha; durante a queda os assinantes recebem ``lagged`` e
+    ``on_project`` e chamado com ``None`` (invalidar tudo: avisos perdidos).
+    """
+
+    def __init__(
+        self,
+        db_url: str,
+        target: EventBroker = broker,
+        retry_seconds: float = 2.0,
+        on_project: Callable[[str | None], Awaitable[None]] | None = None,
+    ):
+        self.dsn = make_url(db_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.target = target
+        self.retry_seconds = retry_seconds
+        self.on_project = on_project
+        self._task: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _notify_project(self, project_id: str | None) -> None:
+        if self.on_project is None:
+            return
+        task = asyncio.get_running_loop().create_task(self.on_project(project_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            if "project" in data:
+                self._notify_project(data["project"])
+            if "event" in data:
+                self.target.publish_local(data["key"], [data["event"]])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("payload de evento invalido ignorado")
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _c: closed.set())
+                await conn.add_listener(EVENTS_CHANNEL, self._on_notify)
+                logger.info("bridge de eventos escutando '%s'", EVENTS_CHANNEL)
+                await closed.wait()
+                logger.warning("conexao LISTEN encerrada; reconectando")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("falha na bridge de eventos; nova tentativa em %.0fs", self.retry_seconds)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            self.target.mark_lagged()
+            self._notify_project(None)
+            await asyncio.sleep(self.retry_seconds)
+
+
+bridge: PgEventBridge | None = None
+
+
+async def start_bridge() -> None:
+    """Sobe a bridge quando o banco e PostgreSQL (chamado no startup da API)."""
+    global bridge
+    if not settings.events_enabled or not settings.db_url:
+        return
+    if make_url(settings.db_url).get_backend_name() != "postgresql":
+        return
+    from app.core.cache import response_cache
+
+    bridge = PgEventBridge(settings.db_url, on_project=response_cache.invalidate)
+    bridge.start()
+
+
+async def stop_bridge() -> None:
+    global bridge
+    if bridge is not None:
+        await bridge.stop()
+        bridge = None
@@ -0,0 +1,127 @@
+"""Ciclo de vida do app: engines, aquecimento e tempos de partida.
+
+No startup (``lifespan``), antes de aceitar trafego: cria os engines
+(``database.connect``), o schema em SQLite, abre as conexoes persistentes de
+cada pool (``pool_size``) e roda ``history_service.warm_up`` em cada engine,
+para que o primeiro request nao pague conexao nem compilacao de SQL
+(``DB_WARMUP``). Replica que falha no aquecimento sai da rotacao; falha no
+primario aborta o startup. No shutdown, depois de drenados os requests, fecha
+a bridge de eventos e os pools.
+
+``startup`` guarda os tempos do processo (``/api/health/startup``): startup
+do lifespan, aquecimento e o primeiro request atendido. Partida a frio
+completa (interpretador e imports inclusos), medida de fora com processos
+reais: ``python -m benchmarks.bench_startup``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core import database, events
+from app.core.config import settings
+from app.services import history_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupStats:
+    startup_ms: float | None = None  # inicio do lifespan ate pronto para aceitar trafego
+    warmup_ms: float | None = None
+    connections: int = 0  # conexoes abertas no aquecimento (todos os pools)
+    statements: int = 0  # leituras executadas no aquecimento (todos os engines)
+    ready_to_first_request_ms: float | None = None
+    first_request_ms: float | None = None  # latencia do primeiro request
+
+
+startup = StartupStats()
+_ready_at: float | None = None
+
+
+async def _warm_pool(engine: AsyncEngine) -> int:
+    """Abre as conexoes persistentes do pool de uma vez e as devolve."""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    conns = await asyncio.gather(*(engine.connect() for _ in range(size)), return_exceptions=True)
+    for conn in conns:
+        if not isinstance(conn, BaseException):
+            await conn.close()
+    errors = [c for c in conns if isinstance(c, BaseException)]
+    if errors:
+        raise errors[0]
+    return size
+
+
+async def _warm_engine(engine: AsyncEngine) -> None:
+    startup.connections += await _warm_pool(engine)
+    async with AsyncSession(engine) as db:
+        startup.statements += await history_service.warm_up(db)
+
+
+async def warm_up() -> None:
+    """Aquece o primario e as replicas (as que falham saem da rotacao)."""
+    t0 = time.perf_counter()
+    startup.connections = startup.statements = 0
+    await _warm_engine(database.engine)
+    for i, engine in enumerate(database.read_engines):
+        try:
+            await _warm_engine(engine)
+        except Exception:
+            logger.warning("aquecimento de %s falhou", database.replica_set.names[i], exc_info=True)
+            database.replica_set.mark_down(i)
+    startup.warmup_ms = (time.perf_counter() - t0) * 1000
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _ready_at
+    t0 = time.perf_counter()
+    database.connect()
+    if database.engine is not None:
+        await database.init_schema(database.engine)
+        if settings.db_warmup:
+            await warm_up()
+    await events.start_bridge()
+    _ready_at = time.perf_counter()
+    startup.startup_ms = (_ready_at - t0) * 1000
+    logger.info(
+        "pronto em %.0f ms (aquecimento %.0f ms, %d conexoes, %d leituras)",
+        startup.startup_ms, startup.warmup_ms or 0, startup.connections, startup.statements,
+    )
+    try:
+        yield
+    finally:
+        await events.stop_bridge()
+        await database.dispose()
+
+
+class StartupTimingMiddleware:
+    """Registra quando o primeiro request chegou e quanto ele levou."""
+
+    def __init__(self, app):
+        self.app = app
+        self._seen = False
+
+    async def __call__(self, scope, receive, send):
+        if self._seen or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self._seen = True
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            startup.first_request_ms = (time.perf_counter() - t0) * 1000
+            if _ready_at is not None:
+                startup.ready_to_first_request_ms = (t0 - _ready_at) * 1000
+
+
+def startup_stats() -> dict:
+    return asdict(startup)
@@ -0,0 +1,318 @@
+"""Metricas em processo (formato texto do Prometheus) e log de queries lentas.
+
+Duas fontes alimentam o ``registry``:
+
+- ``MetricsMiddleware`` (ASGI): latencia e status por rota — o template da
+  rota (``/api/projects/{project_id}``), nao o caminho, para nao explodir a
+  cardinalidade. Abre um ``RequestStats`` num ``ContextVar``, de modo que as
+  queries disparadas pelo request (inclusive no corpo de respostas em
+  streaming) sejam somadas a ele;
+- ``instrument_engine``: hooks do SQLAlchemy contando comandos, linhas
+  devolvidas e tempo de banco (por request e no total), espera por conexao no
+  pool e ocupacao do pool (lida na hora da coleta).
+
+Comandos acima de ``settings.slow_query_ms`` vao para o logger
+``app.slow_query`` com a rota de origem. ``GET /api/metrics`` expoe tudo.
+Cada processo tem seus contadores: com varios workers, o Prometheus coleta
+cada um (ou agrega por instancia).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+ROWS_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    """Contador monotonicamente crescente, por combinacao de labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {value:g}"
+
+
+class Histogram:
+    """Histograma de buckets fixos (cumulativos na exposicao), por labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [contagem por bucket (+Inf no fim), soma, total]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> Iterable[str]:
+        names = (*self.label_names, "le")
+        for labels, (counts, total, n) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, c in zip((*self.buckets, "+Inf"), counts):
+                cumulative += c
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                yield f"{self.name}_bucket{_labels(names, (*labels, le))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total:g}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {n}"
+
+
+class Registry:
+    """Conjunto de metricas do processo e gauges lidos na coleta."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._engines: list[tuple[str, AsyncEngine]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), **kw) -> Histogram:
+        metric = Histogram(name, help, labels, **kw)
+        self._metrics.append(metric)
+        return metric
+
+    def add_engine(self, name: str, engine: AsyncEngine) -> None:
+        """Inclui o pool de ``engine`` nos gauges ``db_pool_*`` (substitui o de mesmo nome)."""
+        self._engines = [(n, e) for n, e in self._engines if n != name] + [(name, engine)]
+
+    def _pool_gauges(self) -> Iterable[str]:
+        gauges = {
+            "db_pool_size": "Conexoes mantidas pelo pool",
+            "db_pool_checked_out": "Conexoes em uso",
+            "db_pool_overflow": "Conexoes alem de pool_size abertas agora",
+            "db_pool_saturation": "Conexoes em uso / capacidade (pool_size + max_overflow)",
+        }
+        samples: dict[str, list[str]] = {name: [] for name in gauges}
+        for engine_name, engine in self._engines:
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            size = pool.size()
+            capacity = size + max(0, getattr(pool, "_max_overflow", 0))
+            labels = _labels(("engine",), (engine_name,))
+            samples["db_pool_size"].append(f"db_pool_size{labels} {size}")
+            samples["db_pool_checked_out"].append(f"db_pool_checked_out{labels} {pool.checkedout()}")
+            samples["db_pool_overflow"].append(f"db_pool_overflow{labels} {max(0, pool.overflow())}")
+            saturation = pool.checkedout() / capacity if capacity > 0 else 0.0
+            samples["db_pool_saturation"].append(f"db_pool_saturation{labels} {saturation:g}")
+        for name, help in gauges.items():
+            if samples[name]:
+                yield f"# HELP {name} {help}"
+                yield f"# TYPE {name} gauge"
+                yield from samples[name]
+
+    def render(self) -> str:
+        """Todas as metricas no formato texto de exposicao do Prometheus."""
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        lines.extend(self._pool_gauges())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Requests HTTP atendidos", ("method", "route", "status"),
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Latencia dos requests (ate o fim do corpo)", ("method", "route"),
+)
+REQUEST_STATEMENTS = registry.histogram(
+    "http_request_db_statements", "Comandos SQL por request", ("route",), buckets=COUNT_BUCKETS,
+)
+REQUEST_ROWS = registry.histogram(
+    "http_request_db_rows", "Linhas devolvidas pelo banco por request", ("route",), buckets=ROWS_BUCKETS,
+)
+REQUEST_DB_TIME = registry.histogram(
+    "http_request_db_seconds", "Tempo de banco por request", ("route",),
+)
+DB_STATEMENTS = registry.counter("db_statements_total", "Comandos SQL executados", ("engine",))
+DB_ROWS = registry.counter("db_rows_total", "Linhas devolvidas ou afetadas", ("engine",))
+DB_LATENCY = registry.histogram("db_statement_duration_seconds", "Duracao dos comandos SQL", ("engine",))
+DB_SLOW = registry.counter("db_slow_queries_total", "Comandos acima de SLOW_QUERY_MS", ("engine", "route"))
+POOL_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Espera por uma conexao do pool", ("engine",),
+)
+
+
+@dataclass
+class RequestStats:
+    """Acumulado de banco de um request (mutavel: tarefas filhas herdam a referencia)."""
+
+    scope: dict
+    statements: int = 0
+    rows: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+
+def route_template(scope: dict) -> str:
+    """Caminho do request com os parametros de rota trocados por ``{nome}``.
+
+    O roteador grava rota e ``path_params`` no proprio ``scope`` antes de
+    chamar o endpoint. O template sai do caminho efetivo (o ``path`` da rota
+    de um router incluido nao traz o prefixo).
+    """
+    if scope.get("route") is None:
+        return UNMATCHED_ROUTE
+    path = scope.get("path", "")
+    params = {str(v): k for k, v in (scope.get("path_params") or {}).items()}
+    if not params:
+        return path
+    return "/".join(f"{{{params[seg]}}}" if seg in params else seg for seg in path.split("/"))
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("metrics_request", default=None)
+
+
+# ── SQLAlchemy ─────────────────────────────────────────────────────────
+
+def _rows_of(cursor) -> int:
+    # Os adaptadores async (asyncpg, aiosqlite) ja trazem o resultado de um
+    # SELECT para ``_rows`` no execute; para DML vale o ``rowcount``. Cursores
+    # do lado do servidor (respostas em streaming) nao entram na contagem.
+    if cursor.description is None:
+        return max(0, cursor.rowcount or 0)
+    rows = getattr(cursor, "_rows", None)
+    return len(rows) if rows is not None else 0
+
+
+def instrument_engine(engine: AsyncEngine, name: str = "primary") -> None:
+    """Registra os hooks de metricas e de query lenta em ``engine``."""
+    sync_engine = engine.sync_engine
+    registry.add_engine(name, engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("metrics_t0", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["metrics_t0"].pop()
+        rows = _rows_of(cursor)
+        DB_STATEMENTS.inc(name)
+        DB_ROWS.inc(name, amount=rows)
+        DB_LATENCY.observe(elapsed, name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.rows += rows
+            stats.db_seconds += elapsed
+        if settings.slow_query_ms > 0 and elapsed * 1000 >= settings.slow_query_ms:
+            route = stats.route if stats is not None else "-"
+            DB_SLOW.inc(name, route)
+            slow_query_logger.warning(
+                "query lenta: %.1fms em %s (%d linhas): %s",
+                elapsed * 1000, route, rows, " ".join(statement.split())[: settings.slow_query_max_chars],
+            )
+
+    # Nao ha evento antes do checkout: o tempo de espera e medido em volta
+    # de ``_do_get`` (ponto de extensao dos pools do SQLAlchemy).
+    pool = sync_engine.pool
+    do_get = pool._do_get
+
+    def _timed_do_get():
+        t0 = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - t0, name)
+
+    pool._do_get = _timed_do_get
+
+
+# ── ASGI ───────────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """Mede cada request HTTP (latencia, status e banco) por template de rota."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = stats.route
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - t0, method, route)
+            REQUEST_STATEMENTS.observe(stats.statements, route)
+            REQUEST_ROWS.observe(stats.rows, route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route)
@@ -0,0 +1,83 @@
+"""Paginacao por cursor (keyset) — cursores opacos para a API."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Tipos da chave de ordenacao de cada listagem (na ordem do ORDER BY).
+EXECUTION_CURSOR = (datetime.fromisoformat, UUID)      # (started_at, id)
+SCORE_HISTORY_CURSOR = (datetime.fromisoformat, UUID)  # (recorded_at, id)
+RESULT_CURSOR = (int,)                                 # (seq,)
+SEARCH_RECENT_CURSOR = (datetime.fromisoformat, UUID, int)   # (started_at, execution_id, seq)
+SEARCH_RELEVANCE_CURSOR = (float, *SEARCH_RECENT_CURSOR)     # (rank, ...)
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _check_json_type(conv: Callable[[Any], Any], value: Any) -> None:
+    """Numeros para ``int``/``float``; texto para o resto (str, UUID, datetime)."""
+    expected = (int, float) if conv in (int, float) else str
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError("tipo inesperado no cursor")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Codifica a chave de ordenacao da ultima linha num token opaco (base64url)."""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[Callable[[Any], Any]]) -> tuple:
+    """Decodifica um cursor, convertendo cada posicao com ``types``.
+
+    Levanta ``ValueError`` para cursores malformados ou de outro endpoint.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor com formato inesperado")
+        for conv, v in zip(types, values):
+            _check_json_type(conv, v)
+        return tuple(conv(v) for conv, v in zip(types, values))
+    except (
+        TypeError, AttributeError, OverflowError, json.JSONDecodeError, UnicodeDecodeError, binascii.Error,
+    ) as exc:
+        raise ValueError("cursor invalido") from exc
+
+
+def parse_cursor(cursor: str | None, types: Sequence[Callable[[Any], Any]]) -> tuple | None:
+    """Versao de ``decode_cursor`` para endpoints: None passa direto, invalido vira 400."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, types)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Cursor inválido") from exc
+
+
+def paginate(rows: Sequence, limit: int, key: Callable[[Any], Sequence[Any]]) -> tuple[list, str | None]:
+    """Corta ``rows`` (buscadas com ``limit + 1``) e monta o proximo cursor.
+
+    Retorna ``(pagina, next_cursor)``; ``next_cursor`` e None na ultima pagina.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(key(page[-1]))
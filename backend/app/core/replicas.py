@@ -0,0 +1,131 @@
+"""Roteamento de leituras para replicas, com failover e read-your-writes.
+
+``ReplicaSet`` distribui as sessoes de leitura em round-robin entre as
+replicas de ``DB_REPLICA_URLS``. A conexao e aberta na hora da escolha: se a
+replica recusa (fora do ar, pool esgotado), ela fica fora da rotacao por
+``db_replica_retry_seconds`` e a proxima e tentada; sem nenhuma disponivel a
+leitura vai para o primario.
+
+Read-your-writes: uma escrita bem-sucedida (POST/PUT/PATCH/DELETE com status
+< 400) devolve o cookie ``READ_PRIMARY_COOKIE`` com o instante ate o qual as
+leituras daquele cliente vao para o primario
+(``db_read_your_writes_seconds``), tempo para a replica alcancar. Clientes
+sem cookies (scripts de CI) podem mandar ``X-Read-Consistency: primary``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import time
+from collections.abc import Sequence
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+
+READ_PRIMARY_COOKIE = "cc_read_primary_until"
+CONSISTENCY_HEADER = "x-read-consistency"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Falhas de conexao que tiram a replica da rotacao
+CONNECT_ERRORS = (DBAPIError, PoolTimeoutError, OSError, asyncio.TimeoutError)
+
+
+class ReplicaSet:
+    """Replicas de leitura em round-robin, com quarentena das que falham."""
+
+    def __init__(self, names: Sequence[str], factories: Sequence[async_sessionmaker], retry_seconds: float):
+        self.names = list(names)
+        self.factories = list(factories)
+        self.retry_seconds = retry_seconds
+        self._cursor = itertools.count()
+        self._down_until = [0.0] * len(self.factories)
+        self.reads = [0] * len(self.factories)
+        self.failures = [0] * len(self.factories)
+        self.primary_reads = 0
+
+    def __len__(self) -> int:
+        return len(self.factories)
+
+    def candidates(self) -> list[int]:
+        """Indices na ordem de tentativa: a vez do round-robin primeiro, so as disponiveis."""
+        if not self.factories:
+            return []
+        start = next(self._cursor) % len(self.factories)
+        now = time.monotonic()
+        order = [(start + k) % len(self.factories) for k in range(len(self.factories))]
+        return [i for i in order if self._down_until[i] <= now]
+
+    def mark_down(self, index: int) -> None:
+        self.failures[index] += 1
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    async def open(self) -> tuple[AsyncSession, int] | None:
+        """Sessao ja conectada numa replica disponivel, ou None (usar o primario)."""
+        for i in self.candidates():
+            session = self.factories[i]()
+            try:
+                await session.connection()
+            except CONNECT_ERRORS:
+                await session.close()
+                self.mark_down(i)
+                continue
+            self.reads[i] += 1
+            return session, i
+        return None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {
+                    "name": name,
+                    "up": self._down_until[i] <= now,
+                    "reads": self.reads[i],
+                    "failures": self.failures[i],
+                }
+                for i, name in enumerate(self.names)
+            ],
+            "primary_reads": self.primary_reads,
+        }
+
+
+def wants_primary(request: Request | None) -> bool:
+    """Leitura deste request deve ir ao primario (cookie de escrita recente ou header)?"""
+    if request is None:
+        return False
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "primary":
+        return True
+    until = request.cookies.get(READ_PRIMARY_COOKIE)
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Marca o cliente apos uma escrita, para ler do primario por um tempo."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        window = settings.db_read_your_writes_seconds
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={time.time() + window:.3f}; Max-Age={math.ceil(window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,102 @@
+"""Serializacao direta de linhas do SELECT para JSON, no formato dos schemas.
+
+As listagens devolvem tuplas (``Row``) e nao objetos ORM. Montar um modelo
+Pydantic por linha e depois passar por ``jsonable_encoder`` custa mais que a
+propria query em listas grandes. ``RowEncoder`` le a lista de campos (e
+defaults) do schema de ``responses.py`` uma vez, converte so as colunas
+``int``/``float``/``UUID`` — como a validacao do Pydantic faria: ``0`` vira
+``0.0``, ``Decimal`` vira numero, UUID em texto vira canonico — e codifica
+com ``orjson``. O ``asyncpg`` devolve ``asyncpg.pgproto.UUID``, subclasse de
+``uuid.UUID`` que o ``orjson`` nao serializa: so o tipo exato passa direto.
+
+Mesmo corpo de ``cache.encode_json`` sobre os modelos: mesma ordem de campos,
+UUID canonico, datetime ISO 8601 com ``Z`` em UTC (``OPT_UTC_Z``), UTF-8 sem
+escapes. Unica diferenca, so na forma: floats fora de ``[1e-4, 1e16)`` saem
+sem expoente ou com expoente curto (``0.00001`` em vez de ``1e-05``), o mesmo
+numero. Para medir: ``python -m benchmarks.bench_serialization``.
+"""
+
+from __future__ import annotations
+
+import types
+import typing
+from collections.abc import Iterable, Mapping
+from operator import itemgetter
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel
+
+OPTIONS = orjson.OPT_UTC_Z
+
+
+def _to_uuid(value) -> UUID:
+    # str() cobre texto e subclasses (``UUID(value)`` exige str)
+    return UUID(str(value))
+
+
+_CONVERSIONS = {float: float, int: int, UUID: _to_uuid}
+
+
+def _converter(annotation):
+    """``float``/``int``/``UUID`` conforme o tipo do campo (opcional ou nao), senao None."""
+    args = typing.get_args(annotation) if isinstance(annotation, types.UnionType) else (annotation,)
+    for kind in _CONVERSIONS:
+        if kind in args:
+            return kind
+    return None
+
+
+class RowEncoder:
+    """Codifica linhas (``Row`` ou mapeamentos) como listas JSON de ``model``."""
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self._defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items()
+            if not field.is_required()
+        }
+        self._converters = {
+            name: conv
+            for name, field in model.model_fields.items()
+            if (conv := _converter(field.annotation)) is not None
+        }
+
+    def rows(self, rows: Iterable) -> list[dict]:
+        """Dicts na ordem dos campos do schema (defaults para colunas ausentes)."""
+        rows = list(rows)
+        if not rows:
+            return []
+        first = rows[0]
+        # ``Row`` e indexado por posicao (``_fields``); dicts, por nome
+        keys = list(first.keys()) if isinstance(first, Mapping) else list(first._fields)
+        present = [f for f in self.fields if f in keys]
+        missing = [f for f in self.fields if f not in keys]
+        if any(f not in self._defaults for f in missing):
+            raise KeyError(f"colunas ausentes para {self.model.__name__}: {missing}")
+        positions = present if isinstance(first, Mapping) else [keys.index(f) for f in present]
+        getter = itemgetter(*positions) if len(positions) > 1 else (lambda r, p=positions[0]: (r[p],))
+        convert = [
+            (i, kind, _CONVERSIONS[kind])
+            for i, f in enumerate(present)
+            if (kind := self._converters.get(f)) is not None
+        ]
+
+        out = []
+        for r in rows:
+            values = getter(r)
+            for i, kind, conv in convert:
+                v = values[i]
+                if v is not None and type(v) is not kind:
+                    values = (*values[:i], conv(v), *values[i + 1:])
+            out.append(dict(zip(present, values)))
+        if missing:
+            defaults = {f: self._defaults[f] for f in missing}
+            out = [{f: item[f] if f in item else defaults[f] for f in self.fields} for item in out]
+        return out
+
+    def dumps(self, rows: Iterable) -> bytes:
+        """Lista JSON de ``rows`` (mesmo corpo que os modelos Pydantic gerariam)."""
+        return orjson.dumps(self.rows(rows), option=OPTIONS)
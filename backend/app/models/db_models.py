@@ -1,12 +1,36 @@
-"""Modelos SQLAlchemy para PostgreSQL (Supabase)."""
+"""Modelos SQLAlchemy para PostgreSQL (Supabase) e SQLite.
+
+Tipos portaveis: ``Uuid`` (UUID nativo no PostgreSQL, 32 hex no SQLite) e
+``UTCDateTime`` (TIMESTAMPTZ no PostgreSQL; no SQLite, que nao guarda fuso,
+grava em UTC e devolve datetimes com ``tzinfo=UTC``, como o asyncpg).
+
+Todos os relacionamentos usam ``lazy="raise"``: os endpoints de leitura
+projetam colunas (ver ``history_service``) e qualquer carga implicita de
+relacionamento falha em vez de disparar queries em cascata. Quem precisar
+do grafo deve pedir explicitamente com ``selectinload``/``joinedload``.
+"""
 
 from __future__ import annotations
 
+import hashlib
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    TypeDecorator,
+    UniqueConstraint,
+    Uuid,
+)
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -14,6 +38,38 @@ def _utcnow():
     return datetime.now(timezone.utc)
 
 
+class UTCDateTime(TypeDecorator):
+    """``DateTime(timezone=True)`` normalizado para UTC na gravacao e na leitura."""
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
+# Codigos gravados em test_results.status_code / severidade_code
+STATUS_CODES = {"pass": 0, "fail": 1, "error": 2, "skip": 3}
+SEVERITY_CODES = {"info": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+STATUS_NAMES = {v: k for k, v in STATUS_CODES.items()}
+SEVERITY_NAMES = {v: k for k, v in SEVERITY_CODES.items()}
+
+
+def result_id(execution_id: uuid.UUID, seq: int) -> uuid.UUID:
+    """Id publico de um resultado, derivado de ``(execution_id, seq)``.
+
+    Mesmo calculo da funcao SQL ``result_id`` (md5 de ``"<execution_id>:<seq>"``).
+    """
+    return uuid.UUID(hashlib.md5(f"{execution_id}:{seq}".encode()).hexdigest())
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -23,28 +79,36 @@ class Project(Base):
 
     __tablename__ = "projects"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     nome = Column(String(100), unique=True, nullable=False, index=True)
     descricao = Column(Text, default="")
     stack = Column(String(50), default="")
-    created_at = Column(DateTime(timezone=True), default=_utcnow)
-    updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+    # Dias de retencao de test_results/score_history; None usa o padrao global
+    # (settings.retention_days) e 0 desativa a expiracao.
+    retention_days = Column(Integer)
+    created_at = Column(UTCDateTime, default=_utcnow)
+    updated_at = Column(UTCDateTime, default=_utcnow, onupdate=_utcnow)
 
-    executions = relationship("Execution", back_populates="project", lazy="selectin")
+    executions = relationship("Execution", back_populates="project", lazy="raise")
 
 
 class Execution(Base):
     """Metadados de cada execução de testes."""
 
     __tablename__ = "executions"
+    __table_args__ = (
+        # Paginacao keyset por (started_at, id), geral e por projeto
+        Index("idx_executions_started_id", "started_at", "id"),
+        Index("idx_executions_project_started_id", "project_id", "started_at", "id"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     project_id = Column(
-        UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True,
+        Uuid, ForeignKey("projects.id"), nullable=False, index=True,
     )
     ambiente = Column(String(50), nullable=False)
-    started_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
-    finished_at = Column(DateTime(timezone=True))
+    started_at = Column(UTCDateTime, nullable=False, default=_utcnow)
+    finished_at = Column(UTCDateTime)
     score = Column(Float, default=0.0)
     total = Column(Integer, default=0)
     passed = Column(Integer, default=0)
@@ -52,48 +116,163 @@ class Execution(Base):
     errors = Column(Integer, default=0)
     skipped = Column(Integer, default=0)
     duracao_ms = Column(Float, default=0.0)
+    # Preenchidos quando os resultados sao movidos para arquivo (ver archive_service)
+    archived_at = Column(UTCDateTime)
+    archive_path = Column(String(500))
 
-    project = relationship("Project", back_populates="executions")
-    test_results = relationship("TestResultRow", back_populates="execution", lazy="selectin")
-    score_details = relationship("ScoreHistory", back_populates="execution", lazy="selectin")
+    project = relationship("Project", back_populates="executions", lazy="raise")
+    test_results = relationship("TestResultRow", back_populates="execution", lazy="raise")
+    score_details = relationship("ScoreHistory", back_populates="execution", lazy="raise")
 
 
-class TestResultRow(Base):
-    """Resultado individual de cada teste."""
+class TestCatalog(Base):
+    """Dicionario de testes por projeto: ``(tipo, grupo, nome)`` -> id inteiro.
 
-    __tablename__ = "test_results"
+    ``test_results`` guarda so o ``catalog_id``; as strings ficam aqui, uma
+    vez por projeto.
+    """
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    execution_id = Column(
-        UUID(as_uuid=True), ForeignKey("executions.id"), nullable=False, index=True,
+    __tablename__ = "test_catalog"
+    __table_args__ = (
+        UniqueConstraint("project_id", "tipo", "grupo", "nome", name="uq_test_catalog_test"),
     )
-    nome = Column(String(200), nullable=False)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(Uuid, ForeignKey("projects.id"), nullable=False)
     tipo = Column(String(50), nullable=False)
-    status = Column(String(20), nullable=False)
+    grupo = Column(String(100), nullable=False, default="")
+    nome = Column(String(200), nullable=False)
+    created_at = Column(UTCDateTime, default=_utcnow)
+
+
+class TestResultRow(Base):
+    """Resultado individual de cada teste, codificado contra ``test_catalog``.
+
+    Linha compacta: ``catalog_id`` no lugar de nome/tipo/grupo e codigos
+    ``SmallInteger`` para status e severidade (``STATUS_CODES`` e
+    ``SEVERITY_CODES``). ``seq`` numera os resultados dentro da execucao; o
+    id exposto na API e ``result_id(execution_id, seq)``.
+    """
+
+    __tablename__ = "test_results"
+    __table_args__ = (
+        Index("idx_test_results_catalog", "catalog_id", "created_at"),
+    )
+
+    execution_id = Column(Uuid, ForeignKey("executions.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    # Chave de particionamento mensal: started_at da execucao
+    created_at = Column(UTCDateTime, primary_key=True, default=_utcnow)
+    catalog_id = Column(Integer, ForeignKey("test_catalog.id"), nullable=False)
+    status_code = Column(SmallInteger, nullable=False)
+    severidade_code = Column(SmallInteger, nullable=False, default=0)
     duracao_ms = Column(Float, default=0.0)
-    detalhes = Column(Text, default="")
-    severidade = Column(String(20), default="info")
-    grupo = Column(String(100), default="")
+    # Nulo quando vazio (a maioria dos resultados aprovados)
+    detalhes = Column(Text)
+    # sha256 do caso (alvo, requisicao, config) — base do modo incremental
+    fingerprint = Column(String(64))
 
-    execution = relationship("Execution", back_populates="test_results")
+    execution = relationship("Execution", back_populates="test_results", lazy="raise")
 
 
 class ScoreHistory(Base):
     """Score por runner ao longo do tempo."""
 
     __tablename__ = "score_history"
+    __table_args__ = (
+        Index("idx_score_history_project_recorded_id", "project_id", "recorded_at", "id"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     execution_id = Column(
-        UUID(as_uuid=True), ForeignKey("executions.id"), nullable=False, index=True,
+        Uuid, ForeignKey("executions.id"), nullable=False, index=True,
     )
     project_id = Column(
-        UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True,
+        Uuid, ForeignKey("projects.id"), nullable=False, index=True,
     )
     runner_type = Column(String(50), nullable=False)
     score = Column(Float, default=0.0)
     total = Column(Integer, default=0)
     passed = Column(Integer, default=0)
-    recorded_at = Column(DateTime(timezone=True), default=_utcnow)
+    recorded_at = Column(UTCDateTime, nullable=False, default=_utcnow)
+
+    execution = relationship("Execution", back_populates="score_details", lazy="raise")
+
+
+class ProjectSummary(Base):
+    """Resumo materializado por projeto, mantido a cada execucao finalizada.
+
+    Mantido na mesma transacao da ingestao por
+    ``history_service.refresh_project_summary``; reconstruivel com
+    ``python manage.py backfill-summary``.
+    """
+
+    __tablename__ = "project_summary"
+
+    project_id = Column(Uuid, ForeignKey("projects.id"), primary_key=True)
+    last_execution_id = Column(Uuid, ForeignKey("executions.id"))
+    last_score = Column(Float)
+    last_started_at = Column(UTCDateTime)
+    previous_score = Column(Float)
+    trend = Column(Float)
+    execution_count = Column(Integer, nullable=False, default=0)
+    pass_rate = Column(Float)
+    updated_at = Column(UTCDateTime, default=_utcnow, onupdate=_utcnow)
+
+
+class ScoreRollup(Base):
+    """Agregado de ``score_history`` por projeto, runner e intervalo de tempo.
+
+    Um registro por ``(project_id, runner_type, bucket, bucket_start)``, com
+    ``bucket`` em ``hour``/``day``/``week`` (inicio em UTC; semana comeca na
+    segunda). Mantido incrementalmente na ingestao.
+    """
+
+    __tablename__ = "score_rollups"
+
+    project_id = Column(Uuid, ForeignKey("projects.id"), primary_key=True)
+    runner_type = Column(String(50), primary_key=True)
+    bucket = Column(String(10), primary_key=True)
+    bucket_start = Column(UTCDateTime, primary_key=True)
+    samples = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_min = Column(Float)
+    score_max = Column(Float)
+    last_score = Column(Float)
+    last_recorded_at = Column(UTCDateTime)
+    total_sum = Column(Integer, nullable=False, default=0)
+    passed_sum = Column(Integer, nullable=False, default=0)
+
+
+class Run(Base):
+    """Job de auditoria enfileirado por POST /api/runs.
+
+    Consumido por ``worker.py``: o claim usa ``FOR UPDATE SKIP LOCKED`` e o
+    worker mantem um lease (``lease_expires_at``) renovado por heartbeat; jobs
+    com lease vencido voltam a ser elegiveis ate ``max_attempts``.
+    """
+
+    __tablename__ = "runs"
+    __table_args__ = (
+        Index("idx_runs_status_created", "status", "created_at"),
+    )
 
-    execution = relationship("Execution", back_populates="score_details")
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    project_name = Column(String(100), nullable=False)
+    types = Column(JSON, nullable=False, default=list)
+    environment = Column(String(50), nullable=False, default="local")
+    options = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    worker_id = Column(String(100))
+    lease_expires_at = Column(UTCDateTime)
+    heartbeat_at = Column(UTCDateTime)
+    progress_total = Column(Integer, nullable=False, default=0)
+    progress_done = Column(Integer, nullable=False, default=0)
+    reused = Column(Integer, nullable=False, default=0)
+    execution_id = Column(Uuid, ForeignKey("executions.id"))
+    error = Column(Text)
+    created_at = Column(UTCDateTime, nullable=False, default=_utcnow)
+    started_at = Column(UTCDateTime)
+    finished_at = Column(UTCDateTime)
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -17,9 +18,13 @@ class ProjectResponse(BaseModel):
     nome: str
     descricao: str = ""
     stack: str = ""
+    retention_days: int | None = None
     last_score: float | None = None
     last_execution_at: datetime | None = None
     created_at: datetime | None = None
+    execution_count: int = 0
+    pass_rate: float | None = None
+    trend: float | None = None
 
     model_config = {"from_attributes": True}
 
@@ -72,6 +77,90 @@ class ScoreHistoryResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TestDiffEntry(BaseModel):
+    """Teste que mudou entre duas execucoes (``a`` = base, ``b`` = comparada)."""
+
+    tipo: str
+    nome: str
+    grupo: str = ""
+    severidade: str = "info"
+    change: Literal["new_failure", "fix", "added", "removed", "slower", "faster"]
+    status_a: str | None = None
+    status_b: str | None = None
+    duracao_ms_a: float | None = None
+    duracao_ms_b: float | None = None
+    delta_ms: float | None = None
+    detalhes: str = ""
+
+
+class ExecutionDiffResponse(BaseModel):
+    """Resposta de GET /api/executions/{a}/diff/{b}."""
+
+    execution_a: UUID
+    execution_b: UUID
+    summary: dict[str, int] = Field(default_factory=dict)
+    changes: list[TestDiffEntry] = Field(default_factory=list)
+
+
+class TestStatsResponse(BaseModel):
+    """Estatisticas de um teste nas ultimas N execucoes do projeto."""
+
+    tipo: str
+    grupo: str = ""
+    nome: str
+    runs: int = 0
+    passed: int = 0
+    pass_rate: float = 0.0
+    flips: int = 0
+    flip_rate: float = 0.0
+    last_status: str | None = None
+    last_failure_at: datetime | None = None
+    last_failure_execution_id: UUID | None = None
+    last_failure_detalhes: str | None = None
+    median_ms: float | None = None
+    p95_ms: float | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class SearchHitResponse(BaseModel):
+    """Resultado encontrado por GET /api/search."""
+
+    id: UUID
+    execution_id: UUID
+    project_id: UUID
+    projeto_nome: str = ""
+    ambiente: str = ""
+    started_at: datetime
+    tipo: str
+    grupo: str = ""
+    nome: str
+    status: str
+    severidade: str = "info"
+    duracao_ms: float = 0.0
+    detalhes: str = ""
+    snippet: str | None = None
+    rank: float = 0.0
+
+    model_config = {"from_attributes": True}
+
+
+class ScoreRollupResponse(BaseModel):
+    """Score agregado de um runner num intervalo (hora, dia ou semana)."""
+
+    runner_type: str
+    bucket_start: datetime
+    score: float | None = None
+    min_score: float | None = None
+    max_score: float | None = None
+    last_score: float | None = None
+    total: int = 0
+    passed: int = 0
+    samples: int = 0
+
+    model_config = {"from_attributes": True}
+
+
 # ── Requests ───────────────────────────────────────────────────────────
 
 class RunRequest(BaseModel):
@@ -81,10 +170,16 @@ class RunRequest(BaseModel):
     types: list[str] = Field(default_factory=lambda: ["all"])
     environment: str = "local"
     confirm: bool = False
+    target_url: str | None = Field(None, max_length=2048, pattern=r"^https?://")
+    concurrency: int | None = Field(None, ge=1, le=256)
+    rate: float | None = Field(None, ge=0)
+    http2: bool | None = None
+    incremental: bool = False
+    config_hash: str | None = Field(None, max_length=128)
 
 
 class RunResponse(BaseModel):
-    """Resposta de POST /api/runs."""
+    """Resultado de uma auditoria concluida."""
 
     execution_id: UUID | None = None
     score: float = 0.0
@@ -92,3 +187,88 @@ class RunResponse(BaseModel):
     passed: int = 0
     failed: int = 0
     message: str = ""
+    runners: list[ScoreHistoryResponse] = Field(default_factory=list)
+
+
+class TestResultIn(BaseModel):
+    """Resultado individual enviado por um runner."""
+
+    nome: str = Field(..., min_length=1, max_length=200)
+    tipo: str = Field(..., min_length=1, max_length=50)
+    status: Literal["pass", "fail", "error", "skip"]
+    duracao_ms: float = 0.0
+    detalhes: str = ""
+    severidade: Literal["info", "low", "medium", "high", "critical"] = "info"
+    grupo: str = Field("", max_length=100)
+    fingerprint: str | None = Field(None, max_length=64)
+
+
+class RunnerScoreIn(BaseModel):
+    """Score de um runner informado explicitamente pelo cliente."""
+
+    runner_type: str = Field(..., min_length=1, max_length=50)
+    score: float = Field(..., ge=0, le=100)
+    total: int = Field(0, ge=0)
+    passed: int = Field(0, ge=0)
+
+
+class ExecutionBulkRequest(BaseModel):
+    """Body para POST /api/executions/bulk.
+
+    Totais e score da execucao sao sempre calculados no servidor. ``scores``
+    e opcional: quando ausente, o score de cada runner e derivado de ``results``
+    agrupando por ``tipo``.
+    """
+
+    project_name: str = Field(..., min_length=1, max_length=100)
+    ambiente: str = Field("local", min_length=1, max_length=50)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    duracao_ms: float | None = Field(None, ge=0)
+    results: list[TestResultIn] = Field(default_factory=list)
+    scores: list[RunnerScoreIn] | None = None
+
+
+class ExecutionOpenRequest(BaseModel):
+    """Body para POST /api/executions (abre execucao para streaming)."""
+
+    project_name: str = Field(..., min_length=1, max_length=100)
+    ambiente: str = Field("local", min_length=1, max_length=50)
+    started_at: datetime | None = None
+
+
+class ExecutionFinalizeRequest(BaseModel):
+    """Body para POST /api/executions/{id}/finalize."""
+
+    finished_at: datetime | None = None
+    duracao_ms: float | None = Field(None, ge=0)
+    scores: list[RunnerScoreIn] | None = None
+
+
+class ProjectUpdateRequest(BaseModel):
+    """Body para PATCH /api/projects/{id}."""
+
+    retention_days: int | None = Field(
+        None, ge=0, description="Dias de retenção (0 = sem expiração; null = padrão global)",
+    )
+
+
+class RunStatusResponse(BaseModel):
+    """Estado de um job de auditoria (POST/GET /api/runs)."""
+
+    id: UUID
+    project_name: str
+    types: list[str] = Field(default_factory=list)
+    environment: str = "local"
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    progress_total: int = 0
+    progress_done: int = 0
+    reused: int = 0
+    error: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    result: RunResponse | None = None
+
+    model_config = {"from_attributes": True}
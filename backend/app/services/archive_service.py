@@ -0,0 +1,302 @@
+"""Particoes mensais, retencao e arquivamento de resultados antigos.
+
+``test_results`` e ``score_history`` sao particionadas por mes (ver
+``supabase_schema.sql``). A retencao e por projeto (``projects.retention_days``,
+com ``settings.retention_days`` como padrao); execucoes expiradas tem seus
+resultados exportados para Parquet (colunar, zstd) em ``settings.archive_dir``
+e removidos do banco. Particoes de meses passados que ficam vazias sao
+descartadas. A execucao em si permanece em ``executions`` com
+``archive_path``, e ``history_service`` le os resultados do arquivo. Em
+SQLite nao ha particoes: so a retencao e o arquivamento se aplicam.
+
+Requer ``pyarrow`` (importado sob demanda).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import String, case, delete, func, literal, literal_column, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import dialects, events
+from app.core.config import settings
+from app.models.db_models import (
+    SEVERITY_NAMES,
+    STATUS_NAMES,
+    Execution,
+    Project,
+    ScoreHistory,
+    TestCatalog,
+    TestResultRow,
+)
+
+PARTITIONED_TABLES = ("test_results", "score_history")
+
+# O arquivo guarda os resultados decodificados (sem depender de test_catalog)
+_RESULT_EXPORT_COLUMNS = (
+    func.result_id(
+        TestResultRow.execution_id, TestResultRow.seq, type_=TestResultRow.execution_id.type,
+    ).label("id"),
+    TestResultRow.execution_id,
+    TestCatalog.nome,
+    TestCatalog.tipo,
+    case(STATUS_NAMES, value=TestResultRow.status_code).label("status"),
+    TestResultRow.duracao_ms,
+    func.coalesce(TestResultRow.detalhes, "").label("detalhes"),
+    case(SEVERITY_NAMES, value=TestResultRow.severidade_code, else_="info").label("severidade"),
+    TestCatalog.grupo,
+    TestResultRow.created_at,
+)
+
+_SCORE_EXPORT_COLUMNS = (
+    ScoreHistory.id,
+    ScoreHistory.execution_id,
+    ScoreHistory.project_id,
+    ScoreHistory.runner_type,
+    ScoreHistory.score,
+    ScoreHistory.total,
+    ScoreHistory.passed,
+    ScoreHistory.recorded_at,
+)
+
+
+class ArchivedResult(NamedTuple):
+    """Resultado lido do arquivo — campos de ``TestResultResponse`` + ``seq``."""
+
+    id: uuid.UUID
+    nome: str
+    tipo: str
+    status: str
+    duracao_ms: float
+    detalhes: str
+    severidade: str
+    grupo: str
+    seq: int
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _add_months(month: date, n: int) -> date:
+    total = month.year * 12 + month.month - 1 + n
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def resolve_archive_path(archive_path: str) -> Path:
+    """Caminho absoluto de um arquivo registrado em ``executions.archive_path``."""
+    return Path(settings.archive_dir) / archive_path
+
+
+# ── Particoes ──────────────────────────────────────────────────────────
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int | None = None) -> list[str]:
+    """Cria as particoes do mes corrente e dos proximos ``months_ahead`` meses."""
+    if months_ahead is None:
+        months_ahead = settings.partition_months_ahead
+    current = _utcnow().date().replace(day=1)
+    return await ensure_partitions_between(db, current, _add_months(current, months_ahead))
+
+
+async def ensure_partitions_between(db: AsyncSession, start: date, end: date) -> list[str]:
+    """Cria as particoes mensais de ``start`` a ``end`` (inclusive).
+
+    Para cargas de datas passadas (``generate_data.py``): sem a particao do
+    mes, as linhas cairiam na particao ``default``.
+    """
+    if dialects.dialect_name(db) != "postgresql":
+        return []
+    first = start.replace(day=1)
+    months = (end.year - first.year) * 12 + end.month - first.month
+    created = []
+    for table in PARTITIONED_TABLES:
+        for i in range(months + 1):
+            result = await db.execute(
+                text("SELECT create_monthly_partition(:parent, :month)"),
+                {"parent": table, "month": _add_months(first, i)},
+            )
+            created.append(result.scalar_one())
+    return created
+
+
+async def drop_empty_partitions(db: AsyncSession) -> list[str]:
+    """Remove particoes mensais de meses ja encerrados que nao tem mais linhas."""
+    if dialects.dialect_name(db) != "postgresql":
+        return []
+    current = _utcnow().date().replace(day=1)
+    dropped = []
+    for table in PARTITIONED_TABLES:
+        pattern = re.compile(rf"^{table}_(\d{{4}})_(\d{{2}})$")
+        names = (
+            await db.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :parent"
+                ),
+                {"parent": table},
+            )
+        ).scalars().all()
+        for name in sorted(names):
+            match = pattern.match(name)
+            if not match:
+                continue
+            month = date(int(match[1]), int(match[2]), 1)
+            if _add_months(month, 1) > current:
+                continue
+            has_rows = (await db.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{name}")'))).scalar()
+            if not has_rows:
+                await db.execute(text(f'DROP TABLE "{name}"'))
+                dropped.append(name)
+    return dropped
+
+
+# ── Arquivamento ───────────────────────────────────────────────────────
+
+async def find_expired_executions(db: AsyncSession) -> list:
+    """Execucoes finalizadas, ainda no banco, alem da retencao do seu projeto."""
+    retention = func.coalesce(Project.retention_days, settings.retention_days)
+    if dialects.dialect_name(db) == "postgresql":
+        cutoff = func.now() - retention * literal_column("INTERVAL '1 day'")
+    else:
+        # SQLite: texto UTC no mesmo formato (ordenavel) gravado por UTCDateTime
+        cutoff = func.datetime("now", literal("-").concat(retention.cast(String)).concat(" days"))
+    stmt = (
+        select(Execution.id, Execution.project_id, Execution.started_at)
+        .join(Project, Project.id == Execution.project_id)
+        .where(
+            Execution.archived_at.is_(None),
+            Execution.finished_at.is_not(None),
+            retention > 0,
+            Execution.started_at < cutoff,
+        )
+        .order_by(Execution.project_id, Execution.started_at)
+    )
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+async def _export(db: AsyncSession, stmt, path: Path, chunk_size: int) -> int:
+    """Grava o resultado de ``stmt`` em Parquet, bloco a bloco. Retorna o total de linhas."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    writer = None
+    rows = 0
+    try:
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for chunk in result.partitions(chunk_size):
+            columns = {
+                key: [str(v) if isinstance(v, uuid.UUID) else v for v in values]
+                for key, values in zip(result.keys(), zip(*chunk))
+            }
+            table = pa.Table.from_pydict(columns)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema, compression="zstd")
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(tmp, path)
+    return rows
+
+
+async def archive_expired(db: AsyncSession, dry_run: bool = False) -> dict:
+    """Arquiva as execucoes expiradas, agrupadas por projeto e mes.
+
+    Para cada grupo: exporta resultados e scores para Parquet, apaga as linhas
+    e marca as execucoes com ``archive_path`` — uma transacao por grupo, com o
+    arquivo gravado antes do commit (rodar de novo apos falha e seguro). Ao
+    final descarta particoes vazias.
+    """
+    expired = await find_expired_executions(db)
+    groups: dict[tuple, list] = defaultdict(list)
+    for row in expired:
+        groups[(row.project_id, row.started_at.astimezone(timezone.utc).strftime("%Y_%m"))].append(row.id)
+
+    stats = {"executions": len(expired), "groups": len(groups), "results": 0, "scores": 0}
+    if dry_run:
+        return stats
+
+    for (project_id, month), exec_ids in groups.items():
+        stamp = _utcnow().strftime("%Y%m%dT%H%M%S")
+        rel = f"{project_id}/{month}/{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+        results_path = resolve_archive_path(rel)
+
+        stats["results"] += await _export(
+            db,
+            select(*_RESULT_EXPORT_COLUMNS)
+            .join(TestCatalog, TestCatalog.id == TestResultRow.catalog_id)
+            .where(TestResultRow.execution_id.in_(exec_ids))
+            .order_by(TestResultRow.execution_id, TestResultRow.seq),
+            results_path,
+            settings.stream_chunk_size,
+        )
+        stats["scores"] += await _export(
+            db,
+            select(*_SCORE_EXPORT_COLUMNS)
+            .where(ScoreHistory.execution_id.in_(exec_ids))
+            .order_by(ScoreHistory.execution_id, ScoreHistory.runner_type),
+            results_path.with_suffix(".scores.parquet"),
+            settings.stream_chunk_size,
+        )
+
+        await db.execute(delete(TestResultRow).where(TestResultRow.execution_id.in_(exec_ids)))
+        await db.execute(delete(ScoreHistory).where(ScoreHistory.execution_id.in_(exec_ids)))
+        await db.execute(
+            update(Execution)
+            .where(Execution.id.in_(exec_ids))
+            .values(archived_at=_utcnow(), archive_path=rel)
+        )
+        await events.touch(db, project_id)
+        await db.commit()
+
+    stats["dropped_partitions"] = await drop_empty_partitions(db)
+    await db.commit()
+    return stats
+
+
+def read_archived_results(archive_path: str, execution_id: uuid.UUID) -> list[ArchivedResult]:
+    """Le do Parquet os resultados de uma execucao arquivada, na ordem de ``seq``.
+
+    O arquivo e gravado ordenado por ``(execution_id, seq)`` e ``seq`` e
+    contiguo a partir de 0, entao a posicao no arquivo e o ``seq``.
+
+    Sincrono (I/O de disco): chamar via ``asyncio.to_thread``.
+    """
+    import pyarrow.parquet as pq
+
+    path = resolve_archive_path(archive_path)
+    if not path.exists():
+        return []
+    table = pq.read_table(
+        path,
+        columns=["id", *ArchivedResult._fields[1:-1]],
+        filters=[("execution_id", "=", str(execution_id))],
+    )
+    return [
+        ArchivedResult(
+            id=uuid.UUID(r["id"]),
+            nome=r["nome"],
+            tipo=r["tipo"],
+            status=r["status"],
+            duracao_ms=r["duracao_ms"] or 0.0,
+            detalhes=r["detalhes"] or "",
+            severidade=r["severidade"] or "info",
+            grupo=r["grupo"] or "",
+            seq=seq,
+        )
+        for seq, r in enumerate(table.to_pylist())
+    ]
@@ -1,11 +1,18 @@
-"""Servico de auditoria — stub para versao academica.
+"""Servico de auditoria — conecta a fila de runs aos runners de teste.
 
-Na versao completa, este modulo conecta ao motor de testes.
-Nesta versao academica, os dados sao consultados diretamente do banco.
+Cada runner (``api``, ``security``, ...) registra-se em ``RUNNERS`` com
+``register_runner`` e devolve os resultados no formato de ``TestResultIn``.
+Os embutidos sao registrados por ``runners.register_builtin_runners``,
+chamado por ``main.create_app`` e pelo ``worker.py``.
+``execute_audit`` resolve os tipos pedidos e executa os runners em sequencia;
+a persistencia fica com quem chama (``worker.py``).
 """
 
 from __future__ import annotations
 
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
 
 def classify_score(score: float) -> dict:
     """Retorna label e cor para um score."""
@@ -16,3 +23,68 @@ def classify_score(score: float) -> dict:
     if score >= 50:
         return {"label": "Atencao", "color": "orange"}
     return {"label": "Critico", "color": "red"}
+
+
+def calculate_score(passed: int, total: int) -> float:
+    """Score 0-100 (uma casa decimal) a partir de aprovados/total."""
+    if total <= 0:
+        return 0.0
+    return round((passed / total) * 100, 1)
+
+
+# ── Runners ────────────────────────────────────────────────────────────
+
+@dataclass
+class AuditJob:
+    """Parametros de uma auditoria (espelha ``RunRequest``)."""
+
+    project_name: str
+    types: list[str]
+    environment: str = "local"
+    options: dict = field(default_factory=dict)
+    # Modo incremental: resultados aprovados da execucao anterior, por fingerprint
+    baseline: dict[str, dict] = field(default_factory=dict)
+
+
+# progress(concluidos, total_descoberto): incrementos desde a ultima chamada
+ProgressFn = Callable[[int, int], Awaitable[None]]
+RunnerFn = Callable[[AuditJob, ProgressFn], Awaitable[list[dict]]]
+
+RUNNERS: dict[str, RunnerFn] = {}
+
+
+class RunnerUnavailableError(Exception):
+    """Tipo de runner pedido nao esta disponivel nesta instalacao."""
+
+
+def register_runner(tipo: str) -> Callable[[RunnerFn], RunnerFn]:
+    """Decorator que registra um runner para o ``tipo`` informado."""
+
+    def decorator(fn: RunnerFn) -> RunnerFn:
+        RUNNERS[tipo] = fn
+        return fn
+
+    return decorator
+
+
+def resolve_types(types: list[str]) -> list[str]:
+    """Expande ``all`` e valida os tipos pedidos contra ``RUNNERS``."""
+    if not types or "all" in types:
+        tipos = sorted(RUNNERS)
+    else:
+        tipos = list(dict.fromkeys(types))
+    missing = [t for t in tipos if t not in RUNNERS]
+    if missing or not tipos:
+        raise RunnerUnavailableError(
+            f"Runner(s) nao disponivel(is): {', '.join(missing) or 'nenhum registrado'}"
+        )
+    return tipos
+
+
+async def execute_audit(job: AuditJob, progress: ProgressFn) -> list[dict]:
+    """Executa os runners pedidos e devolve todos os resultados."""
+    results: list[dict] = []
+    for tipo in resolve_types(job.types):
+        results.extend(await RUNNERS[tipo](job, progress))
+    return results
+
@@ -0,0 +1,78 @@
+"""Downsampling de series temporais para graficos (LTTB).
+
+Largest-Triangle-Three-Buckets: mantem o primeiro e o ultimo ponto e, em cada
+bucket intermediario, o ponto que forma o maior triangulo com o ponto ja
+escolhido e a media do bucket seguinte — preserva picos e vales visiveis.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def lttb(
+    points: Sequence[T],
+    threshold: int,
+    x: Callable[[T], float],
+    y: Callable[[T], float],
+) -> list[T]:
+    """Reduz ``points`` (ordenados por ``x``) a no maximo ``threshold`` pontos."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    xs = [x(p) for p in points]
+    ys = [y(p) for p in points]
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Media do proximo bucket (ponto "C" do triangulo)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        # Ponto do bucket corrente com maior area
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample_series(
+    points: Sequence[T],
+    threshold: int,
+    series: Callable[[T], object],
+    x: Callable[[T], float],
+    y: Callable[[T], float],
+) -> list[T]:
+    """Aplica ``lttb`` separadamente a cada serie (ex.: por ``runner_type``).
+
+    ``points`` pode vir em qualquer ordem; o resultado mantem a ordem original
+    entre os pontos escolhidos.
+    """
+    groups: dict[object, list[tuple[int, T]]] = {}
+    for i, p in enumerate(points):
+        groups.setdefault(series(p), []).append((i, p))
+
+    keep: list[tuple[int, T]] = []
+    for items in groups.values():
+        items.sort(key=lambda item: x(item[1]))
+        keep.extend(lttb(items, threshold, lambda item: x(item[1]), lambda item: y(item[1])))
+    keep.sort(key=lambda item: item[0])
+    return [p for _, p in keep]
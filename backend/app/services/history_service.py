@@ -1,39 +1,55 @@
-"""Persistencia de execucoes no PostgreSQL (Supabase)."""
+"""Persistencia de execucoes no banco (PostgreSQL/Supabase ou SQLite)."""
 
 from __future__ import annotations
 
+import asyncio
+import re
 import uuid
-from datetime import datetime, timezone
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Float,
+    Numeric,
+    Table,
+    Text,
+    and_,
+    case,
+    false,
+    func,
+    insert,
+    literal_column,
+    select,
+    text,
+    tuple_,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.db_models import Execution, Project, ScoreHistory, TestResultRow
+from app.core import dialects, events
+from app.core.config import settings
+from app.models.db_models import (
+    SEVERITY_CODES,
+    SEVERITY_NAMES,
+    STATUS_CODES,
+    STATUS_NAMES,
+    Execution,
+    Project,
+    ProjectSummary,
+    ScoreHistory,
+    ScoreRollup,
+    TestCatalog,
+    TestResultRow,
+    result_id,
+)
+from app.services import archive_service, redaction
+from app.services.compliance_service import calculate_score
 
 
 # ── Helpers ────────────────────────────────────────────────────────────
 
-def _mask_token(token: str, visible: int = 4) -> str:
-    """Mascara um token, mantendo apenas os primeiros caracteres visiveis."""
-    if len(token) <= visible:
-        return token
-    return token[:visible] + "*" * (len(token) - visible)
-
-
-def _mask_detalhes(detalhes: str) -> str:
-    """Mascara tokens que possam aparecer nos detalhes."""
-    if not detalhes:
-        return detalhes
-    words = detalhes.split()
-    masked = []
-    for word in words:
-        if len(word) > 30 and not word.startswith("http"):
-            masked.append(_mask_token(word))
-        else:
-            masked.append(word)
-    return " ".join(masked)
-
-
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -71,42 +87,91 @@ async def get_projects(db: AsyncSession) -> list[Project]:
     return list(result.scalars().all())
 
 
-async def get_projects_with_last_score(db: AsyncSession) -> list[dict]:
-    """Lista projetos com ultimo score em uma unica query (evita N+1).
+# Colunas dos read models: cada endpoint de leitura projeta so o que devolve,
+# ja com os defaults da resposta, sem hidratar entidades nem relacionamentos.
 
-    Retorna list de dicts com chaves: project, last_score, last_execution_at.
-    """
-    last_exec_sub = (
-        select(
-            Execution.project_id,
-            func.max(Execution.started_at).label("max_started"),
-        )
-        .group_by(Execution.project_id)
-        .subquery()
-    )
+_PROJECT_COLUMNS = (
+    Project.id,
+    Project.nome,
+    func.coalesce(Project.descricao, "").label("descricao"),
+    func.coalesce(Project.stack, "").label("stack"),
+    Project.retention_days,
+    Project.created_at,
+)
+
+_EXECUTION_COLUMNS = (
+    Execution.id,
+    Execution.project_id,
+    Project.nome.label("projeto_nome"),
+    Execution.ambiente,
+    Execution.started_at,
+    Execution.finished_at,
+    func.coalesce(Execution.score, 0.0).label("score"),
+    func.coalesce(Execution.total, 0).label("total"),
+    func.coalesce(Execution.passed, 0).label("passed"),
+    func.coalesce(Execution.failed, 0).label("failed"),
+    func.coalesce(Execution.errors, 0).label("errors"),
+    func.coalesce(Execution.skipped, 0).label("skipped"),
+    func.coalesce(Execution.duracao_ms, 0.0).label("duracao_ms"),
+)
+
+# test_results e gravada codificada (ver ``TestCatalog``); as leituras juntam
+# o catalogo e decodificam status/severidade no proprio SELECT.
+_RESULT_ID = func.result_id(
+    TestResultRow.execution_id, TestResultRow.seq, type_=TestResultRow.execution_id.type,
+)
+_RESULT_STATUS = case(STATUS_NAMES, value=TestResultRow.status_code)
+_RESULT_SEVERITY = case(SEVERITY_NAMES, value=TestResultRow.severidade_code, else_="info")
+_RESULTS_FROM = TestResultRow.__table__.join(
+    TestCatalog.__table__, TestCatalog.id == TestResultRow.catalog_id,
+)
+
+_RESULT_COLUMNS = (
+    _RESULT_ID.label("id"),
+    TestCatalog.nome,
+    TestCatalog.tipo,
+    _RESULT_STATUS.label("status"),
+    func.coalesce(TestResultRow.duracao_ms, 0.0).label("duracao_ms"),
+    func.coalesce(TestResultRow.detalhes, "").label("detalhes"),
+    _RESULT_SEVERITY.label("severidade"),
+    TestCatalog.grupo,
+)
+# Ordem de gravacao: a PK ``(execution_id, seq)`` serve a ordenacao e o keyset
+_RESULT_ORDER = (TestResultRow.seq,)
 
+_SCORE_HISTORY_COLUMNS = (
+    ScoreHistory.id,
+    ScoreHistory.execution_id,
+    ScoreHistory.runner_type,
+    func.coalesce(ScoreHistory.score, 0.0).label("score"),
+    func.coalesce(ScoreHistory.total, 0).label("total"),
+    func.coalesce(ScoreHistory.passed, 0).label("passed"),
+    ScoreHistory.recorded_at,
+)
+
+
+_SUMMARY_COLUMNS = (
+    ProjectSummary.last_score,
+    ProjectSummary.last_started_at.label("last_execution_at"),
+    func.coalesce(ProjectSummary.execution_count, 0).label("execution_count"),
+    ProjectSummary.pass_rate,
+    ProjectSummary.trend,
+)
+
+
+async def get_projects_with_last_score(db: AsyncSession) -> list:
+    """Lista projetos com ultimo score, lidos de ``project_summary``.
+
+    Uma leitura por projeto (join pela PK do resumo), independente do
+    tamanho do historico. Retorna Rows com as colunas de ``ProjectResponse``.
+    """
     stmt = (
-        select(Project, Execution.score, Execution.started_at)
-        .outerjoin(last_exec_sub, Project.id == last_exec_sub.c.project_id)
-        .outerjoin(
-            Execution,
-            (Execution.project_id == last_exec_sub.c.project_id)
-            & (Execution.started_at == last_exec_sub.c.max_started),
-        )
+        select(*_PROJECT_COLUMNS, *_SUMMARY_COLUMNS)
+        .outerjoin(ProjectSummary, ProjectSummary.project_id == Project.id)
         .order_by(Project.nome)
     )
-
     result = await db.execute(stmt)
-    rows = result.all()
-
-    return [
-        {
-            "project": row[0],
-            "last_score": row[1],
-            "last_execution_at": row[2],
-        }
-        for row in rows
-    ]
+    return list(result.all())
 
 
 async def get_project_by_id(db: AsyncSession, project_id: uuid.UUID) -> Project | None:
@@ -116,19 +181,64 @@ async def get_project_by_id(db: AsyncSession, project_id: uuid.UUID) -> Project
     return result.scalar_one_or_none()
 
 
+async def get_project_row(db: AsyncSession, project_id: uuid.UUID):
+    """Projeto com ultimo score (via ``project_summary``), no formato de ``ProjectResponse``."""
+    stmt = (
+        select(*_PROJECT_COLUMNS, *_SUMMARY_COLUMNS)
+        .outerjoin(ProjectSummary, ProjectSummary.project_id == Project.id)
+        .where(Project.id == project_id)
+    )
+    result = await db.execute(stmt)
+    return result.one_or_none()
+
+
+async def update_project_retention(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    retention_days: int | None,
+) -> bool:
+    """Define a retencao do projeto (None volta ao padrao global). False se nao existe."""
+    result = await db.execute(
+        update(Project).where(Project.id == project_id).values(retention_days=retention_days)
+    )
+    if result.rowcount == 0:
+        return False
+    await events.touch(db, project_id)
+    return True
+
+
+async def project_exists(db: AsyncSession, project_id: uuid.UUID) -> bool:
+    """Verifica se o projeto existe sem carregar a entidade."""
+    stmt = select(Project.id).where(Project.id == project_id)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none() is not None
+
+
 # ── Execucoes ──────────────────────────────────────────────────────────
 
 async def get_executions(
     db: AsyncSession,
     project_id: uuid.UUID | None = None,
     limit: int = 20,
-) -> list[Execution]:
-    """Lista execucoes, opcionalmente filtradas por projeto."""
-    stmt = select(Execution).order_by(Execution.started_at.desc()).limit(limit)
+    after: tuple[datetime, uuid.UUID] | None = None,
+) -> list:
+    """Lista execucoes (Rows de ``ExecutionResponse``), opcionalmente por projeto.
+
+    Ordenadas por ``(started_at, id)`` decrescente; ``after`` e a chave da
+    ultima linha da pagina anterior (paginacao keyset).
+    """
+    stmt = (
+        select(*_EXECUTION_COLUMNS)
+        .join(Project, Project.id == Execution.project_id)
+        .order_by(Execution.started_at.desc(), Execution.id.desc())
+        .limit(limit)
+    )
     if project_id:
         stmt = stmt.where(Execution.project_id == project_id)
+    if after is not None:
+        stmt = stmt.where(tuple_(Execution.started_at, Execution.id) < tuple_(*after))
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    return list(result.all())
 
 
 async def get_execution_by_id(
@@ -141,18 +251,90 @@ async def get_execution_by_id(
     return result.scalar_one_or_none()
 
 
+async def get_execution_row(db: AsyncSession, execution_id: uuid.UUID):
+    """Execucao com o nome do projeto, no formato de ``ExecutionResponse``."""
+    stmt = (
+        select(*_EXECUTION_COLUMNS)
+        .join(Project, Project.id == Execution.project_id)
+        .where(Execution.id == execution_id)
+    )
+    result = await db.execute(stmt)
+    return result.one_or_none()
+
+
 async def get_test_results(
     db: AsyncSession,
     execution_id: uuid.UUID,
-) -> list[TestResultRow]:
-    """Lista resultados de uma execucao."""
+    limit: int | None = None,
+    after: tuple[int] | None = None,
+    archive_path: str | None = None,
+    started_at: datetime | None = None,
+) -> list:
+    """Lista resultados de uma execucao (Rows de ``TestResultResponse`` + ``seq``).
+
+    Na ordem de gravacao (``seq``), servida pela PK: uma pagina custa o
+    tamanho da pagina, nao o da execucao. ``after`` e o ``(seq,)`` da
+    ultima linha da pagina anterior; sem ``limit`` devolve todos. Com
+    ``started_at`` (inicio da execucao) o PostgreSQL le so a particao dela.
+    Para execucoes arquivadas (``archive_path``) le do arquivo Parquet.
+    """
+    if archive_path:
+        rows = await asyncio.to_thread(
+            archive_service.read_archived_results, archive_path, execution_id,
+        )
+        if after is not None:
+            rows = [r for r in rows if r.seq > after[0]]
+        return rows[:limit] if limit is not None else rows
+
     stmt = (
-        select(TestResultRow)
+        select(*_RESULT_COLUMNS, TestResultRow.seq)
+        .select_from(_RESULTS_FROM)
         .where(TestResultRow.execution_id == execution_id)
-        .order_by(TestResultRow.tipo, TestResultRow.nome)
+        .order_by(*_RESULT_ORDER)
     )
+    if started_at is not None:
+        stmt = stmt.where(TestResultRow.created_at == started_at)
+    if after is not None:
+        stmt = stmt.where(TestResultRow.seq > after[0])
+    if limit is not None:
+        stmt = stmt.limit(limit)
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    return list(result.all())
+
+
+async def stream_test_results(
+    db: AsyncSession,
+    execution_id: uuid.UUID,
+    chunk_size: int = 1000,
+    archive_path: str | None = None,
+    started_at: datetime | None = None,
+) -> AsyncIterator[list]:
+    """Resultados de uma execucao em blocos, via cursor do lado do servidor.
+
+    Mesma ordenacao e colunas de ``get_test_results``, mas so ``chunk_size``
+    linhas ficam em memoria por vez (execucoes arquivadas sao lidas do
+    arquivo de uma vez e entregues em blocos).
+    """
+    if archive_path:
+        rows = await asyncio.to_thread(
+            archive_service.read_archived_results, archive_path, execution_id,
+        )
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+        return
+
+    stmt = (
+        select(*_RESULT_COLUMNS)
+        .select_from(_RESULTS_FROM)
+        .where(TestResultRow.execution_id == execution_id)
+        .order_by(*_RESULT_ORDER)
+        .execution_options(yield_per=chunk_size)
+    )
+    if started_at is not None:
+        stmt = stmt.where(TestResultRow.created_at == started_at)
+    result = await db.stream(stmt)
+    async for partition in result.partitions(chunk_size):
+        yield partition
 
 
 # ── Score History ──────────────────────────────────────────────────────
@@ -161,16 +343,40 @@ async def get_score_history(
     db: AsyncSession,
     project_id: uuid.UUID,
     limit: int = 30,
-) -> list[ScoreHistory]:
-    """Historico de scores por runner para um projeto."""
+    after: tuple[datetime, uuid.UUID] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list:
+    """Historico de scores por runner para um projeto (Rows de ``ScoreHistoryResponse``).
+
+    Ordenado por ``(recorded_at, id)`` decrescente, com paginacao keyset via
+    ``after`` e janela opcional ``[start, end)``.
+    """
     stmt = (
-        select(ScoreHistory)
+        select(*_SCORE_HISTORY_COLUMNS)
         .where(ScoreHistory.project_id == project_id)
-        .order_by(ScoreHistory.recorded_at.desc())
+        .order_by(ScoreHistory.recorded_at.desc(), ScoreHistory.id.desc())
         .limit(limit)
     )
+    if start is not None:
+        stmt = stmt.where(ScoreHistory.recorded_at >= start)
+    if end is not None:
+        stmt = stmt.where(ScoreHistory.recorded_at < end)
+    if after is not None:
+        stmt = stmt.where(tuple_(ScoreHistory.recorded_at, ScoreHistory.id) < tuple_(*after))
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    return list(result.all())
+
+
+async def get_execution_scores(db: AsyncSession, execution_id: uuid.UUID) -> list:
+    """Scores por runner de uma execucao (Rows de ``ScoreHistoryResponse``)."""
+    stmt = (
+        select(*_SCORE_HISTORY_COLUMNS)
+        .where(ScoreHistory.execution_id == execution_id)
+        .order_by(ScoreHistory.runner_type)
+    )
+    result = await db.execute(stmt)
+    return list(result.all())
 
 
 async def get_last_execution_for_project(
@@ -186,3 +392,1174 @@ async def get_last_execution_for_project(
     )
     result = await db.execute(stmt)
     return result.scalar_one_or_none()
+
+
+async def get_reusable_results(
+    db: AsyncSession,
+    project_name: str,
+    ambiente: str,
+) -> dict[str, dict]:
+    """Resultados aprovados da ultima execucao finalizada, por ``fingerprint``.
+
+    Base do modo incremental: casos cujo fingerprint aparece aqui podem ser
+    copiados sem reexecucao. Falhas, erros e resultados sem fingerprint
+    ficam de fora e sao sempre reexecutados.
+    """
+    last = (
+        await db.execute(
+            select(Execution.id, Execution.started_at)
+            .join(Project, Project.id == Execution.project_id)
+            .where(
+                Project.nome == project_name,
+                Execution.ambiente == ambiente,
+                Execution.finished_at.is_not(None),
+                Execution.archived_at.is_(None),
+            )
+            .order_by(Execution.started_at.desc(), Execution.id.desc())
+            .limit(1)
+        )
+    ).first()
+    if last is None:
+        return {}
+    result = await db.execute(
+        select(*_RESULT_COLUMNS[1:], TestResultRow.fingerprint)
+        .select_from(_RESULTS_FROM)
+        .where(
+            TestResultRow.execution_id == last.id,
+            TestResultRow.created_at == last.started_at,
+            TestResultRow.status_code == STATUS_CODES["pass"],
+            TestResultRow.fingerprint.is_not(None),
+        )
+    )
+    return {row.fingerprint: dict(row._mapping) for row in result}
+
+
+# ── Estatisticas por teste ─────────────────────────────────────────────
+
+TEST_STATS_SORTS = {
+    "flaky": lambda c: (c.flip_rate.desc(), c.pass_rate.asc()),
+    "pass_rate": lambda c: (c.pass_rate.asc(), c.flip_rate.desc()),
+    "p95": lambda c: (c.p95_ms.desc(),),
+    "nome": lambda c: (),
+}
+
+
+def _percentile(r, pct: int):
+    """``percentile_cont(pct / 100)`` de ``r.duracao_ms`` no grupo (portavel).
+
+    Mesma interpolacao linear do PostgreSQL, a partir da posicao ordinal
+    (``r.duracao_rank``, 1..``r.samples``): a posicao ``(samples - 1) * pct
+    / 100`` e separada em parte inteira e fracao com aritmetica inteira,
+    entao o resultado e igual em PostgreSQL e SQLite (que nao tem ``WITHIN
+    GROUP``).
+    """
+    scaled = (r.c.samples - 1) * pct
+    lo = scaled // 100 + 1
+    frac = func.max((scaled % 100) / 100.0)
+    hi = lo + case((scaled % 100 > 0, 1), else_=0)
+    v_lo = func.max(case((r.c.duracao_rank == lo, r.c.duracao_ms)))
+    v_hi = func.max(case((r.c.duracao_rank == hi, r.c.duracao_ms)))
+    return v_lo + frac * (v_hi - v_lo)
+
+
+async def get_test_stats(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    executions: int = 20,
+    tipo: str | None = None,
+    grupo: str | None = None,
+    flaky_only: bool = False,
+    min_runs: int = 1,
+    sort: str = "flaky",
+    limit: int = 100,
+) -> list:
+    """Estatisticas por ``(tipo, grupo, nome)`` nas ultimas ``executions`` execucoes.
+
+    Uma unica query: as execucoes finalizadas mais recentes vem do indice
+    ``(project_id, started_at, id)``, e funcoes de janela sobre os resultados
+    delas dao as trocas de status (``flips``), o status mais recente e a
+    ultima falha; a agregacao calcula taxa de aprovacao e mediana/p95 de
+    ``duracao_ms`` (``_percentile``). O custo depende da janela, nao do
+    historico total. Retorna Rows de ``TestStatsResponse``.
+    """
+    recent = (
+        select(Execution.id, Execution.started_at)
+        .where(
+            Execution.project_id == project_id,
+            Execution.finished_at.is_not(None),
+            Execution.archived_at.is_(None),
+        )
+        .order_by(Execution.started_at.desc(), Execution.id.desc())
+        .limit(executions)
+        .cte("recent")
+    )
+    key = TestResultRow.catalog_id
+    failing = TestResultRow.status_code.in_([STATUS_CODES[s] for s in FAILING_STATUSES])
+    chrono = (recent.c.started_at, recent.c.id)
+    ranked = (
+        select(
+            TestResultRow.catalog_id,
+            TestResultRow.status_code.label("status"),
+            func.coalesce(TestResultRow.duracao_ms, 0.0).label("duracao_ms"),
+            func.coalesce(TestResultRow.detalhes, "").label("detalhes"),
+            recent.c.id.label("execution_id"),
+            recent.c.started_at,
+            case((failing, 1), else_=0).label("failing"),
+            func.lag(TestResultRow.status_code).over(partition_by=key, order_by=chrono).label("prev_status"),
+            func.row_number().over(
+                partition_by=key, order_by=(recent.c.started_at.desc(), recent.c.id.desc()),
+            ).label("recency"),
+            func.row_number().over(
+                partition_by=(key, failing),
+                order_by=(recent.c.started_at.desc(), recent.c.id.desc()),
+            ).label("fail_recency"),
+            func.row_number().over(
+                partition_by=key, order_by=func.coalesce(TestResultRow.duracao_ms, 0.0),
+            ).label("duracao_rank"),
+            func.count().over(partition_by=key).label("samples"),
+        )
+        .join(
+            recent,
+            (TestResultRow.execution_id == recent.c.id)
+            & (TestResultRow.created_at == recent.c.started_at),
+        )
+        .where(TestResultRow.status_code != STATUS_CODES["skip"])
+    )
+    if tipo or grupo is not None:
+        tests = select(TestCatalog.id).where(TestCatalog.project_id == project_id)
+        if tipo:
+            tests = tests.where(TestCatalog.tipo == tipo)
+        if grupo is not None:
+            tests = tests.where(TestCatalog.grupo == grupo)
+        ranked = ranked.where(TestResultRow.catalog_id.in_(tests))
+    r = ranked.subquery("r")
+
+    is_pass = r.c.status == STATUS_CODES["pass"]
+    runs = func.count()
+    passed = func.sum(case((is_pass, 1), else_=0))
+    flips = func.sum(
+        case(
+            (
+                r.c.prev_status.is_not(None)
+                & (is_pass != (r.c.prev_status == STATUS_CODES["pass"])),
+                1,
+            ),
+            else_=0,
+        )
+    )
+    last_failure = (r.c.failing == 1) & (r.c.fail_recency == 1)
+    last_status = func.max(case((r.c.recency == 1, r.c.status)))
+    stats = (
+        select(
+            TestCatalog.tipo,
+            TestCatalog.grupo,
+            TestCatalog.nome,
+            runs.label("runs"),
+            passed.label("passed"),
+            func.round((passed * 100.0 / runs).cast(Numeric), 1).cast(Float).label("pass_rate"),
+            flips.label("flips"),
+            func.round(
+                (flips * 1.0 / func.greatest(runs - 1, 1)).cast(Numeric), 3,
+            ).cast(Float).label("flip_rate"),
+            case(STATUS_NAMES, value=last_status).label("last_status"),
+            func.max(case((last_failure, r.c.started_at))).label("last_failure_at"),
+            func.max(case((last_failure, r.c.execution_id.cast(Text)))).label(
+                "last_failure_execution_id"
+            ),
+            func.max(case((last_failure, r.c.detalhes))).label("last_failure_detalhes"),
+            _percentile(r, 50).label("median_ms"),
+            _percentile(r, 95).label("p95_ms"),
+        )
+        .select_from(r.join(TestCatalog, TestCatalog.id == r.c.catalog_id))
+        .group_by(TestCatalog.id, TestCatalog.tipo, TestCatalog.grupo, TestCatalog.nome)
+        .having(runs >= min_runs)
+        .limit(limit)
+    )
+    if flaky_only:
+        stats = stats.having(flips > 0)
+    cols = stats.selected_columns
+    stats = stats.order_by(*TEST_STATS_SORTS[sort](cols), cols.tipo, cols.grupo, cols.nome)
+    result = await db.execute(stats)
+    return list(result.all())
+
+
+# ── Diff entre execucoes ───────────────────────────────────────────────
+
+FAILING_STATUSES = ("fail", "error")
+DIFF_CHANGES = ("new_failure", "fix", "added", "removed", "slower", "faster")
+
+
+def classify_diff(
+    status_a: str | None,
+    status_b: str | None,
+    duracao_a: float | None,
+    duracao_b: float | None,
+    latency_ratio: float,
+    latency_min_ms: float,
+) -> str | None:
+    """Tipo de mudanca de um teste entre ``a`` (base) e ``b``, ou None."""
+    if status_a is None:
+        return "added"
+    if status_b is None:
+        return "removed"
+    if status_a == "pass" and status_b in FAILING_STATUSES:
+        return "new_failure"
+    if status_a in FAILING_STATUSES and status_b == "pass":
+        return "fix"
+    delta = (duracao_b or 0.0) - (duracao_a or 0.0)
+    if abs(delta) >= latency_min_ms and abs(delta) >= latency_ratio * (duracao_a or 0.0):
+        return "slower" if delta > 0 else "faster"
+    return None
+
+
+async def diff_executions(
+    db: AsyncSession,
+    a,
+    b,
+    latency_ratio: float = 0.5,
+    latency_min_ms: float = 100.0,
+) -> list[dict]:
+    """Testes que mudaram entre as execucoes ``a`` e ``b`` (Rows de ``get_execution_state``).
+
+    Um unico GROUP BY sobre os resultados das duas execucoes casa os testes
+    por ``(tipo, nome)``; o HAVING ja descarta os que nao mudaram de status
+    nem de latencia, entao so as diferencas saem do banco. Execucoes
+    arquivadas sao comparadas em memoria a partir do arquivo.
+    """
+    if a.archive_path or b.archive_path:
+        return await _diff_in_memory(db, a, b, latency_ratio, latency_min_ms)
+
+    in_a = TestResultRow.execution_id == a.id
+    in_b = TestResultRow.execution_id == b.id
+    status_a = func.max(case((in_a, TestResultRow.status_code)))
+    status_b = func.max(case((in_b, TestResultRow.status_code)))
+    duracao_a = func.avg(case((in_a, func.coalesce(TestResultRow.duracao_ms, 0.0))))
+    duracao_b = func.avg(case((in_b, func.coalesce(TestResultRow.duracao_ms, 0.0))))
+    stmt = (
+        select(
+            TestCatalog.tipo,
+            TestCatalog.nome,
+            func.max(TestCatalog.grupo).label("grupo"),
+            case(
+                SEVERITY_NAMES, value=func.max(TestResultRow.severidade_code), else_="info",
+            ).label("severidade"),
+            case(STATUS_NAMES, value=status_a).label("status_a"),
+            case(STATUS_NAMES, value=status_b).label("status_b"),
+            duracao_a.label("duracao_ms_a"),
+            duracao_b.label("duracao_ms_b"),
+            func.max(case((in_b, func.coalesce(TestResultRow.detalhes, "")))).label("detalhes"),
+        )
+        .select_from(_RESULTS_FROM)
+        .where(
+            (in_a & (TestResultRow.created_at == a.started_at))
+            | (in_b & (TestResultRow.created_at == b.started_at))
+        )
+        .group_by(TestCatalog.tipo, TestCatalog.nome)
+        .having(
+            status_a.is_(None)
+            | status_b.is_(None)
+            | (status_a != status_b)
+            | (func.abs(duracao_b - duracao_a) >= latency_min_ms)
+        )
+        .order_by(TestCatalog.tipo, TestCatalog.nome)
+    )
+    rows = (await db.execute(stmt)).all()
+    return _diff_entries((dict(r._mapping) for r in rows), latency_ratio, latency_min_ms)
+
+
+def _diff_entries(rows: Iterable[dict], latency_ratio: float, latency_min_ms: float) -> list[dict]:
+    entries = []
+    for r in rows:
+        change = classify_diff(
+            r["status_a"], r["status_b"], r["duracao_ms_a"], r["duracao_ms_b"],
+            latency_ratio, latency_min_ms,
+        )
+        if change is None:
+            continue
+        if r["duracao_ms_a"] is not None and r["duracao_ms_b"] is not None:
+            r["delta_ms"] = round(r["duracao_ms_b"] - r["duracao_ms_a"], 1)
+        entries.append({**r, "change": change})
+    return entries
+
+
+async def _diff_in_memory(db: AsyncSession, a, b, latency_ratio: float, latency_min_ms: float) -> list[dict]:
+    merged: dict[tuple[str, str], dict] = {}
+    for side, state in (("a", a), ("b", b)):
+        rows = await get_test_results(
+            db, state.id, archive_path=state.archive_path, started_at=state.started_at,
+        )
+        for r in rows:
+            entry = merged.setdefault(
+                (r.tipo, r.nome),
+                {
+                    "tipo": r.tipo, "nome": r.nome, "grupo": r.grupo, "severidade": r.severidade,
+                    "status_a": None, "status_b": None,
+                    "duracao_ms_a": None, "duracao_ms_b": None, "detalhes": "",
+                },
+            )
+            entry[f"status_{side}"] = r.status
+            entry[f"duracao_ms_{side}"] = r.duracao_ms
+            if side == "b":
+                entry["detalhes"] = r.detalhes
+    return _diff_entries(
+        (merged[k] for k in sorted(merged)), latency_ratio, latency_min_ms,
+    )
+
+
+# ── Busca textual ──────────────────────────────────────────────────────
+
+SEARCH_MODES = ("fts", "substring")
+SEARCH_SORTS = ("relevance", "recent")
+
+# Mesma expressao dos indices GIN de supabase_schema.sql (precisa casar literalmente)
+_TS_CONFIG = literal_column("'simple'::regconfig")
+
+
+def _like_escape(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+_SEARCH_TERM = re.compile(r'(-?)"([^"]+)"|(-?)(\S+)')
+
+
+def _search_terms(q: str) -> list[tuple[str, bool]]:
+    """Termos de ``q`` na sintaxe de ``websearch_to_tsquery``: ``(termo, negado)``.
+
+    Frases entre aspas viram um termo; ``-termo`` nega; ``or`` e ignorado.
+    """
+    terms = []
+    for m in _SEARCH_TERM.finditer(q):
+        negated, term = (m[1], m[2]) if m[2] is not None else (m[3], m[4])
+        if term.lower() != "or":
+            terms.append((term, bool(negated)))
+    return terms
+
+
+def _terms_match(column, terms: Sequence[tuple[str, bool]]):
+    """Todos os termos positivos (e nenhum negado) aparecem em ``column``."""
+    if not any(not negated for _, negated in terms):
+        return false()
+    conditions = []
+    for term, negated in terms:
+        match = column.ilike(f"%{_like_escape(term)}%", escape="\\")
+        conditions.append(~match if negated else match)
+    return and_(*conditions)
+
+
+async def search_results(
+    db: AsyncSession,
+    q: str,
+    mode: str = "fts",
+    project_id: uuid.UUID | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status: Sequence[str] | None = None,
+    tipo: str | None = None,
+    sort: str = "relevance",
+    limit: int = 50,
+    after: tuple | None = None,
+) -> list:
+    """Busca ``q`` no nome do teste e em ``detalhes`` dos resultados.
+
+    ``fts`` usa ``websearch_to_tsquery`` (aspas, ``-termo``, ``or``) contra os
+    indices GIN de ``to_tsvector('simple', ...)``; ``substring`` usa ``ILIKE``
+    apoiado pelos indices ``pg_trgm``. Nomes casam no catalogo (pequeno) e
+    entram por ``catalog_id``; ``detalhes`` casam nos indices parciais de
+    ``test_results``. ``since``/``until`` filtram ``created_at`` (inicio da
+    execucao), podando particoes. Resultados arquivados nao entram.
+
+    Ordenacao keyset: ``relevance`` por ``(rank, created_at, execution_id,
+    seq)`` decrescentes; ``recent`` sem o ``rank``. ``after`` e a chave da
+    ultima linha da pagina anterior. Retorna Rows de ``SearchHitResponse``
+    (mais ``seq``).
+
+    Em SQLite (sem ``tsvector``/``pg_trgm``) os dois modos usam ``LIKE``: em
+    ``fts`` cada termo precisa aparecer (``-termo`` exclui), o ``rank`` e
+    1.0 para nome e 0.5 para detalhes e nao ha ``snippet``.
+    """
+    native = dialects.dialect_name(db) == "postgresql"
+    if mode == "fts" and native:
+        tsq = func.websearch_to_tsquery(_TS_CONFIG, q)
+        name_match = func.to_tsvector(_TS_CONFIG, TestCatalog.nome).bool_op("@@")(tsq)
+        detail_match = func.to_tsvector(_TS_CONFIG, TestResultRow.detalhes).bool_op("@@")(tsq)
+        document = func.setweight(
+            func.to_tsvector(_TS_CONFIG, TestCatalog.nome), literal_column("'A'"),
+        ).op("||")(
+            func.setweight(
+                func.to_tsvector(_TS_CONFIG, func.coalesce(TestResultRow.detalhes, "")),
+                literal_column("'B'"),
+            )
+        )
+        rank = func.ts_rank_cd(document, tsq)
+    elif mode == "fts":
+        # SQLite: termos por LIKE, sem stemming nem ``or``
+        terms = _search_terms(q)
+        name_match = _terms_match(TestCatalog.nome, terms)
+        detail_match = _terms_match(TestResultRow.detalhes, terms)
+        rank = case((name_match, 1.0), else_=0.5)
+    else:
+        pattern = f"%{_like_escape(q)}%"
+        name_match = TestCatalog.nome.ilike(pattern, escape="\\")
+        detail_match = TestResultRow.detalhes.ilike(pattern, escape="\\")
+        if native:
+            rank = func.greatest(
+                func.word_similarity(q, TestCatalog.nome),
+                func.word_similarity(q, func.coalesce(TestResultRow.detalhes, "")),
+            )
+        else:
+            rank = case((name_match, 1.0), else_=0.5)
+    rank = rank.cast(Float)
+
+    key = (TestResultRow.created_at, TestResultRow.execution_id, TestResultRow.seq)
+    order = ["started_at", "execution_id", "seq"]
+    if sort == "relevance":
+        key = (rank, *key)
+        order.insert(0, "rank")
+
+    def branch(match):
+        stmt = (
+            select(
+                _RESULT_ID.label("id"),
+                TestResultRow.execution_id,
+                TestResultRow.seq,
+                Execution.project_id,
+                Project.nome.label("projeto_nome"),
+                Execution.ambiente,
+                TestResultRow.created_at.label("started_at"),
+                TestCatalog.tipo,
+                TestCatalog.grupo,
+                TestCatalog.nome,
+                _RESULT_STATUS.label("status"),
+                _RESULT_SEVERITY.label("severidade"),
+                func.coalesce(TestResultRow.duracao_ms, 0.0).label("duracao_ms"),
+                func.coalesce(TestResultRow.detalhes, "").label("detalhes"),
+                rank.label("rank"),
+            )
+            .select_from(_RESULTS_FROM)
+            .join(Execution, Execution.id == TestResultRow.execution_id)
+            .join(Project, Project.id == Execution.project_id)
+            .where(match)
+        )
+        if project_id is not None:
+            stmt = stmt.where(TestCatalog.project_id == project_id)
+        if tipo:
+            stmt = stmt.where(TestCatalog.tipo == tipo)
+        if status:
+            stmt = stmt.where(TestResultRow.status_code.in_([STATUS_CODES[s] for s in status]))
+        if since is not None:
+            stmt = stmt.where(TestResultRow.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(TestResultRow.created_at < until)
+        if after is not None:
+            stmt = stmt.where(tuple_(*key) < tuple_(*after))
+        # Subconsulta: SQLite nao aceita LIMIT direto num ramo do UNION
+        return select(stmt.order_by(*(k.desc() for k in key)).limit(limit).subquery())
+
+    # Dois ramos com top-N proprio em vez de um OR (que impediria os indices):
+    # testes cujo nome casa (catalogo -> idx_test_results_catalog) e
+    # resultados cujo detalhe casa (GIN parcial), sem repetir os do primeiro.
+    hits = union_all(
+        branch(name_match),
+        branch(TestResultRow.detalhes.is_not(None) & detail_match & ~name_match),
+    ).subquery("hits")
+    columns = [hits]
+    if mode == "fts" and native:
+        columns.append(
+            func.ts_headline(
+                _TS_CONFIG,
+                hits.c.detalhes,
+                tsq,
+                "MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<<, StopSel=>>",
+            ).label("snippet")
+        )
+    stmt = select(*columns).order_by(*(hits.c[k].desc() for k in order)).limit(limit)
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+# ── Rollups de score ───────────────────────────────────────────────────
+
+ROLLUP_BUCKETS = ("hour", "day", "week")
+
+
+def bucket_start(ts: datetime, bucket: str) -> datetime:
+    """Inicio (UTC) do intervalo ``bucket`` que contem ``ts``."""
+    ts = ts.astimezone(timezone.utc)
+    if bucket == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"bucket desconhecido: {bucket}")
+
+
+async def _update_rollups(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    scores: Sequence[Mapping],
+    recorded_at: datetime,
+) -> None:
+    """Soma os scores recem-gravados nos rollups de hora, dia e semana.
+
+    Um unico INSERT ... ON CONFLICT DO UPDATE por ingestao; as linhas sao
+    agregadas e ordenadas pela chave antes, evitando conflito duplo no mesmo
+    comando e deadlock entre ingestoes concorrentes do mesmo projeto.
+    """
+    rows: dict[tuple, dict] = {}
+    for s in scores:
+        for bucket in ROLLUP_BUCKETS:
+            key = (s["runner_type"], bucket, bucket_start(recorded_at, bucket))
+            row = rows.get(key)
+            score = s["score"]
+            if row is None:
+                rows[key] = {
+                    "project_id": project_id,
+                    "runner_type": key[0],
+                    "bucket": key[1],
+                    "bucket_start": key[2],
+                    "samples": 1,
+                    "score_sum": score,
+                    "score_min": score,
+                    "score_max": score,
+                    "last_score": score,
+                    "last_recorded_at": recorded_at,
+                    "total_sum": s.get("total", 0),
+                    "passed_sum": s.get("passed", 0),
+                }
+            else:
+                row["samples"] += 1
+                row["score_sum"] += score
+                row["score_min"] = min(row["score_min"], score)
+                row["score_max"] = max(row["score_max"], score)
+                row["last_score"] = score
+                row["total_sum"] += s.get("total", 0)
+                row["passed_sum"] += s.get("passed", 0)
+    if not rows:
+        return
+
+    stmt = dialects.insert_for(db, ScoreRollup).values([rows[k] for k in sorted(rows)])
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            ScoreRollup.project_id,
+            ScoreRollup.runner_type,
+            ScoreRollup.bucket,
+            ScoreRollup.bucket_start,
+        ],
+        set_={
+            "samples": ScoreRollup.samples + new.samples,
+            "score_sum": ScoreRollup.score_sum + new.score_sum,
+            "score_min": func.least(ScoreRollup.score_min, new.score_min),
+            "score_max": func.greatest(ScoreRollup.score_max, new.score_max),
+            "last_score": case(
+                (new.last_recorded_at >= ScoreRollup.last_recorded_at, new.last_score),
+                else_=ScoreRollup.last_score,
+            ),
+            "last_recorded_at": func.greatest(ScoreRollup.last_recorded_at, new.last_recorded_at),
+            "total_sum": ScoreRollup.total_sum + new.total_sum,
+            "passed_sum": ScoreRollup.passed_sum + new.passed_sum,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_score_rollups(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    bucket: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list:
+    """Rollups de um projeto em ordem cronologica (Rows de ``ScoreRollupResponse``)."""
+    stmt = (
+        select(
+            ScoreRollup.runner_type,
+            ScoreRollup.bucket_start,
+            func.round(
+                (ScoreRollup.score_sum / func.nullif(ScoreRollup.samples, 0)).cast(Numeric), 1,
+            ).cast(Float).label("score"),
+            ScoreRollup.score_min.label("min_score"),
+            ScoreRollup.score_max.label("max_score"),
+            ScoreRollup.last_score,
+            ScoreRollup.total_sum.label("total"),
+            ScoreRollup.passed_sum.label("passed"),
+            ScoreRollup.samples,
+        )
+        .where(ScoreRollup.project_id == project_id, ScoreRollup.bucket == bucket)
+        .order_by(ScoreRollup.bucket_start, ScoreRollup.runner_type)
+    )
+    if start is not None:
+        stmt = stmt.where(ScoreRollup.bucket_start >= bucket_start(start, bucket))
+    if end is not None:
+        stmt = stmt.where(ScoreRollup.bucket_start < end)
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+_REBUILD_ROLLUPS_SQL = """
+INSERT INTO score_rollups (
+    project_id, runner_type, bucket, bucket_start, samples, score_sum,
+    score_min, score_max, last_score, last_recorded_at, total_sum, passed_sum
+)
+SELECT
+    project_id,
+    runner_type,
+    '{bucket}',
+    date_trunc('{bucket}', recorded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    count(*),
+    sum(coalesce(score, 0)),
+    min(score),
+    max(score),
+    (array_agg(score ORDER BY recorded_at DESC))[1],
+    max(recorded_at),
+    sum(coalesce(total, 0)),
+    sum(coalesce(passed, 0))
+FROM score_history
+WHERE recorded_at IS NOT NULL
+GROUP BY 1, 2, 3, 4
+"""
+
+
+async def rebuild_score_rollups(db: AsyncSession) -> None:
+    """Recalcula ``score_rollups`` a partir de ``score_history`` (backfill).
+
+    Em PostgreSQL e um INSERT ... SELECT por intervalo. Em SQLite (sem
+    ``date_trunc``) os scores sao relidos em ordem e somados por
+    ``_update_rollups``, uma gravacao por execucao.
+    """
+    await db.execute(ScoreRollup.__table__.delete())
+    if dialects.dialect_name(db) == "postgresql":
+        for bucket in ROLLUP_BUCKETS:
+            await db.execute(text(_REBUILD_ROLLUPS_SQL.format(bucket=bucket)))
+        return
+    rows = await db.execute(
+        select(
+            ScoreHistory.project_id,
+            ScoreHistory.recorded_at,
+            *_SCORE_HISTORY_COLUMNS[2:6],
+        )
+        .where(ScoreHistory.recorded_at.is_not(None))
+        .order_by(ScoreHistory.project_id, ScoreHistory.recorded_at)
+    )
+    for (project_id, recorded_at), group in groupby(rows.all(), key=lambda r: r[:2]):
+        await _update_rollups(db, project_id, [r._mapping for r in group], recorded_at)
+
+
+# ── Ingestao ───────────────────────────────────────────────────────────
+
+_RESULT_COPY_COLUMNS = (
+    "execution_id", "seq", "created_at", "catalog_id", "status_code",
+    "severidade_code", "duracao_ms", "detalhes", "fingerprint",
+)
+
+
+def _tally(results: Iterable[Mapping]) -> dict[str, dict[str, int]]:
+    """Conta resultados por runner (``tipo``) e por status."""
+    counters: dict[str, dict[str, int]] = {}
+    for r in results:
+        c = counters.get(r["tipo"])
+        if c is None:
+            c = counters[r["tipo"]] = {"total": 0, "pass": 0, "fail": 0, "error": 0, "skip": 0}
+        c["total"] += 1
+        c[r["status"]] = c.get(r["status"], 0) + 1
+    return counters
+
+
+async def _copy_rows(
+    db: AsyncSession,
+    table: Table,
+    columns: Sequence[str],
+    records: list[tuple],
+) -> None:
+    """Grava linhas em lote na transacao da sessao.
+
+    Com asyncpg usa ``COPY ... FROM STDIN`` (``copy_records_to_table``); nos
+    demais drivers cai para um INSERT multi-linha (executemany).
+    """
+    if not records:
+        return
+    conn = await db.connection()
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=records, columns=list(columns),
+        )
+    else:
+        await conn.execute(table.insert(), [dict(zip(columns, rec)) for rec in records])
+
+
+def _resolve_timing(
+    started_at: datetime,
+    finished_at: datetime | None,
+    duracao_ms: float | None,
+) -> tuple[datetime, float]:
+    """Completa ``finished_at``/``duracao_ms`` a partir do que foi informado."""
+    if finished_at is None:
+        if duracao_ms is not None:
+            finished_at = started_at + timedelta(milliseconds=duracao_ms)
+        else:
+            finished_at = _utcnow()
+    if duracao_ms is None:
+        duracao_ms = max(0.0, (finished_at - started_at).total_seconds() * 1000)
+    return finished_at, round(duracao_ms, 1)
+
+
+def _totals(counters: Mapping[str, Mapping[str, int]]) -> dict:
+    """Totais da execucao (colunas de ``executions``) a partir dos contadores."""
+    total = sum(c["total"] for c in counters.values())
+    passed = sum(c.get("pass", 0) for c in counters.values())
+    return {
+        "score": calculate_score(passed, total),
+        "total": total,
+        "passed": passed,
+        "failed": sum(c.get("fail", 0) for c in counters.values()),
+        "errors": sum(c.get("error", 0) for c in counters.values()),
+        "skipped": sum(c.get("skip", 0) for c in counters.values()),
+    }
+
+
+def _catalog_key(r: Mapping) -> tuple[str, str, str]:
+    return (r["tipo"], r.get("grupo") or "", r["nome"])
+
+
+async def _resolve_catalog(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    keys: Iterable[tuple[str, str, str]],
+) -> dict[tuple[str, str, str], int]:
+    """Ids de ``test_catalog`` para as chaves ``(tipo, grupo, nome)``, criando as novas.
+
+    So as chaves do lote sao consultadas (indice unico do catalogo). As que
+    faltam entram num INSERT ... ON CONFLICT DO NOTHING ordenado — ingestoes
+    concorrentes do mesmo projeto nao duplicam nem travam em ordem cruzada —
+    e as que outra transacao inseriu no meio tempo sao relidas.
+    """
+    keys = set(keys)
+    key_cols = (TestCatalog.tipo, TestCatalog.grupo, TestCatalog.nome)
+
+    async def lookup(wanted: set) -> dict:
+        rows = await db.execute(
+            select(TestCatalog.id, *key_cols).where(
+                TestCatalog.project_id == project_id, tuple_(*key_cols).in_(sorted(wanted)),
+            )
+        )
+        return {(tipo, grupo, nome): id_ for id_, tipo, grupo, nome in rows}
+
+    ids = await lookup(keys)
+    missing = sorted(keys - ids.keys())
+    if missing:
+        stmt = (
+            dialects.insert_for(db, TestCatalog)
+            .values([
+                {"project_id": project_id, "tipo": t, "grupo": g, "nome": n, "created_at": _utcnow()}
+                for t, g, n in missing
+            ])
+            .on_conflict_do_nothing(index_elements=["project_id", "tipo", "grupo", "nome"])
+            .returning(TestCatalog.id, *key_cols)
+        )
+        for id_, tipo, grupo, nome in await db.execute(stmt):
+            ids[(tipo, grupo, nome)] = id_
+        raced = set(missing) - ids.keys()
+        if raced:
+            ids.update(await lookup(raced))
+    return ids
+
+
+async def _insert_results(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    execution_id: uuid.UUID,
+    started_at: datetime,
+    results: Sequence[Mapping],
+    seq_start: int = 0,
+) -> None:
+    """Grava um lote de resultados de uma execucao via ``_copy_rows``.
+
+    Nome/tipo/grupo viram ``catalog_id`` (``_resolve_catalog``) e status e
+    severidade viram codigos; ``seq`` numera o lote a partir de
+    ``seq_start``. ``created_at`` recebe o inicio da execucao, de modo que
+    todos os resultados de uma execucao caem na mesma particao mensal.
+    """
+    catalog = await _resolve_catalog(db, project_id, map(_catalog_key, results))
+    records = [
+        (
+            execution_id,
+            seq_start + i,
+            started_at,
+            catalog[_catalog_key(r)],
+            STATUS_CODES[r["status"]],
+            SEVERITY_CODES.get(r.get("severidade") or "info", 0),
+            r.get("duracao_ms") or 0.0,
+            r.get("detalhes") or None,
+            r.get("fingerprint"),
+        )
+        for i, r in enumerate(results)
+    ]
+    await _copy_rows(db, TestResultRow.__table__, _RESULT_COPY_COLUMNS, records)
+
+
+def _result_event(execution_id: uuid.UUID, seq_start: int, results: Sequence[Mapping]) -> dict:
+    """Evento ``results`` (campos de ``TestResultResponse``) para o stream ao vivo."""
+    return {
+        "type": "results",
+        "results": [
+            {
+                "id": str(result_id(execution_id, seq_start + i)),
+                "nome": r["nome"],
+                "tipo": r["tipo"],
+                "status": r["status"],
+                "duracao_ms": r.get("duracao_ms") or 0.0,
+                "detalhes": r.get("detalhes") or "",
+                "severidade": r.get("severidade") or "info",
+                "grupo": r.get("grupo") or "",
+            }
+            for i, r in enumerate(results)
+        ],
+    }
+
+
+def _finished_event(finished_at: datetime, duracao_ms: float, totals: Mapping) -> dict:
+    return {
+        "type": "finished",
+        "finished_at": finished_at.isoformat(),
+        "duracao_ms": duracao_ms,
+        **totals,
+    }
+
+
+async def _insert_scores(
+    db: AsyncSession,
+    execution_id: uuid.UUID,
+    project_id: uuid.UUID,
+    counters: Mapping[str, Mapping[str, int]],
+    scores: Sequence[Mapping] | None,
+    recorded_at: datetime,
+) -> None:
+    """Grava o score por runner; sem ``scores`` explicitos, deriva dos contadores."""
+    if scores is None:
+        scores = [
+            {
+                "runner_type": tipo,
+                "score": calculate_score(c.get("pass", 0), c["total"]),
+                "total": c["total"],
+                "passed": c.get("pass", 0),
+            }
+            for tipo, c in counters.items()
+        ]
+    if not scores:
+        return
+    await db.execute(
+        insert(ScoreHistory),
+        [
+            {
+                "id": uuid.uuid4(),
+                "execution_id": execution_id,
+                "project_id": project_id,
+                "runner_type": s["runner_type"],
+                "score": s["score"],
+                "total": s.get("total", 0),
+                "passed": s.get("passed", 0),
+                "recorded_at": recorded_at,
+            }
+            for s in scores
+        ],
+    )
+    await _update_rollups(db, project_id, scores, recorded_at)
+
+
+async def ingest_execution(
+    db: AsyncSession,
+    project_name: str,
+    ambiente: str,
+    results: Sequence[Mapping],
+    started_at: datetime | None = None,
+    finished_at: datetime | None = None,
+    duracao_ms: float | None = None,
+    scores: Sequence[Mapping] | None = None,
+) -> Execution:
+    """Grava uma execucao completa — metadados, resultados e scores por runner.
+
+    Totais e score sao calculados aqui a partir de ``results``; ``scores``
+    sobrescreve o score por runner quando informado. Segredos em ``detalhes``
+    sao redigidos antes da gravacao (``redaction``). Nao faz commit: o
+    chamador controla a transacao.
+    """
+    project = await get_or_create_project(db, project_name)
+
+    started_at = started_at or _utcnow()
+    finished_at, duracao_ms = _resolve_timing(started_at, finished_at, duracao_ms)
+    results = redaction.redact_results(results)
+    counters = _tally(results)
+
+    execution = Execution(
+        id=uuid.uuid4(),
+        project_id=project.id,
+        ambiente=ambiente,
+        started_at=started_at,
+        finished_at=finished_at,
+        duracao_ms=duracao_ms,
+        **_totals(counters),
+    )
+    db.add(execution)
+    await db.flush()
+
+    await _insert_results(db, project.id, execution.id, started_at, results)
+    await _insert_scores(db, execution.id, project.id, counters, scores, finished_at)
+    await refresh_project_summary(db, project.id)
+    await events.publish(
+        db, str(execution.id), [_finished_event(finished_at, duracao_ms, _totals(counters))],
+        project_id=project.id,
+    )
+    return execution
+
+
+async def open_execution(
+    db: AsyncSession,
+    project_name: str,
+    ambiente: str,
+    started_at: datetime | None = None,
+) -> Execution:
+    """Abre uma execucao (``finished_at`` nulo) para receber resultados em lotes."""
+    project = await get_or_create_project(db, project_name)
+    execution = Execution(
+        id=uuid.uuid4(),
+        project_id=project.id,
+        ambiente=ambiente,
+        started_at=started_at or _utcnow(),
+        finished_at=None,
+        score=0.0,
+        total=0,
+        passed=0,
+        failed=0,
+        errors=0,
+        skipped=0,
+        duracao_ms=0.0,
+    )
+    db.add(execution)
+    await db.flush()
+    await events.touch(db, project.id)
+    return execution
+
+
+async def get_execution_state(db: AsyncSession, execution_id: uuid.UUID):
+    """Campos de controle de uma execucao, sem carregar relacionamentos.
+
+    Retorna Row com ``id``, ``project_id``, ``started_at``, ``finished_at``
+    (nulo indica execucao aberta) e ``archive_path`` (preenchido quando os
+    resultados ja foram arquivados).
+    """
+    stmt = select(
+        Execution.id,
+        Execution.project_id,
+        Execution.started_at,
+        Execution.finished_at,
+        Execution.archive_path,
+    ).where(Execution.id == execution_id)
+    result = await db.execute(stmt)
+    return result.one_or_none()
+
+
+async def append_results(
+    db: AsyncSession,
+    execution_id: uuid.UUID,
+    project_id: uuid.UUID,
+    started_at: datetime,
+    results: Sequence[Mapping],
+) -> None:
+    """Acrescenta um lote de resultados a uma execucao aberta.
+
+    Os contadores de ``executions`` sao incrementados no proprio UPDATE, de
+    modo que appends concorrentes nao se sobrescrevem; o UPDATE vem antes do
+    insert e o ``total`` devolvido reserva a faixa de ``seq`` do lote (a
+    trava da linha serializa os appends). Segredos em ``detalhes`` sao
+    redigidos antes da gravacao e do evento ao vivo. O score so e calculado
+    em ``finalize_execution``.
+    """
+    if not results:
+        return
+    results = redaction.redact_results(results)
+    counters = _tally(results)
+    totals = _totals(counters)
+    progress = (
+        await db.execute(
+            update(Execution)
+            .where(Execution.id == execution_id)
+            .values(
+                total=func.coalesce(Execution.total, 0) + totals["total"],
+                passed=func.coalesce(Execution.passed, 0) + totals["passed"],
+                failed=func.coalesce(Execution.failed, 0) + totals["failed"],
+                errors=func.coalesce(Execution.errors, 0) + totals["errors"],
+                skipped=func.coalesce(Execution.skipped, 0) + totals["skipped"],
+            )
+            .returning(
+                Execution.total, Execution.passed, Execution.failed,
+                Execution.errors, Execution.skipped,
+            )
+        )
+    ).one()
+    seq_start = progress.total - len(results)
+    await _insert_results(db, project_id, execution_id, started_at, results, seq_start)
+    await events.publish(
+        db,
+        str(execution_id),
+        [_result_event(execution_id, seq_start, results), {"type": "progress", **progress._asdict()}],
+        project_id=project_id,
+    )
+
+
+async def _tally_from_db(db: AsyncSession, execution_id: uuid.UUID) -> dict[str, dict[str, int]]:
+    """Mesmo formato de ``_tally``, agregado no banco."""
+    stmt = (
+        select(TestCatalog.tipo, TestResultRow.status_code, func.count())
+        .select_from(_RESULTS_FROM)
+        .where(TestResultRow.execution_id == execution_id)
+        .group_by(TestCatalog.tipo, TestResultRow.status_code)
+    )
+    counters: dict[str, dict[str, int]] = {}
+    for tipo, code, n in (await db.execute(stmt)).all():
+        c = counters.setdefault(tipo, {"total": 0, "pass": 0, "fail": 0, "error": 0, "skip": 0})
+        c["total"] += n
+        c[STATUS_NAMES[code]] += n
+    return counters
+
+
+async def finalize_execution(
+    db: AsyncSession,
+    execution_id: uuid.UUID,
+    project_id: uuid.UUID,
+    started_at: datetime,
+    finished_at: datetime | None = None,
+    duracao_ms: float | None = None,
+    scores: Sequence[Mapping] | None = None,
+) -> bool:
+    """Fecha uma execucao aberta: recalcula totais e score e grava o score por runner.
+
+    Os totais sao recontados a partir de ``test_results`` (fonte da verdade),
+    corrigindo eventuais divergencias dos contadores incrementais. Retorna
+    False se a execucao ja estava finalizada.
+    """
+    finished_at, duracao_ms = _resolve_timing(started_at, finished_at, duracao_ms)
+    counters = await _tally_from_db(db, execution_id)
+
+    result = await db.execute(
+        update(Execution)
+        .where(Execution.id == execution_id, Execution.finished_at.is_(None))
+        .values(finished_at=finished_at, duracao_ms=duracao_ms, **_totals(counters))
+    )
+    if result.rowcount == 0:
+        return False
+    await _insert_scores(db, execution_id, project_id, counters, scores, finished_at)
+    await refresh_project_summary(db, project_id)
+    await events.publish(
+        db, str(execution_id), [_finished_event(finished_at, duracao_ms, _totals(counters))],
+        project_id=project_id,
+    )
+    return True
+
+
+# ── Resumo por projeto ─────────────────────────────────────────────────
+
+async def refresh_project_summary(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    recount: bool = False,
+) -> None:
+    """Atualiza ``project_summary`` apos a finalizacao de uma execucao.
+
+    Roda na transacao da ingestao e trava a linha do projeto, serializando
+    finalizacoes concorrentes do mesmo projeto. Le apenas as ultimas
+    ``settings.summary_window`` execucoes finalizadas (indice por projeto);
+    ``execution_count`` e incrementado, salvo com ``recount`` ou quando o
+    resumo ainda nao existe, casos em que e recontado.
+    """
+    lock = (
+        select(ProjectSummary.execution_count)
+        .select_from(Project)
+        .outerjoin(ProjectSummary, ProjectSummary.project_id == Project.id)
+        .where(Project.id == project_id)
+        .with_for_update(of=Project)
+    )
+    current_count = (await db.execute(lock)).scalar_one_or_none()
+
+    finished = (Execution.project_id == project_id) & Execution.finished_at.is_not(None)
+    recent_stmt = (
+        select(
+            Execution.id,
+            Execution.score,
+            Execution.started_at,
+            Execution.total,
+            Execution.passed,
+        )
+        .where(finished)
+        .order_by(Execution.started_at.desc(), Execution.id.desc())
+        .limit(settings.summary_window)
+    )
+    recent = (await db.execute(recent_stmt)).all()
+    if not recent:
+        return
+
+    if recount or current_count is None:
+        count_stmt = select(func.count()).select_from(Execution).where(finished)
+        execution_count = (await db.execute(count_stmt)).scalar_one()
+    else:
+        execution_count = current_count + 1
+
+    last = recent[0]
+    previous = recent[1] if len(recent) > 1 else None
+    window_total = sum(r.total or 0 for r in recent)
+    window_passed = sum(r.passed or 0 for r in recent)
+
+    values = {
+        "last_execution_id": last.id,
+        "last_score": last.score,
+        "last_started_at": last.started_at,
+        "previous_score": previous.score if previous else None,
+        "trend": round((last.score or 0) - (previous.score or 0), 1) if previous else None,
+        "execution_count": execution_count,
+        "pass_rate": calculate_score(window_passed, window_total),
+        "updated_at": _utcnow(),
+    }
+    stmt = dialects.insert_for(db, ProjectSummary).values(project_id=project_id, **values)
+    stmt = stmt.on_conflict_do_update(index_elements=[ProjectSummary.project_id], set_=values)
+    await db.execute(stmt)
+
+
+async def rebuild_project_summaries(db: AsyncSession) -> int:
+    """Recalcula ``project_summary`` de todos os projetos (backfill). Retorna quantos."""
+    project_ids = (await db.execute(select(Project.id))).scalars().all()
+    for project_id in project_ids:
+        await refresh_project_summary(db, project_id, recount=True)
+    return len(project_ids)
+
+
+# ── Aquecimento ────────────────────────────────────────────────────────
+
+async def warm_up(db: AsyncSession) -> int:
+    """Executa uma vez as leituras das rotas GET, sem linhas de resultado.
+
+    Chamado no startup (``app/core/lifespan.py``) antes de aceitar trafego:
+    compila os SELECTs no cache de statements do engine e, no asyncpg,
+    prepara-os na conexao usada. Ids inexistentes; retorna quantas leituras
+    foram feitas.
+    """
+    missing = uuid.UUID(int=0)
+    reads = [
+        (get_projects_with_last_score, (), {}),
+        (get_project_row, (missing,), {}),
+        (project_exists, (missing,), {}),
+        (get_executions, (), {"limit": 21}),
+        (get_executions, (), {"project_id": missing, "limit": 21}),
+        (get_execution_row, (missing,), {}),
+        (get_execution_state, (missing,), {}),
+        (get_test_results, (missing,), {}),
+        (get_score_history, (missing,), {"limit": 31}),
+        (get_score_rollups, (missing,), {"bucket": "day"}),
+        (get_test_stats, (missing,), {}),
+        (search_results, ("warmup",), {}),
+    ]
+    for read, args, kwargs in reads:
+        await read(db, *args, **kwargs)
+    await db.rollback()
+    return len(reads)
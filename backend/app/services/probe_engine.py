@@ -0,0 +1,334 @@
+"""Motor de probes HTTP usado pelos runners ``api`` e ``security``.
+
+Todas as requisicoes passam por um ``httpx.AsyncClient`` compartilhado no
+processo (pool com keep-alive; HTTP/2 opcional quando o pacote ``h2`` esta
+instalado). Cada alvo (scheme + host + porta) tem um limite de requisicoes
+simultaneas e uma taxa de politeness (token bucket) compartilhados entre os
+jobs do mesmo worker. Os casos de teste de um runner sao disparados em
+paralelo e a latencia de cada requisicao (envio ate o fim do corpo) vai para
+``duracao_ms``.
+
+Cada resultado leva um ``fingerprint`` (sha256 do alvo, da requisicao, da
+verificacao, dos headers relevantes de ``GET /`` e do ``config_hash`` do
+job). No modo incremental, casos cujo fingerprint esta no ``baseline``
+(aprovados na execucao anterior) sao copiados sem nova requisicao.
+
+Para testes e benchmarks, ``ProbeEngine`` aceita um ``client`` proprio —
+por exemplo com ``httpx.ASGITransport`` apontando para um app local.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Incrementar quando a semantica dos casos mudar (invalida fingerprints antigos)
+FINGERPRINT_VERSION = 1
+# Headers de ``GET /`` que identificam versao/configuracao do alvo
+SIGNATURE_HEADERS = (
+    "server",
+    "x-powered-by",
+    "x-app-version",
+    "strict-transport-security",
+    "content-security-policy",
+    "x-frame-options",
+    "x-content-type-options",
+    "access-control-allow-origin",
+)
+
+# check(respostas) -> None quando aprovado, ou o detalhe da falha
+CheckFn = Callable[[Sequence[httpx.Response]], str | None]
+ProgressFn = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True)
+class ProbeRequest:
+    """Requisicao HTTP de um caso de teste (``path`` relativo ao alvo)."""
+
+    method: str
+    path: str
+    json: dict | None = None
+    params: dict | None = None
+    headers: dict | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ProbeCase:
+    """Caso de teste: requisicao, verificacao e metadados do resultado.
+
+    ``repeat > 1`` dispara uma rajada da mesma requisicao (ex.: rate limiting);
+    a rajada respeita o limite de concorrencia do alvo mas nao a taxa de
+    politeness, e ``duracao_ms`` registra o tempo total da rajada.
+    """
+
+    nome: str
+    tipo: str
+    grupo: str
+    severidade: str
+    request: ProbeRequest
+    check: CheckFn
+    repeat: int = 1
+    check_latency: bool = True
+
+
+# ── Politeness por alvo ────────────────────────────────────────────────
+
+class RateLimiter:
+    """Token bucket: ``rate`` requisicoes/s, acumulando ate ``burst``."""
+
+    __slots__ = ("rate", "burst", "_tokens", "_updated", "_lock")
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(slots=True)
+class _TargetGate:
+    semaphore: asyncio.Semaphore
+    limiter: RateLimiter
+
+
+_gates: dict[tuple[str, int, float], _TargetGate] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _gate_for(base_url: str, concurrency: int, rate: float) -> _TargetGate:
+    key = (_origin(base_url), concurrency, rate)
+    gate = _gates.get(key)
+    if gate is None:
+        gate = _gates[key] = _TargetGate(asyncio.Semaphore(concurrency), RateLimiter(rate))
+    return gate
+
+
+# ── Cliente compartilhado ──────────────────────────────────────────────
+
+_clients: dict[bool, httpx.AsyncClient] = {}
+
+
+def get_client(http2: bool = False) -> httpx.AsyncClient:
+    """Cliente pooled do processo (um para HTTP/1.1 e outro para HTTP/2)."""
+    if http2 and not HTTP2_AVAILABLE:
+        logger.warning("HTTP/2 pedido mas o pacote 'h2' nao esta instalado; usando HTTP/1.1")
+        http2 = False
+    client = _clients.get(http2)
+    if client is None or client.is_closed:
+        client = _clients[http2] = httpx.AsyncClient(
+            http2=http2,
+            timeout=settings.probe_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.probe_max_connections,
+                max_keepalive_connections=settings.probe_max_connections,
+                keepalive_expiry=30.0,
+            ),
+            follow_redirects=False,
+        )
+    return client
+
+
+async def aclose_clients() -> None:
+    """Fecha os clientes compartilhados (encerramento do worker)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    _gates.clear()
+    for client in clients:
+        await client.aclose()
+
+
+# ── Engine ─────────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
+class _Timed:
+    responses: list[httpx.Response] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    error: Exception | None = None
+
+
+class ProbeEngine:
+    """Executa casos de teste contra ``base_url`` e devolve resultados
+    no formato de ``TestResultIn``."""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        concurrency: int | None = None,
+        rate: float | None = None,
+        http2: bool | None = None,
+        latency_threshold_ms: float | None = None,
+        config_hash: str | None = None,
+        baseline: Mapping[str, dict] | None = None,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.config_hash = config_hash
+        self.baseline = baseline or {}
+        self.latency_threshold_ms = (
+            settings.probe_latency_threshold_ms if latency_threshold_ms is None else latency_threshold_ms
+        )
+        self._client = client or get_client(settings.probe_http2 if http2 is None else http2)
+        self._gate = _gate_for(
+            self.base_url,
+            concurrency or settings.probe_concurrency,
+            settings.probe_rate if rate is None else rate,
+        )
+
+    async def run(self, cases: Sequence[ProbeCase], progress: ProgressFn | None = None) -> list[dict]:
+        """Dispara todos os casos em paralelo; a ordem do retorno segue ``cases``.
+
+        Casos com fingerprint no ``baseline`` sao copiados (``reused=True``).
+        """
+        if progress:
+            await progress(0, len(cases))
+        signature = await self.target_signature()
+
+        async def one(case: ProbeCase) -> dict:
+            fingerprint = self.fingerprint(case, signature)
+            previous = self.baseline.get(fingerprint)
+            if previous is not None:
+                result = {**previous, "fingerprint": fingerprint, "reused": True}
+            else:
+                result = await self.probe(case)
+                result["fingerprint"] = fingerprint
+            if progress:
+                await progress(1, 0)
+            return result
+
+        return list(await asyncio.gather(*(one(c) for c in cases)))
+
+    async def target_signature(self) -> str:
+        """Hash dos headers de ``GET /`` que identificam versao/config do alvo."""
+        timed = await self._send(ProbeRequest("GET", "/"))
+        if not timed.responses:
+            return ""
+        headers = timed.responses[0].headers
+        raw = "\n".join(f"{h}:{headers.get(h, '')}" for h in SIGNATURE_HEADERS)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def fingerprint(self, case: ProbeCase, signature: str) -> str:
+        """sha256 de tudo que pode mudar o resultado do caso."""
+        req = case.request
+        payload = json.dumps(
+            [
+                FINGERPRINT_VERSION,
+                self.base_url,
+                case.tipo,
+                case.nome,
+                req.method,
+                req.path,
+                req.json,
+                req.params,
+                req.headers,
+                case.repeat,
+                self.latency_threshold_ms if case.check_latency else None,
+                signature,
+                self.config_hash,
+            ],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def probe(self, case: ProbeCase) -> dict:
+        """Executa um caso e avalia o resultado."""
+        if case.repeat > 1:
+            timed = await self._burst(case.request, case.repeat)
+        else:
+            timed = await self._send(case.request)
+
+        if timed.error is not None and not timed.responses:
+            return self._result(
+                case, "error", timed.elapsed_ms, f"{type(timed.error).__name__}: {timed.error}",
+            )
+        try:
+            detail = case.check(timed.responses)
+        except Exception as exc:  # verificacao com bug nao derruba o runner
+            return self._result(case, "error", timed.elapsed_ms, f"{type(exc).__name__}: {exc}")
+        if detail is None and case.check_latency and timed.elapsed_ms > self.latency_threshold_ms:
+            detail = (
+                f"Response time {timed.elapsed_ms:.0f}ms exceeded threshold "
+                f"{self.latency_threshold_ms:.0f}ms"
+            )
+        return self._result(case, "pass" if detail is None else "fail", timed.elapsed_ms, detail or "")
+
+    async def _request(self, req: ProbeRequest) -> tuple[httpx.Response, float]:
+        async with self._gate.semaphore:
+            t0 = time.perf_counter()
+            response = await self._client.request(
+                req.method,
+                self.base_url + req.path,
+                json=req.json,
+                params=req.params,
+                headers=req.headers,
+            )
+            return response, (time.perf_counter() - t0) * 1000
+
+    async def _send(self, req: ProbeRequest) -> _Timed:
+        await self._gate.limiter.acquire()
+        t0 = time.perf_counter()
+        try:
+            response, elapsed = await self._request(req)
+        except httpx.HTTPError as exc:
+            return _Timed(elapsed_ms=(time.perf_counter() - t0) * 1000, error=exc)
+        return _Timed([response], elapsed)
+
+    async def _burst(self, req: ProbeRequest, n: int) -> _Timed:
+        t0 = time.perf_counter()
+        outcomes = await asyncio.gather(*(self._request(req) for _ in range(n)), return_exceptions=True)
+        timed = _Timed(elapsed_ms=(time.perf_counter() - t0) * 1000)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, httpx.HTTPError):
+                    raise outcome
+                timed.error = outcome
+            else:
+                timed.responses.append(outcome[0])
+        return timed
+
+    @staticmethod
+    def _result(case: ProbeCase, status: str, elapsed_ms: float, detalhes: str) -> dict:
+        return {
+            "nome": case.nome,
+            "tipo": case.tipo,
+            "status": status,
+            "duracao_ms": round(elapsed_ms, 1),
+            "detalhes": detalhes,
+            "severidade": case.severidade,
+            "grupo": case.grupo,
+        }
@@ -0,0 +1,177 @@
+"""Redacao de segredos em ``detalhes`` antes da gravacao.
+
+Falhas de auditoria de seguranca costumam trazer trechos de requisicoes e
+respostas: JWTs, headers ``Authorization``/``Cookie``, chaves de nuvem. Todas
+as regras ficam numa unica regex pre-compilada (alternancia com grupos
+nomeados), aplicada em lote. Como o ``re`` testa a alternancia em cada
+posicao, ``redact_batch`` primeiro filtra o lote com operacoes de ``bytes``
+em C (busca dos gatilhos literais de cada regra e de sequencias longas de
+caracteres de token); so os textos marcados passam pela regex, unidos por
+``\\x00`` numa unica chamada de ``re.sub``. O filtro e um superconjunto das
+regras: um texto descartado nunca teria casado.
+
+Cada segredo vira ``[REDACTED:<regra>]``; o marcador nao casa com nenhuma
+regra, entao ``redact(redact(x)) == redact(x)``. Regras com prefixo (``Bearer``,
+``password=``, ``Cookie:``) preservam o prefixo e trocam so o valor. Strings
+longas sem prefixo conhecido so sao redigidas quando tem letras e digitos e
+entropia de Shannon acima de ``settings.redaction_min_entropy``; ``/`` nao
+faz parte desses tokens, entao caminhos (``/api/v1/users/123``) sao avaliados
+segmento a segmento.
+
+Para medir: ``python -m benchmarks.bench_redaction``.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Mapping, Sequence
+
+from app.core.config import settings
+
+MARKER = "[REDACTED:{}]"
+_SEPARATOR = "\x00"
+
+# (nome, regex). O grupo ``<nome>_keep`` (opcional) e o prefixo preservado.
+# Nenhuma classe de caracteres aceita ``\x00``, para nao atravessar o separador.
+RULES: tuple[tuple[str, str], ...] = (
+    (
+        "private_key",
+        r"-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----[^\x00]*?-----END (?:[A-Z]+ )?PRIVATE KEY-----",
+    ),
+    ("jwt", r"\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]*"),
+    (
+        "bearer",
+        # exige um digito no token (evita "Bearer authentication required")
+        r"(?P<bearer_keep>\b(?i:bearer|basic)\s+)(?=[A-Za-z._~+/-]*[0-9])[A-Za-z0-9._~+/-]{8,}=*",
+    ),
+    ("aws_key", r"\b(?:AKIA|ASIA|AGPA|AIDA|AROA|ANPA|ANVA|AIPA)[A-Z0-9]{16}\b"),
+    (
+        "aws_secret",
+        r"(?P<aws_secret_keep>(?i:aws_?secret_?access_?key)[\"']?\s*[=:]\s*[\"']?)[A-Za-z0-9/+=]{40}",
+    ),
+    ("gcp_key", r"\bAIza[0-9A-Za-z_-]{35}"),
+    (
+        "cookie",
+        r"(?P<cookie_keep>\b(?i:set-cookie|cookie)\s*:\s*)(?!\s*\[REDACTED)[^\r\n\x00]+",
+    ),
+    (
+        "secret",
+        r"(?P<secret_keep>\b(?i:password|passwd|pwd|secret|client_secret|api[_-]?key"
+        r"|access[_-]?token|refresh[_-]?token|session(?:id)?)[\"']?\s*[=:]\s*[\"']?)"
+        r"(?![\s\"']*\[REDACTED)[^\s\"'&,;\x00]{4,}",
+    ),
+    # sem ``/``: um caminho de URL nao vira um unico token longo
+    ("high_entropy", rf"(?<![A-Za-z0-9+_=-])[A-Za-z0-9+_=-]{{{settings.redaction_min_token_length},}}"),
+)
+
+_PATTERN = re.compile("|".join(f"(?P<{name}>{regex})" for name, regex in RULES))
+
+# Filtro do lote: todo casamento de ``RULES`` contem um destes literais (em
+# minusculas) ou uma sequencia de ``redaction_min_token_length`` caracteres
+# de token. Manter em sincronia ao adicionar regras.
+_TRIGGERS = tuple(
+    t.encode()
+    for t in (
+        "eyj", "bearer", "basic", "akia", "asia", "agpa", "aida", "aroa", "anpa",
+        "anva", "aipa", "aiza", "cookie", "pass", "pwd", "secret", "key", "token", "session",
+    )
+)
+_TOKEN_CHARS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+_=-"
+_TOKEN_TABLE = bytes(0x61 if i in _TOKEN_CHARS else 0x20 for i in range(256))
+_TOKEN_RUN = b"a" * settings.redaction_min_token_length
+_HEX = frozenset("0123456789abcdefABCDEF")
+_UUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+
+def shannon_entropy(token: str) -> float:
+    """Entropia de Shannon (bits por caractere) de ``token``."""
+    n = len(token)
+    return -sum(c / n * math.log2(c / n) for c in Counter(token).values())
+
+
+def _is_secret_like(token: str) -> bool:
+    if _UUID.fullmatch(token):
+        return False
+    if not (any(ch.isdigit() for ch in token) and any(ch.isalpha() for ch in token)):
+        return False
+    threshold = settings.redaction_min_entropy
+    if _HEX.issuperset(token):
+        threshold = min(threshold, 3.0)  # alfabeto de 16 simbolos: teto de 4 bits
+    return shannon_entropy(token) >= threshold
+
+
+def _replace(match: re.Match) -> str:
+    rule = match.lastgroup
+    if rule == "high_entropy" and not _is_secret_like(match.group()):
+        return match.group()
+    keep = match.group(f"{rule}_keep") if f"{rule}_keep" in _PATTERN.groupindex else None
+    return (keep or "") + MARKER.format(rule)
+
+
+def redact(text: str) -> str:
+    """Redige os segredos de um texto (idempotente)."""
+    if not text:
+        return text
+    return _PATTERN.sub(_replace, text)
+
+
+def _flag(haystack: bytes, needle: bytes, starts: list[int], flagged: set[int]) -> None:
+    """Marca (indices de ``starts``) os textos de ``haystack`` que contem ``needle``."""
+    pos = haystack.find(needle)
+    while pos != -1:
+        k = bisect_right(starts, pos) - 1
+        flagged.add(k)
+        if k + 1 >= len(starts):
+            return
+        pos = haystack.find(needle, starts[k + 1])
+
+
+def redact_batch(texts: Sequence[str]) -> list[str]:
+    """Redige um lote; mesma saida de ``redact`` item a item."""
+    out = list(texts)
+    idx = [i for i, t in enumerate(texts) if t]
+    if not idx:
+        return out
+
+    joined = _SEPARATOR.join(texts[i] for i in idx)
+    # ascii/replace: um byte por caractere, entao os offsets batem com ``joined``
+    raw = joined.encode("ascii", "replace")
+    starts = [0]
+    for i in idx[:-1]:
+        starts.append(starts[-1] + len(texts[i]) + 1)
+    flagged: set[int] = set()
+    _flag(raw.translate(_TOKEN_TABLE), _TOKEN_RUN, starts, flagged)
+    lowered = raw.lower()
+    for trigger in _TRIGGERS:
+        _flag(lowered, trigger, starts, flagged)
+    if not flagged:
+        return out
+
+    hits = [idx[k] for k in sorted(flagged)]
+    parts = _PATTERN.sub(_replace, _SEPARATOR.join(texts[i] for i in hits)).split(_SEPARATOR)
+    if len(parts) != len(hits):  # algum texto ja continha o separador
+        parts = [redact(texts[i]) for i in hits]
+    for i, part in zip(hits, parts):
+        out[i] = part
+    return out
+
+
+def redact_results(results: Sequence[Mapping]) -> Sequence[Mapping]:
+    """Aplica ``redact_batch`` a ``detalhes`` de um lote de resultados.
+
+    Devolve o proprio lote quando nada muda (ou com a redacao desativada);
+    so os resultados alterados sao copiados.
+    """
+    if not settings.redaction_enabled or not results:
+        return results
+    before = [r.get("detalhes") or "" for r in results]
+    after = redact_batch(before)
+    if after == before:
+        return results
+    return [
+        r if old == new else {**r, "detalhes": new}
+        for r, old, new in zip(results, before, after)
+    ]
@@ -0,0 +1,207 @@
+"""Fila de auditorias na tabela ``runs``.
+
+Estados: ``queued`` → ``running`` → ``done`` | ``failed``. Workers (varios por
+processo, varios processos/nos) disputam jobs com ``SELECT ... FOR UPDATE SKIP
+LOCKED`` (no SQLite, que nao trava linhas, o claim e um compare-and-set), entao
+cada job e entregue a um unico worker por vez. O worker mantem um lease
+renovado por heartbeat; se o processo morre, o lease vence e o job volta a ser
+elegivel (nova tentativa) ate ``max_attempts``.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.db_models import Run
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue(
+    db: AsyncSession,
+    project_name: str,
+    types: list[str],
+    environment: str,
+    options: dict | None = None,
+) -> Run:
+    """Cria um job ``queued``. Nao faz commit."""
+    run = Run(
+        id=uuid.uuid4(),
+        project_name=project_name,
+        types=types,
+        environment=environment,
+        options=options or {},
+        status=QUEUED,
+        attempts=0,
+        max_attempts=settings.run_max_attempts,
+        progress_total=0,
+        progress_done=0,
+        reused=0,
+        created_at=_utcnow(),
+    )
+    db.add(run)
+    await db.flush()
+    return run
+
+
+async def get_run(db: AsyncSession, run_id: uuid.UUID) -> Run | None:
+    """Busca job por ID."""
+    result = await db.execute(select(Run).where(Run.id == run_id))
+    return result.scalar_one_or_none()
+
+
+async def claim(db: AsyncSession, worker_id: str, lease_seconds: int | None = None) -> Run | None:
+    """Reserva o job elegivel mais antigo para ``worker_id`` e faz commit.
+
+    Elegiveis: ``queued`` ou ``running`` com lease vencido (worker morto),
+    desde que ainda haja tentativas. Linhas travadas por outro worker sao
+    puladas (SKIP LOCKED), sem espera.
+    """
+    now = _utcnow()
+    lease = timedelta(seconds=lease_seconds or settings.run_lease_seconds)
+    stmt = (
+        select(Run)
+        .where(
+            or_(
+                Run.status == QUEUED,
+                (Run.status == RUNNING) & (Run.lease_expires_at < now),
+            ),
+            Run.attempts < Run.max_attempts,
+        )
+        .order_by(Run.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    run = (await db.execute(stmt)).scalar_one_or_none()
+    if run is None:
+        await db.rollback()
+        return None
+
+    # Compare-and-set em ``attempts``: no SQLite (sem SKIP LOCKED) dois
+    # workers podem ler o mesmo job, mas so um UPDATE encontra a linha.
+    claimed = await db.execute(
+        update(Run)
+        .where(Run.id == run.id, Run.attempts == run.attempts)
+        .values(
+            status=RUNNING,
+            attempts=run.attempts + 1,
+            worker_id=worker_id,
+            lease_expires_at=now + lease,
+            heartbeat_at=now,
+            started_at=run.started_at or now,
+            error=None,
+        )
+    )
+    if claimed.rowcount == 0:
+        await db.rollback()
+        return None
+    await db.commit()
+    return run
+
+
+async def heartbeat(
+    db: AsyncSession,
+    run_id: uuid.UUID,
+    worker_id: str,
+    progress_done: int | None = None,
+    progress_total: int | None = None,
+    lease_seconds: int | None = None,
+) -> bool:
+    """Renova o lease e grava o progresso. False se o job nao pertence mais ao worker."""
+    now = _utcnow()
+    values: dict = {
+        "heartbeat_at": now,
+        "lease_expires_at": now + timedelta(seconds=lease_seconds or settings.run_lease_seconds),
+    }
+    if progress_done is not None:
+        values["progress_done"] = progress_done
+    if progress_total is not None:
+        values["progress_total"] = progress_total
+    result = await db.execute(
+        update(Run)
+        .where(Run.id == run_id, Run.worker_id == worker_id, Run.status == RUNNING)
+        .values(**values)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def complete(
+    db: AsyncSession,
+    run_id: uuid.UUID,
+    worker_id: str,
+    execution_id: uuid.UUID | None,
+    reused: int = 0,
+) -> bool:
+    """Marca o job como ``done``. Nao faz commit (vai junto com a ingestao)."""
+    result = await db.execute(
+        update(Run)
+        .where(Run.id == run_id, Run.worker_id == worker_id, Run.status == RUNNING)
+        .values(
+            status=DONE,
+            execution_id=execution_id,
+            finished_at=_utcnow(),
+            lease_expires_at=None,
+            progress_done=Run.progress_total,
+            reused=reused,
+        )
+    )
+    return result.rowcount > 0
+
+
+async def fail(
+    db: AsyncSession,
+    run_id: uuid.UUID,
+    worker_id: str,
+    error: str,
+    retry: bool = True,
+) -> None:
+    """Registra falha: volta para ``queued`` se ainda ha tentativas, senao ``failed``."""
+    run = (
+        await db.execute(
+            select(Run).where(Run.id == run_id, Run.worker_id == worker_id).with_for_update()
+        )
+    ).scalar_one_or_none()
+    if run is None or run.status != RUNNING:
+        await db.rollback()
+        return
+    run.error = error[:2000]
+    run.lease_expires_at = None
+    if retry and run.attempts < run.max_attempts:
+        run.status = QUEUED
+        run.worker_id = None
+    else:
+        run.status = FAILED
+        run.finished_at = _utcnow()
+    await db.commit()
+
+
+async def fail_exhausted(db: AsyncSession) -> int:
+    """Marca como ``failed`` os jobs com lease vencido e sem tentativas restantes."""
+    result = await db.execute(
+        update(Run)
+        .where(
+            Run.status == RUNNING,
+            Run.lease_expires_at < _utcnow(),
+            Run.attempts >= Run.max_attempts,
+        )
+        .values(
+            status=FAILED,
+            finished_at=_utcnow(),
+            error="Lease expirado: worker interrompido em todas as tentativas",
+        )
+    )
+    await db.commit()
+    return result.rowcount
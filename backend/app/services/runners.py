@@ -0,0 +1,173 @@
+"""Runners ``api`` e ``security`` — casos de teste HTTP sobre o ``ProbeEngine``.
+
+Os casos espelham o catalogo do ``seed_demo`` (CRUD da API, headers, CORS,
+rate limiting, payloads de SQLi/XSS). O alvo vem de ``options["target_url"]``
+do job; ``concurrency``, ``rate`` e ``http2`` sobrescrevem os defaults do
+``.env``; ``incremental``/``config_hash`` controlam o reaproveitamento
+de resultados (ver ``ProbeEngine.run``).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import httpx
+
+from app.core.config import settings
+from app.services.compliance_service import (
+    AuditJob,
+    ProgressFn,
+    RunnerUnavailableError,
+    register_runner,
+)
+from app.services.probe_engine import CheckFn, ProbeCase, ProbeEngine, ProbeRequest
+
+EVIL_ORIGIN = "https://evil.example"
+SQLI_PAYLOAD = "' OR 1=1 --"
+XSS_PAYLOAD = "<script>alert('cc-xss')</script>"
+
+
+# ── Verificacoes ──────────────────────────────────────────────────────
+
+def _describe(response: httpx.Response) -> str:
+    return f"{response.status_code} — {response.reason_phrase}"
+
+
+def expect_status(*codes: int) -> CheckFn:
+    """Aprova quando a resposta tem um dos ``codes``."""
+
+    def check(responses: Sequence[httpx.Response]) -> str | None:
+        r = responses[-1]
+        if r.status_code in codes:
+            return None
+        return f"Expected status {codes[0]}, got {_describe(r)}"
+
+    return check
+
+
+def require_header(name: str) -> CheckFn:
+    """Aprova quando o header de seguranca esta presente."""
+
+    def check(responses: Sequence[httpx.Response]) -> str | None:
+        if responses[-1].headers.get(name):
+            return None
+        return f"Header '{name}' not found in response"
+
+    return check
+
+
+def _sqli_check(responses: Sequence[httpx.Response]) -> str | None:
+    r = responses[-1]
+    if r.is_success or r.is_server_error:
+        return f"Endpoint vulneravel a SQL injection — payload: {SQLI_PAYLOAD} ({_describe(r)})"
+    return None
+
+
+def _xss_check(responses: Sequence[httpx.Response]) -> str | None:
+    if XSS_PAYLOAD in responses[-1].text:
+        return "Payload XSS refletido sem escape na resposta"
+    return None
+
+
+def _csrf_check(responses: Sequence[httpx.Response]) -> str | None:
+    r = responses[-1]
+    if r.is_success:
+        return f"Requisicao cross-origin sem token aceita ({_describe(r)})"
+    return None
+
+
+def _cors_check(responses: Sequence[httpx.Response]) -> str | None:
+    allowed = responses[-1].headers.get("access-control-allow-origin")
+    if allowed == "*":
+        return "CORS misconfiguration — wildcard origin accepted"
+    if allowed == EVIL_ORIGIN:
+        return f"CORS misconfiguration — origin {EVIL_ORIGIN} refletida"
+    return None
+
+
+def _rate_limit_check(responses: Sequence[httpx.Response]) -> str | None:
+    if any(r.status_code == 429 for r in responses):
+        return None
+    return f"Rate limit not enforced — {len(responses)} requests without block"
+
+
+# ── Catalogo ──────────────────────────────────────────────────────────
+
+_USER = {"name": "Compliance Probe", "email": "probe@example.com", "password": "Probe#2026"}
+_ARTICLE = {"title": "Compliance probe", "body": "Conteudo de teste"}
+
+API_CASES: list[ProbeCase] = [
+    ProbeCase("GET /api/users — lista usuarios", "api", "usuarios", "medium",
+              ProbeRequest("GET", "/api/users"), expect_status(200)),
+    ProbeCase("POST /api/users — criar usuario", "api", "usuarios", "high",
+              ProbeRequest("POST", "/api/users", json=_USER), expect_status(201, 200)),
+    ProbeCase("GET /api/users/:id — buscar por ID", "api", "usuarios", "medium",
+              ProbeRequest("GET", "/api/users/1"), expect_status(200)),
+    ProbeCase("PUT /api/users/:id — atualizar usuario", "api", "usuarios", "medium",
+              ProbeRequest("PUT", "/api/users/1", json=_USER), expect_status(200, 204)),
+    ProbeCase("DELETE /api/users/:id — remover usuario", "api", "usuarios", "high",
+              ProbeRequest("DELETE", "/api/users/1"), expect_status(200, 204)),
+    ProbeCase("POST /api/auth/login — autenticacao", "api", "autenticacao", "critical",
+              ProbeRequest("POST", "/api/auth/login", json={"email": _USER["email"], "password": _USER["password"]}),
+              expect_status(200)),
+    ProbeCase("POST /api/auth/register — registro", "api", "autenticacao", "critical",
+              ProbeRequest("POST", "/api/auth/register", json=_USER), expect_status(201, 200)),
+    ProbeCase("GET /api/articles — listar artigos", "api", "artigos", "low",
+              ProbeRequest("GET", "/api/articles"), expect_status(200)),
+    ProbeCase("POST /api/articles — criar artigo", "api", "artigos", "medium",
+              ProbeRequest("POST", "/api/articles", json=_ARTICLE), expect_status(201, 200)),
+    ProbeCase("GET /api/health — healthcheck", "api", "infraestrutura", "low",
+              ProbeRequest("GET", "/api/health"), expect_status(200)),
+]
+
+SECURITY_CASES: list[ProbeCase] = [
+    ProbeCase("SQL Injection — login endpoint", "security", "injection", "critical",
+              ProbeRequest("POST", "/api/auth/login", json={"email": SQLI_PAYLOAD, "password": SQLI_PAYLOAD}),
+              _sqli_check),
+    ProbeCase("XSS — campo de busca", "security", "injection", "critical",
+              ProbeRequest("GET", "/api/articles", params={"search": XSS_PAYLOAD}), _xss_check),
+    ProbeCase("CSRF — formulario de edicao", "security", "csrf", "high",
+              ProbeRequest("PUT", "/api/users/1", json=_USER, headers={"Origin": EVIL_ORIGIN}), _csrf_check),
+    ProbeCase("Security Headers — X-Frame-Options", "security", "headers", "medium",
+              ProbeRequest("GET", "/"), require_header("X-Frame-Options")),
+    ProbeCase("Security Headers — Content-Security-Policy", "security", "headers", "medium",
+              ProbeRequest("GET", "/"), require_header("Content-Security-Policy")),
+    ProbeCase("Security Headers — X-Content-Type-Options", "security", "headers", "low",
+              ProbeRequest("GET", "/"), require_header("X-Content-Type-Options")),
+    ProbeCase("CORS — origens permitidas", "security", "cors", "high",
+              ProbeRequest("GET", "/api/health", headers={"Origin": EVIL_ORIGIN}), _cors_check),
+    ProbeCase("Rate Limiting — brute force login", "security", "rate-limit", "high",
+              ProbeRequest("POST", "/api/auth/login", json={"email": _USER["email"], "password": "errada"}),
+              _rate_limit_check, repeat=settings.probe_rate_limit_burst, check_latency=False),
+]
+
+
+# ── Runners ───────────────────────────────────────────────────────────
+
+def engine_for(job: AuditJob) -> ProbeEngine:
+    """Monta o engine a partir das opcoes do job."""
+    target = job.options.get("target_url")
+    if not target:
+        raise RunnerUnavailableError("target_url nao informado para o runner HTTP")
+    return ProbeEngine(
+        target,
+        concurrency=job.options.get("concurrency"),
+        rate=job.options.get("rate"),
+        http2=job.options.get("http2"),
+        config_hash=job.options.get("config_hash"),
+        baseline=job.baseline,
+    )
+
+
+async def run_api(job: AuditJob, progress: ProgressFn) -> list[dict]:
+    return await engine_for(job).run(API_CASES, progress)
+
+
+async def run_security(job: AuditJob, progress: ProgressFn) -> list[dict]:
+    return await engine_for(job).run(SECURITY_CASES, progress)
+
+
+def register_builtin_runners() -> None:
+    """Registra ``api`` e ``security`` (startup da API e do worker)."""
+    register_runner("api")(run_api)
+    register_runner("security")(run_security)
@@ -0,0 +1,149 @@
+"""Benchmark de ingestao — caminho ORM (db.add por linha) vs ingestao em lote.
+
+Uso (a partir de ``backend/``, com DB_URL configurada):
+
+    python -m benchmarks.bench_ingest --results 50000
+
+Cada caminho grava uma execucao com N resultados num projeto descartavel,
+que e removido ao final.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import delete, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.db_models import (
+    SEVERITY_CODES,
+    STATUS_CODES,
+    Execution,
+    Project,
+    ProjectSummary,
+    ScoreHistory,
+    ScoreRollup,
+    TestCatalog,
+    TestResultRow,
+)
+from app.services import history_service
+
+BENCH_PROJECT = "__bench_ingest__"
+STATUSES = ["pass"] * 8 + ["fail", "error"]
+
+
+def _make_results(n: int) -> list[dict]:
+    rng = random.Random(42)
+    return [
+        {
+            "nome": f"GET /api/bench/{i} — caso {i}",
+            "tipo": "api" if i % 3 else "security",
+            "status": rng.choice(STATUSES),
+            "duracao_ms": round(rng.uniform(10, 900), 1),
+            "detalhes": "",
+            "severidade": "medium",
+            "grupo": f"grupo-{i % 20}",
+        }
+        for i in range(n)
+    ]
+
+
+async def _ingest_orm(db: AsyncSession, results: list[dict]) -> None:
+    """Caminho antigo: um objeto ORM por linha, como no seed_demo."""
+    project = await history_service.get_or_create_project(db, BENCH_PROJECT)
+    exec_id = uuid.uuid4()
+    passed = sum(1 for r in results if r["status"] == "pass")
+    db.add(
+        Execution(
+            id=exec_id,
+            project_id=project.id,
+            ambiente="bench",
+            total=len(results),
+            passed=passed,
+            failed=len(results) - passed,
+        )
+    )
+    catalog: dict[tuple, TestCatalog] = {}
+    for r in results:
+        key = (r["tipo"], r["grupo"], r["nome"])
+        if key not in catalog:
+            catalog[key] = TestCatalog(project_id=project.id, tipo=key[0], grupo=key[1], nome=key[2])
+            db.add(catalog[key])
+    await db.flush()
+    for seq, r in enumerate(results):
+        db.add(
+            TestResultRow(
+                execution_id=exec_id,
+                seq=seq,
+                catalog_id=catalog[(r["tipo"], r["grupo"], r["nome"])].id,
+                status_code=STATUS_CODES[r["status"]],
+                severidade_code=SEVERITY_CODES[r["severidade"]],
+                duracao_ms=r["duracao_ms"],
+                detalhes=r["detalhes"] or None,
+            )
+        )
+    await db.commit()
+
+
+async def _ingest_bulk(db: AsyncSession, results: list[dict]) -> None:
+    await history_service.ingest_execution(db, BENCH_PROJECT, "bench", results)
+    await db.commit()
+
+
+async def _row_bytes(db: AsyncSession) -> float:
+    """Tamanho medio de uma linha de ``test_results`` do projeto de benchmark."""
+    project = await history_service.get_or_create_project(db, BENCH_PROJECT)
+    exec_ids = select(Execution.id).where(Execution.project_id == project.id)
+    stmt = select(func.avg(func.pg_column_size(literal_column("test_results.*")))).where(
+        TestResultRow.execution_id.in_(exec_ids)
+    )
+    return float((await db.execute(stmt)).scalar() or 0.0)
+
+
+async def _cleanup(db: AsyncSession) -> None:
+    project = await history_service.get_or_create_project(db, BENCH_PROJECT)
+    exec_ids = select(Execution.id).where(Execution.project_id == project.id)
+    await db.execute(delete(ProjectSummary).where(ProjectSummary.project_id == project.id))
+    await db.execute(delete(ScoreRollup).where(ScoreRollup.project_id == project.id))
+    await db.execute(delete(ScoreHistory).where(ScoreHistory.project_id == project.id))
+    await db.execute(delete(TestResultRow).where(TestResultRow.execution_id.in_(exec_ids)))
+    await db.execute(delete(TestCatalog).where(TestCatalog.project_id == project.id))
+    await db.execute(delete(Execution).where(Execution.project_id == project.id))
+    await db.execute(delete(Project).where(Project.id == project.id))
+    await db.commit()
+
+
+async def main(n: int) -> None:
+    if not settings.db_url:
+        print("ERRO: DB_URL nao configurado no .env")
+        return
+
+    engine = create_async_engine(settings.db_url, echo=False)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    results = _make_results(n)
+
+    try:
+        for label, fn in [("orm", _ingest_orm), ("bulk", _ingest_bulk)]:
+            async with factory() as db:
+                t0 = time.perf_counter()
+                await fn(db, results)
+                elapsed = time.perf_counter() - t0
+            print(f"{label:>5}: {n} resultados em {elapsed:.3f}s ({n / elapsed:,.0f} linhas/s)")
+        async with factory() as db:
+            print(f"linha: {await _row_bytes(db):.0f} bytes em media (test_results)")
+    finally:
+        async with factory() as db:
+            await _cleanup(db)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.results))
@@ -0,0 +1,85 @@
+"""Benchmark do motor de probes — testes/s dos runners api + security.
+
+Uso (a partir de ``backend/``; nao precisa de DB_URL):
+
+    python -m benchmarks.bench_probe --rounds 200 --concurrency 32
+    python -m benchmarks.bench_probe --latency-ms 20 --insecure
+    python -m benchmarks.bench_probe --url http://localhost:9000 --http2
+    python -m benchmarks.bench_probe --incremental   # 2a rodada reaproveitando aprovados
+
+Sem ``--url`` o alvo e o app ASGI de ``benchmarks.probe_target`` em
+processo (sem rede); com ``--url`` usa o cliente pooled compartilhado
+contra um servidor real (ex.: ``uvicorn benchmarks.probe_target:app``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from app.services import probe_engine
+from app.services.probe_engine import ProbeEngine
+from app.services.runners import API_CASES, SECURITY_CASES
+from benchmarks.probe_target import create_target_app
+
+TARGET_URL = "http://target.local"
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = None
+    base_url = args.url or TARGET_URL
+    if not args.url:
+        target = create_target_app(secure=not args.insecure, latency_ms=args.latency_ms)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=target))
+
+    cases = (API_CASES + SECURITY_CASES) * args.rounds
+    engine = ProbeEngine(
+        base_url,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        http2=args.http2,
+        client=client,
+    )
+    try:
+        t0 = time.perf_counter()
+        results = await engine.run(cases)
+        elapsed = time.perf_counter() - t0
+        if args.incremental:
+            engine.baseline = {r["fingerprint"]: r for r in results if r["status"] == "pass"}
+            t1 = time.perf_counter()
+            rerun = await engine.run(cases)
+            incremental = time.perf_counter() - t1
+    finally:
+        if client is not None:
+            await client.aclose()
+        await probe_engine.aclose_clients()
+
+    latencies = sorted(r["duracao_ms"] for r in results)
+    statuses = Counter(r["status"] for r in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(f"alvo:       {base_url} ({'ASGI em processo' if client else 'rede'})")
+    print(f"testes:     {len(results)} ({dict(statuses)})")
+    print(f"tempo:      {elapsed:.2f}s")
+    print(f"throughput: {len(results) / elapsed:,.0f} testes/s")
+    print(f"latencia:   p50 {statistics.median(latencies):.1f}ms  p95 {p95:.1f}ms")
+    if args.incremental:
+        reused = sum(1 for r in rerun if r.get("reused"))
+        print(f"incremental: {incremental:.2f}s ({reused}/{len(rerun)} reaproveitados)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do motor de probes HTTP")
+    parser.add_argument("--rounds", type=int, default=100, help="repeticoes do catalogo completo")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=0.0, help="req/s por alvo (0 = sem limite)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="atraso artificial do alvo ASGI")
+    parser.add_argument("--insecure", action="store_true", help="alvo ASGI com as falhas expostas")
+    parser.add_argument("--url", help="alvo real em vez do app ASGI")
+    parser.add_argument("--http2", action="store_true")
+    parser.add_argument("--incremental", action="store_true", help="mede tambem uma 2a rodada incremental")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""Benchmark da serializacao das listagens — Pydantic vs ``RowEncoder``.
+
+Uso (a partir de ``backend/``; nao precisa de DB_URL):
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --tests 5000 --executions 100 --repeat 20
+
+Gera um SQLite temporario com ``generate_data`` (um projeto), le as linhas
+reais de ``history_service`` — resultados de uma execucao, pagina de
+execucoes, estatisticas por teste — e codifica cada lista pelos dois
+caminhos: o antigo (um modelo Pydantic por linha + ``cache.encode_json``) e o
+direto (``RowEncoder.dumps``). Confere que os corpos sao identicos byte a
+byte e reporta tempo por lista, linhas/s e o ganho.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import generate_data
+from app.core.cache import encode_json
+from app.core.database import create_engine
+from app.core.serialization import RowEncoder
+from app.schemas.responses import ExecutionResponse, TestResultResponse, TestStatsResponse
+from app.services import history_service
+
+
+def _measure(fn, repeat: int) -> float:
+    """Melhor tempo (s) de ``repeat`` chamadas."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+async def load_rows(db_url: str, executions: int) -> dict[str, tuple[type, list]]:
+    engine = create_engine(db_url)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        project = (await history_service.get_projects(db))[0]
+        page = await history_service.get_executions(db, project_id=project.id, limit=100)
+        results = await history_service.get_test_results(db, page[0].id)
+        stats = await history_service.get_test_stats(
+            db, project.id, executions=min(executions, 500), sort="nome", limit=1000,
+        )
+    await engine.dispose()
+    return {
+        "resultados": (TestResultResponse, results),
+        "execucoes": (ExecutionResponse, page),
+        "estatisticas": (TestStatsResponse, stats),
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_data.run(generate_data.parse_args([
+                "--projects", "1", "--executions", str(args.executions), "--tests", str(args.tests),
+                "--prefix", "bench-serial", "--db-url", db_url,
+            ]))
+        cases = asyncio.run(load_rows(db_url, args.executions))
+
+    print(f"{'lista':<14}{'linhas':>8}{'pydantic ms':>14}{'direto ms':>12}{'linhas/s':>14}{'ganho':>8}")
+    for name, (model, rows) in cases.items():
+        encoder = RowEncoder(model)
+
+        def pydantic_path():
+            return encode_json([model(**row._mapping) for row in rows])
+
+        old_body, new_body = pydantic_path(), encoder.dumps(rows)
+        assert old_body == new_body, f"{name}: corpo difere do caminho Pydantic"
+        old = _measure(pydantic_path, args.repeat)
+        new = _measure(lambda: encoder.dumps(rows), args.repeat)
+        print(
+            f"{name:<14}{len(rows):>8}{old * 1000:>14.2f}{new * 1000:>12.2f}"
+            f"{len(rows) / new:>14,.0f}{old / new:>7.1f}x"
+        )
+    print("corpos identicos: ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da serializacao das listagens")
+    parser.add_argument("--tests", type=int, default=2000, help="testes por execucao")
+    parser.add_argument("--executions", type=int, default=50, help="execucoes do projeto")
+    parser.add_argument("--repeat", type=int, default=10, help="repeticoes (vale a melhor)")
+    run(parser.parse_args())
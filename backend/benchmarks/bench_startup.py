@@ -0,0 +1,184 @@
+"""Partida a frio e primeiro request do servidor de producao (``serve.py``).
+
+Uso (a partir de ``backend/``; nao precisa de DB_URL):
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --workers 4 --rounds 5 --executions 200
+
+Gera um SQLite temporario com ``generate_data`` e, para cada modo
+(``DB_WARMUP=true`` e ``false``), sobe ``serve.py`` como processo real
+``--rounds`` vezes. Mede:
+
+- partida a frio: do spawn ate o primeiro ``200`` em ``/api/health``
+  (interpretador, imports, lifespan e aquecimento inclusos);
+- primeiros requests: latencia da primeira chamada a cada rota de leitura
+  logo apos a partida, comparada com a segunda (pool e SQL ja quentes);
+- drenagem: SIGTERM com requests em andamento — quantos terminam com ``200``
+  e quanto o servidor leva para sair.
+
+O cache de respostas fica desligado, para medir o caminho do banco.
+Reporta medianas por modo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import signal
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+import generate_data
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _spawn(db_url: str, port: int, workers: int, warmup: bool, log) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DB_URL": db_url,
+        "DB_WARMUP": str(warmup).lower(),
+        "CACHE_ENABLED": "false",
+        "EVENTS_ENABLED": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=log,
+    )
+
+
+def _wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"serve.py saiu com codigo {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError("serve.py nao ficou pronto")
+
+
+def _timed_get(client: httpx.Client, path: str) -> float:
+    t0 = time.perf_counter()
+    response = client.get(path)
+    elapsed = (time.perf_counter() - t0) * 1000
+    response.raise_for_status()
+    return elapsed
+
+
+def _routes(db_path: str) -> list[str]:
+    """Rotas de leitura a medir (ids lidos do banco gerado, sem passar pela API)."""
+    db = sqlite3.connect(db_path)
+    project_id = db.execute("SELECT id FROM projects ORDER BY nome LIMIT 1").fetchone()[0]
+    execution_id = db.execute(
+        "SELECT id FROM executions WHERE project_id = ? ORDER BY started_at DESC LIMIT 1", (project_id,),
+    ).fetchone()[0]
+    db.close()
+    return [
+        "/api/projects",
+        f"/api/projects/{project_id}/executions",
+        f"/api/projects/{project_id}/history",
+        f"/api/projects/{project_id}/tests/stats",
+        f"/api/executions/{execution_id}/results",
+        "/api/search?q=timeout",
+    ]
+
+
+async def _drain(base_url: str, path: str, proc: subprocess.Popen, inflight: int) -> tuple[int, float]:
+    """SIGTERM com ``inflight`` requests em andamento: (quantos 200, ms ate sair)."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        tasks = [asyncio.create_task(client.get(path)) for _ in range(inflight)]
+        await asyncio.sleep(0.005)
+        t0 = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        responses = await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.to_thread(proc.wait)
+    ok = sum(1 for r in responses if isinstance(r, httpx.Response) and r.status_code == 200)
+    return ok, (time.perf_counter() - t0) * 1000
+
+
+def measure(db_url: str, db_path: str, args: argparse.Namespace, warmup: bool) -> dict:
+    routes = _routes(db_path)
+    cold, first, second, drained, exit_ms = [], [], [], [], []
+    for _ in range(args.rounds):
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        with tempfile.TemporaryFile() as log:
+            t0 = time.perf_counter()
+            proc = _spawn(db_url, port, args.workers, warmup, log)
+            try:
+                _wait_ready(base_url, proc)
+                cold.append((time.perf_counter() - t0) * 1000)
+                with httpx.Client(base_url=base_url, timeout=30.0) as client:
+                    first.append(sum(_timed_get(client, path) for path in routes))
+                    second.append(sum(_timed_get(client, path) for path in routes))
+                ok, ms = asyncio.run(_drain(base_url, routes[-2], proc, args.inflight))
+                drained.append(ok)
+                exit_ms.append(ms)
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+    return {
+        "cold_ms": statistics.median(cold),
+        "first_ms": statistics.median(first),
+        "second_ms": statistics.median(second),
+        "drained": min(drained),
+        "exit_ms": statistics.median(exit_ms),
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "startup.db")
+        db_url = f"sqlite+aiosqlite:///{db_path}"
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_data.run(generate_data.parse_args([
+                "--projects", str(args.projects), "--executions", str(args.executions),
+                "--tests", str(args.tests), "--prefix", "bench-startup", "--db-url", db_url,
+            ]))
+
+        print(
+            f"{args.workers} processos, {args.rounds} rodadas; "
+            "passadas = soma das rotas de leitura; medianas"
+        )
+        print(f"{'aquecimento':<13}{'partida ms':>12}{'1a passada ms':>15}{'2a passada ms':>15}"
+              f"{'drenados':>10}{'saida ms':>10}")
+        for warmup in (True, False):
+            m = measure(db_url, db_path, args, warmup)
+            print(
+                f"{'sim' if warmup else 'nao':<13}{m['cold_ms']:>12.0f}{m['first_ms']:>15.1f}"
+                f"{m['second_ms']:>15.1f}{m['drained']:>6}/{args.inflight:<3}{m['exit_ms']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partida a frio e primeiro request do serve.py")
+    parser.add_argument("--workers", type=int, default=2, help="processos do serve.py")
+    parser.add_argument("--rounds", type=int, default=3, help="partidas por modo (vale a mediana)")
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--executions", type=int, default=50, help="execucoes por projeto")
+    parser.add_argument("--tests", type=int, default=300, help="testes por execucao")
+    parser.add_argument("--inflight", type=int, default=16, help="requests em andamento no SIGTERM")
+    run(parser.parse_args())
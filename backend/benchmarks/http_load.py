@@ -0,0 +1,368 @@
+"""Carga HTTP na API — latencia, vazao e queries por request, com orcamentos.
+
+Uso (a partir de ``backend/``):
+
+    python -m benchmarks.http_load                          # SQLite temporario
+    python -m benchmarks.http_load --executions 200 --tests 500 --concurrency 32
+    python -m benchmarks.http_load --db-url postgresql+asyncpg://.../bench
+    python -m benchmarks.http_load --update-budgets         # regrava os orcamentos
+
+Sobe o app em processo (``httpx.ASGITransport``, sem rede) contra um banco
+gerado localmente — por padrao um SQLite descartavel; com ``--db-url`` use um
+banco descartavel, pois o dataset e gravado nele. Cada cenario (todos os
+routers de ``app/api``) recebe ``--requests`` chamadas com ``--concurrency``
+clientes simultaneos; o relatorio traz p50/p95/p99, req/s e comandos SQL por
+request (contados por hook do SQLAlchemy, isolados por request via
+``ContextVar``). O cache de respostas fica desligado, salvo ``--cache``.
+Os cenarios de escrita (ingestao em lote, abertura, streaming NDJSON e
+finalizacao de execucoes) rodam por ultimo, num projeto proprio; cada
+finalizacao usa uma execucao aberta de antemao.
+
+Orcamentos em ``benchmarks/http_budgets.json``: ``queries`` (teto exato) e
+``p95_ms`` (com ``--tolerance``). Sai com codigo 1 se algum cenario estourar.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BUDGETS_PATH = Path(__file__).with_name("http_budgets.json")
+PROJECT_PREFIX = "bench-http"
+WRITE_PROJECT = f"{PROJECT_PREFIX}-write"
+WRITE_BATCH = 100  # resultados por request de escrita (bulk e streaming)
+STATUSES = ["pass"] * 8 + ["fail", "error", "skip"]
+FAIL_DETAILS = [
+    "Expected status 200, got 500 — Internal Server Error",
+    "Response time 3200ms exceeded threshold 2000ms",
+    "Header 'X-Frame-Options' not found in response",
+    "CORS misconfiguration — wildcard origin accepted",
+]
+
+_statements: ContextVar[list[int] | None] = ContextVar("bench_statements", default=None)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    body: dict | None = None
+    expect: int = 200
+    content: bytes | None = None
+    headers: dict | None = None
+    paths: Iterator[str] | None = None  # um alvo por request (ex.: finalizar execucoes distintas)
+
+    async def send(self, client):
+        path = next(self.paths) if self.paths is not None else self.path
+        return await client.request(
+            self.method, path, json=self.body, content=self.content, headers=self.headers,
+        )
+
+
+@dataclass
+class Measure:
+    latencies_ms: list[float] = field(default_factory=list)
+    statements: list[int] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+
+# ── Dataset ────────────────────────────────────────────────────────────
+
+def _make_results(rng: random.Random, tests: int) -> list[dict]:
+    results = []
+    for i in range(tests):
+        status = rng.choice(STATUSES)
+        results.append({
+            "nome": f"GET /api/recurso/{i} — caso {i}",
+            "tipo": "api" if i % 3 else "security",
+            "grupo": f"grupo-{i % 12}",
+            "status": status,
+            "duracao_ms": round(rng.uniform(5, 900), 1),
+            "detalhes": rng.choice(FAIL_DETAILS) if status in ("fail", "error") else "",
+            "severidade": rng.choice(["low", "medium", "high"]),
+        })
+    return results
+
+
+async def generate_dataset(factory, projects: int, executions: int, tests: int, seed: int = 42) -> dict:
+    """Grava ``projects`` x ``executions`` execucoes com ``tests`` resultados cada.
+
+    Retorna os ids usados pelos cenarios: projeto, duas execucoes dele, um
+    job da fila e uma execucao aberta (projeto de escrita) para o streaming.
+    """
+    from app.services import history_service, run_queue
+
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(hours=executions)
+    ids: dict = {}
+    for p in range(projects):
+        async with factory() as db:
+            for e in range(executions):
+                execution = await history_service.ingest_execution(
+                    db,
+                    f"{PROJECT_PREFIX}-{p}",
+                    "bench",
+                    _make_results(rng, tests),
+                    started_at=start + timedelta(hours=e, minutes=p),
+                )
+                if p == 0:
+                    ids.setdefault("execution_a", execution.id)
+                    ids["execution_b"] = execution.id
+                    ids["project_id"] = execution.project_id
+            await db.commit()
+    async with factory() as db:
+        run = await run_queue.enqueue(db, f"{PROJECT_PREFIX}-0", ["api"], "bench")
+        ids["run_id"] = run.id
+        ids["open_execution"] = (await history_service.open_execution(db, WRITE_PROJECT, "bench")).id
+        await db.commit()
+    return ids
+
+
+async def open_executions(factory, count: int) -> list:
+    """Abre ``count`` execucoes no projeto de escrita (alvos da finalizacao)."""
+    from app.services import history_service
+
+    async with factory() as db:
+        ids = [(await history_service.open_execution(db, WRITE_PROJECT, "bench")).id for _ in range(count)]
+        await db.commit()
+    return ids
+
+
+def build_scenarios(ids: dict) -> list[Scenario]:
+    p, a, b = ids["project_id"], ids["execution_a"], ids["execution_b"]
+    run_body = {
+        "project_name": f"{PROJECT_PREFIX}-0",
+        "types": ["api"],
+        "target_url": "http://127.0.0.1:9",
+    }
+    results = _make_results(random.Random(7), WRITE_BATCH)
+    bulk_body = {"project_name": WRITE_PROJECT, "ambiente": "bench", "results": results}
+    ndjson = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results).encode()
+    finalize_paths = (f"/api/executions/{e}/finalize" for e in ids.get("finalize_executions", []))
+    return [
+        Scenario("health", "GET", "/api/health"),
+        Scenario("health.cache", "GET", "/api/health/cache"),
+        Scenario("health.events", "GET", "/api/health/events"),
+        Scenario("projects.list", "GET", "/api/projects"),
+        Scenario("projects.detail", "GET", f"/api/projects/{p}"),
+        Scenario("projects.executions", "GET", f"/api/projects/{p}/executions?limit=20"),
+        Scenario("projects.history", "GET", f"/api/projects/{p}/history?limit=100"),
+        Scenario("projects.history.bucket", "GET", f"/api/projects/{p}/history?bucket=day"),
+        Scenario("projects.tests.stats", "GET", f"/api/projects/{p}/tests/stats?executions=20"),
+        Scenario("executions.list", "GET", "/api/executions?limit=20"),
+        Scenario("executions.detail", "GET", f"/api/executions/{b}"),
+        Scenario("executions.results", "GET", f"/api/executions/{b}/results?limit=200"),
+        Scenario("executions.results.ndjson", "GET", f"/api/executions/{b}/results?format=ndjson"),
+        Scenario("executions.diff", "GET", f"/api/executions/{a}/diff/{b}"),
+        Scenario("search.fts", "GET", "/api/search?q=header+found&limit=50"),
+        Scenario("search.substring", "GET", "/api/search?q=wildcard&mode=substring&sort=recent"),
+        Scenario("runs.create", "POST", "/api/runs", body=run_body, expect=202),
+        Scenario("runs.detail", "GET", f"/api/runs/{ids['run_id']}"),
+        Scenario("executions.bulk", "POST", "/api/executions/bulk", body=bulk_body, expect=201),
+        Scenario(
+            "executions.open", "POST", "/api/executions",
+            body={"project_name": WRITE_PROJECT, "ambiente": "bench"}, expect=201,
+        ),
+        Scenario(
+            "executions.stream", "POST", f"/api/executions/{ids['open_execution']}/results:stream",
+            content=ndjson, headers={"content-type": "application/x-ndjson"},
+        ),
+        Scenario(
+            "executions.finalize", "POST", "/api/executions/{id}/finalize", paths=finalize_paths,
+        ),
+    ]
+
+
+# ── Carga ──────────────────────────────────────────────────────────────
+
+def _count_statements(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+async def _drive(client, scenario: Scenario, requests: int, concurrency: int) -> Measure:
+    measure = Measure()
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            counter = [0]
+            token = _statements.set(counter)
+            t0 = time.perf_counter()
+            try:
+                response = await scenario.send(client)
+                await response.aread()
+                ok = response.status_code == scenario.expect
+            except Exception:
+                ok = False
+            finally:
+                _statements.reset(token)
+            measure.latencies_ms.append((time.perf_counter() - t0) * 1000)
+            measure.statements.append(counter[0])
+            if not ok:
+                measure.errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    measure.elapsed = time.perf_counter() - t0
+    return measure
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (pos - lo) * (ordered[hi] - ordered[lo])
+
+
+def summarize(measure: Measure) -> dict:
+    return {
+        "requests": len(measure.latencies_ms),
+        "errors": measure.errors,
+        "rps": len(measure.latencies_ms) / measure.elapsed if measure.elapsed else 0.0,
+        "p50_ms": _percentile(measure.latencies_ms, 50),
+        "p95_ms": _percentile(measure.latencies_ms, 95),
+        "p99_ms": _percentile(measure.latencies_ms, 99),
+        "queries": max(measure.statements, default=0),
+    }
+
+
+def check_budget(name: str, stats: dict, budget: dict | None, tolerance: float) -> list[str]:
+    """Violacoes do orcamento de um cenario (lista vazia se dentro)."""
+    problems = []
+    if stats["errors"]:
+        problems.append(f"{name}: {stats['errors']} respostas com status inesperado")
+    if budget is None:
+        return problems
+    if "queries" in budget and stats["queries"] > budget["queries"]:
+        problems.append(f"{name}: {stats['queries']} queries/request (orcamento {budget['queries']})")
+    limit = budget.get("p95_ms")
+    if limit is not None and stats["p95_ms"] > limit * (1 + tolerance):
+        problems.append(
+            f"{name}: p95 {stats['p95_ms']:.1f}ms (orcamento {limit:.1f}ms +{tolerance:.0%})"
+        )
+    return problems
+
+
+# ── Main ───────────────────────────────────────────────────────────────
+
+async def run(args: argparse.Namespace) -> int:
+    import httpx
+    from sqlalchemy import event
+
+    from app.core import database
+    from app.core.cache import response_cache
+
+    import main as app_main
+
+    response_cache.enabled = args.cache
+    database.connect()
+    engine = database.engine
+    await database.init_schema(engine)
+
+    t0 = time.perf_counter()
+    ids = await generate_dataset(
+        database.async_session_factory, args.projects, args.executions, args.tests,
+    )
+    ids["finalize_executions"] = await open_executions(
+        database.async_session_factory, args.warmup + args.requests,
+    )
+    print(
+        f"dataset: {args.projects} projetos x {args.executions} execucoes x {args.tests} testes "
+        f"({engine.dialect.name}, {time.perf_counter() - t0:.1f}s)"
+    )
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_statements)
+    scenarios = build_scenarios(ids)
+    if args.only:
+        scenarios = [s for s in scenarios if any(s.name.startswith(o) for o in args.only)]
+
+    budgets = json.loads(BUDGETS_PATH.read_text()) if BUDGETS_PATH.exists() else {}
+    transport = httpx.ASGITransport(app=app_main.app)
+    results: dict[str, dict] = {}
+    problems: list[str] = []
+    print(
+        f"\n{'cenario':<28}{'req':>6}{'err':>5}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'sql':>5}"
+    )
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in scenarios:
+            for _ in range(args.warmup):
+                await scenario.send(client)
+            stats = summarize(await _drive(client, scenario, args.requests, args.concurrency))
+            results[scenario.name] = stats
+            print(
+                f"{scenario.name:<28}{stats['requests']:>6}{stats['errors']:>5}{stats['rps']:>9.0f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['queries']:>5}"
+            )
+            problems += check_budget(scenario.name, stats, budgets.get(scenario.name), args.tolerance)
+    await database.dispose()
+
+    if args.update_budgets:
+        # Folga de 50% na latencia (maquinas diferentes); queries sao exatas
+        budgets.update({
+            name: {"p95_ms": round(max(stats["p95_ms"] * 1.5, 1.0), 1), "queries": stats["queries"]}
+            for name, stats in results.items()
+        })
+        BUDGETS_PATH.write_text(json.dumps(budgets, indent=2, sort_keys=True) + "\n")
+        print(f"\norcamentos gravados em {BUDGETS_PATH}")
+        return 0
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+    if problems:
+        print("\nORCAMENTO ESTOURADO:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\nok: todos os cenarios dentro do orcamento")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Carga HTTP na API com orcamentos de latencia e queries")
+    parser.add_argument("--db-url", default=None, help="banco descartavel (padrao: SQLite temporario)")
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--executions", type=int, default=30, help="execucoes por projeto")
+    parser.add_argument("--tests", type=int, default=200, help="resultados por execucao")
+    parser.add_argument("--requests", type=int, default=200, help="requests por cenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="requests descartados por cenario")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="folga sobre o p95 orcado")
+    parser.add_argument("--only", nargs="*", help="prefixos de cenarios a rodar")
+    parser.add_argument("--cache", action="store_true", help="mantem o cache de respostas ligado")
+    parser.add_argument("--json", help="grava as medidas neste arquivo")
+    parser.add_argument("--update-budgets", action="store_true")
+    args = parser.parse_args()
+
+    # DB_URL precisa estar no ambiente antes de importar app.core (settings)
+    tmpdir = None
+    if args.db_url is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="cc-http-load-")
+        args.db_url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DB_URL"] = args.db_url
+    try:
+        code = asyncio.run(run(args))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
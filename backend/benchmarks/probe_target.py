@@ -0,0 +1,127 @@
+"""App ASGI local que simula o alvo de uma auditoria (runners api/security).
+
+Implementa as rotas do catalogo de ``app.services.runners``. Com
+``secure=True`` responde como uma API bem configurada (headers de seguranca,
+CORS restrito, bloqueio de brute force, payloads rejeitados); com
+``secure=False`` expoe as falhas que os runners devem detectar.
+
+Uso direto com o engine:
+
+    app = create_target_app(secure=False)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    await ProbeEngine("http://target.local", client=client).run(API_CASES)
+
+Ou como servidor real (para medir com rede):
+
+    uvicorn benchmarks.probe_target:app --port 9000
+"""
+
+from __future__ import annotations
+
+import asyncio
+import html
+import time
+from collections import deque
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse
+
+SECURITY_HEADERS = {
+    "X-Frame-Options": "DENY",
+    "Content-Security-Policy": "default-src 'self'",
+    "X-Content-Type-Options": "nosniff",
+}
+
+
+def create_target_app(
+    secure: bool = True,
+    latency_ms: float = 0.0,
+    login_limit: int = 10,
+    login_window_s: float = 1.0,
+) -> FastAPI:
+    """Cria o alvo; ``latency_ms`` adiciona atraso artificial por requisicao."""
+    app = FastAPI(title="probe-target", docs_url=None, redoc_url=None, openapi_url=None)
+    failed_logins: deque[float] = deque()
+    trusted_origin = "http://target.local"
+
+    @app.middleware("http")
+    async def _middleware(request: Request, call_next):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        origin = request.headers.get("origin")
+        if secure and origin and origin != trusted_origin and request.method not in ("GET", "HEAD"):
+            return JSONResponse({"detail": "CSRF"}, status_code=403)
+        response = await call_next(request)
+        if secure:
+            response.headers.update(SECURITY_HEADERS)
+            if origin == trusted_origin:
+                response.headers["Access-Control-Allow-Origin"] = origin
+        elif origin:
+            response.headers["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    @app.get("/")
+    async def index():
+        return HTMLResponse("<h1>probe target</h1>")
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/api/users")
+    async def list_users():
+        return [{"id": 1, "name": "Ana"}, {"id": 2, "name": "Bruno"}]
+
+    @app.post("/api/users", status_code=201)
+    async def create_user(body: dict):
+        return {"id": 3, **body}
+
+    @app.get("/api/users/{user_id}")
+    async def get_user(user_id: int):
+        return {"id": user_id, "name": "Ana"}
+
+    @app.put("/api/users/{user_id}")
+    async def update_user(user_id: int, body: dict):
+        return {"id": user_id, **body}
+
+    @app.delete("/api/users/{user_id}", status_code=204)
+    async def delete_user(user_id: int):
+        return Response(status_code=204)
+
+    @app.post("/api/auth/register", status_code=201)
+    async def register(body: dict):
+        return {"id": 4, "email": body.get("email")}
+
+    @app.post("/api/auth/login")
+    async def login(body: dict):
+        now = time.monotonic()
+        while failed_logins and now - failed_logins[0] > login_window_s:
+            failed_logins.popleft()
+        if secure and len(failed_logins) >= login_limit:
+            return JSONResponse({"detail": "Too many attempts"}, status_code=429)
+
+        email = str(body.get("email", ""))
+        if "'" in email:
+            if secure:
+                return JSONResponse({"detail": "Invalid email"}, status_code=422)
+            return {"token": "leaked"}  # simula bypass por SQL injection
+        if body.get("password") != "Probe#2026":
+            failed_logins.append(now)
+            return JSONResponse({"detail": "Invalid credentials"}, status_code=401)
+        return {"token": "ok"}
+
+    @app.get("/api/articles")
+    async def list_articles(search: str = ""):
+        if search:
+            shown = html.escape(search) if secure else search
+            return HTMLResponse(f"<p>Resultados para {shown}</p>")
+        return [{"id": 1, "title": "Hello"}]
+
+    @app.post("/api/articles", status_code=201)
+    async def create_article(body: dict):
+        return {"id": 2, **body}
+
+    return app
+
+
+app = create_target_app()
@@ -0,0 +1,367 @@
+"""Gerador parametrico de dados sinteticos — testes de capacidade.
+
+Uso (a partir de ``backend/``):
+
+    python generate_data.py --projects 1000 --executions 10000 --tests 500 --workers 8
+    python generate_data.py --projects 20 --seed 7              # acrescenta aos dados atuais
+    python generate_data.py --reset --projects 3 --executions 6 # apaga tudo antes
+
+Gera ``projetos x execucoes x testes por execucao`` a partir dos modelos de
+``seed_demo`` (``API_TESTS``, ``SECURITY_TESTS``, ``FAIL_DETAILS``). O
+catalogo de cada projeto repete os modelos ate ``--tests`` (variantes
+``#2``, ``#3``...), cada teste com propensao a falha e latencia proprias; a
+qualidade do projeto segue um passeio aleatorio com tendencia de melhora e
+regressoes ocasionais, e a severidade pesa na chance de falha.
+
+Tudo sai de ``random.Random`` semeado por ``--seed`` e pelo nome do
+projeto: a mesma linha de comando sobre o mesmo banco gera os mesmos dados.
+Sem ``--reset`` os dados existentes ficam; projetos que ja existem recebem
+execucoes novas (semente deslocada pelo numero de execucoes que ja tinham).
+
+A gravacao usa ``history_service._copy_rows`` (``COPY`` em asyncpg) em lotes
+de ``--batch-rows`` resultados, com os projetos repartidos entre
+``--workers`` processos, cada um com sua engine. Em SQLite (um escritor por
+vez) roda em um processo so. No fim, ``project_summary`` e ``score_rollups``
+sao recalculados.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import create_engine, init_schema
+from app.models.db_models import (
+    SEVERITY_CODES,
+    STATUS_CODES,
+    Execution,
+    Project,
+    ProjectSummary,
+    Run,
+    ScoreHistory,
+    ScoreRollup,
+    TestCatalog,
+    TestResultRow,
+)
+from app.services import archive_service, history_service
+from app.services.compliance_service import calculate_score
+from seed_demo import API_TESTS, FAIL_DETAILS, PROJECTS, SECURITY_TESTS
+
+TEMPLATES = API_TESTS + SECURITY_TESTS
+STACKS = ("node-express", "python-fastapi", "react-django", "java-spring", "go-gin", "php-laravel")
+AMBIENTES = ("local", "staging", "production")
+AMBIENTE_WEIGHTS = (2, 5, 3)
+
+# Criticos costumam ser corrigidos primeiro; baixos ficam abertos por mais tempo
+SEVERITY_WEIGHT = {"critical": 0.6, "high": 0.8, "medium": 1.0, "low": 1.3}
+
+# Ordem de exclusao do --reset (dependentes primeiro)
+RESET_TABLES = (Run, ProjectSummary, ScoreRollup, ScoreHistory, TestResultRow, TestCatalog, Execution, Project)
+
+_EXECUTION_COLUMNS = (
+    "id", "project_id", "ambiente", "started_at", "finished_at", "score",
+    "total", "passed", "failed", "errors", "skipped", "duracao_ms",
+)
+_SCORE_COLUMNS = (
+    "id", "execution_id", "project_id", "runner_type", "score", "total", "passed", "recorded_at",
+)
+
+
+def _is_sqlite(db_url: str) -> bool:
+    return make_url(db_url).get_backend_name() == "sqlite"
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def project_spec(index: int, prefix: str | None) -> dict:
+    """Nome/descricao/stack do projeto ``index``.
+
+    Sem ``prefix`` os primeiros sao os projetos demo de ``seed_demo``.
+    """
+    if prefix is None and index < len(PROJECTS):
+        return dict(PROJECTS[index])
+    demo = PROJECTS[index % len(PROJECTS)]
+    return {
+        "nome": f"{prefix or 'projeto'}-{index:05d}",
+        "descricao": demo["descricao"],
+        "stack": STACKS[index % len(STACKS)],
+    }
+
+
+def build_catalog(rng: random.Random, tests: int) -> list[tuple]:
+    """``tests`` testes ``(nome, tipo, grupo, severidade, propensao, latencia)``.
+
+    Propensao a falha vem de uma beta (a maioria estavel, cauda de testes
+    problematicos); auditorias de seguranca falham mais. ~5% sao flaky.
+    """
+    catalog = []
+    for k in range(tests):
+        nome, tipo, grupo, severidade = TEMPLATES[k % len(TEMPLATES)]
+        variant = k // len(TEMPLATES)
+        if variant:
+            nome = f"{nome} #{variant + 1}"
+        if tipo == "security":
+            propensity = rng.betavariate(0.8, 6)
+            latency = rng.lognormvariate(math.log(120), 0.5)
+        else:
+            propensity = rng.betavariate(0.6, 10)
+            latency = rng.lognormvariate(math.log(200), 0.6)
+        if rng.random() < 0.05:
+            propensity = rng.uniform(0.25, 0.5)
+        catalog.append((nome, tipo, grupo, severidade, propensity * SEVERITY_WEIGHT[severidade], latency))
+    return catalog
+
+
+class Drift:
+    """Qualidade do projeto ao longo das execucoes (multiplica a chance de falha)."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.quality = rng.uniform(0.6, 1.8)
+
+    def step(self) -> float:
+        rng = self.rng
+        self.quality *= rng.uniform(0.97, 1.0) * math.exp(rng.gauss(0, 0.05))
+        if rng.random() < 0.01:  # regressao (deploy ruim)
+            self.quality *= rng.uniform(1.5, 3.0)
+        self.quality = min(3.0, max(0.05, self.quality))
+        return self.quality
+
+
+def generate_execution(
+    rng: random.Random,
+    project_id: uuid.UUID,
+    catalog: list[tuple],
+    catalog_ids: list[int],
+    quality: float,
+    started_at: datetime,
+) -> tuple[tuple, list[tuple], list[tuple]]:
+    """Linhas de ``executions``, ``test_results`` e ``score_history`` de uma execucao."""
+    execution_id = _uuid(rng)
+    random_ = rng.random
+    fail, error, skip, ok = (STATUS_CODES[s] for s in ("fail", "error", "skip", "pass"))
+    counts: dict[str, list[int]] = {}  # tipo -> [total, pass, fail, error, skip]
+    results = []
+    elapsed = 0.0
+    for seq, (nome, tipo, grupo, severidade, propensity, latency) in enumerate(catalog):
+        c = counts.get(tipo)
+        if c is None:
+            c = counts[tipo] = [0, 0, 0, 0, 0]
+        c[0] += 1
+        r = random_()
+        p_fail = min(0.95, propensity * quality)
+        detalhes = None
+        if r < p_fail:
+            if r < p_fail * 0.1:
+                status, c[3] = error, c[3] + 1
+            else:
+                status, c[2] = fail, c[2] + 1
+            detalhes = FAIL_DETAILS[int(random_() * len(FAIL_DETAILS))]
+        elif r > 0.99:
+            status, c[4] = skip, c[4] + 1
+        else:
+            status, c[1] = ok, c[1] + 1
+        duracao = 0.0 if status == skip else round(latency * rng.lognormvariate(0, 0.25), 1)
+        elapsed += duracao
+        results.append((
+            execution_id, seq, started_at, catalog_ids[seq], status,
+            SEVERITY_CODES[severidade], duracao, detalhes, None,
+        ))
+
+    finished_at = started_at + timedelta(milliseconds=elapsed)
+    total = sum(c[0] for c in counts.values())
+    passed = sum(c[1] for c in counts.values())
+    execution = (
+        execution_id, project_id, rng.choices(AMBIENTES, AMBIENTE_WEIGHTS)[0], started_at,
+        finished_at, calculate_score(passed, total), total, passed,
+        sum(c[2] for c in counts.values()), sum(c[3] for c in counts.values()),
+        sum(c[4] for c in counts.values()), round(elapsed, 1),
+    )
+    scores = [
+        (_uuid(rng), execution_id, project_id, tipo, calculate_score(c[1], c[0]), c[0], c[1], finished_at)
+        for tipo, c in counts.items()
+    ]
+    return execution, results, scores
+
+
+async def generate_project(db: AsyncSession, args: argparse.Namespace, index: int) -> tuple[int, int]:
+    """Gera as execucoes de um projeto, com commit por lote. Retorna (execucoes, resultados)."""
+    spec = project_spec(index, args.prefix)
+    project = await history_service.get_or_create_project(db, **spec)
+    offset = (
+        await db.execute(select(func.count()).select_from(Execution).where(Execution.project_id == project.id))
+    ).scalar_one()
+
+    catalog = build_catalog(random.Random(f"{args.seed}:{spec['nome']}:catalog"), args.tests)
+    ids = await history_service._resolve_catalog(db, project.id, ((t, g, n) for n, t, g, *_ in catalog))
+    catalog_ids = [ids[(t, g, n)] for n, t, g, *_ in catalog]
+    await db.commit()
+
+    rng = random.Random(f"{args.seed}:{spec['nome']}:{offset}")
+    drift = Drift(rng)
+    step = timedelta(days=args.days) / args.executions
+    window_start = args.until - timedelta(days=args.days)
+    per_batch = max(1, args.batch_rows // max(1, args.tests))
+    results_total = 0
+
+    for first in range(0, args.executions, per_batch):
+        executions, results, scores = [], [], []
+        for j in range(first, min(first + per_batch, args.executions)):
+            started_at = window_start + step * (j + rng.random() * 0.8)
+            e, r, s = generate_execution(rng, project.id, catalog, catalog_ids, drift.step(), started_at)
+            executions.append(e)
+            results.extend(r)
+            scores.extend(s)
+        await history_service._copy_rows(db, Execution.__table__, _EXECUTION_COLUMNS, executions)
+        await history_service._copy_rows(db, TestResultRow.__table__, history_service._RESULT_COPY_COLUMNS, results)
+        await history_service._copy_rows(db, ScoreHistory.__table__, _SCORE_COLUMNS, scores)
+        await db.commit()
+        results_total += len(results)
+
+    await history_service.refresh_project_summary(db, project.id, recount=True)
+    await db.commit()
+    return args.executions, results_total
+
+
+async def _generate(args: argparse.Namespace, indices: list[int]) -> tuple[int, int]:
+    engine = create_engine(args.db_url, echo=False)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    executions = results = 0
+    try:
+        for index in indices:
+            t0 = time.perf_counter()
+            async with factory() as db:
+                e, r = await generate_project(db, args, index)
+            executions += e
+            results += r
+            print(
+                f"  [{project_spec(index, args.prefix)['nome']}] {e} execucoes, "
+                f"{r} resultados ({time.perf_counter() - t0:.1f}s)",
+                flush=True,
+            )
+    finally:
+        await engine.dispose()
+    return executions, results
+
+
+def _worker(args: argparse.Namespace, indices: list[int]) -> tuple[int, int]:
+    return asyncio.run(_generate(args, indices))
+
+
+async def reset(factory: async_sessionmaker) -> None:
+    """Apaga todos os dados (na ordem das FKs)."""
+    async with factory() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            names = ", ".join(model.__tablename__ for model in RESET_TABLES)
+            await db.execute(text(f"TRUNCATE {names}"))
+        else:
+            for model in RESET_TABLES:
+                await db.execute(model.__table__.delete())
+        await db.commit()
+
+
+async def prepare(args: argparse.Namespace) -> None:
+    engine = create_engine(args.db_url, echo=False)
+    await init_schema(engine)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    if args.reset:
+        print("Limpando dados existentes...")
+        await reset(factory)
+    async with factory() as db:
+        await archive_service.ensure_partitions(db)
+        # meses da janela gerada (``finished_at`` pode passar de ``until``)
+        await archive_service.ensure_partitions_between(
+            db,
+            (args.until - timedelta(days=args.days)).date(),
+            (args.until + timedelta(days=1)).date(),
+        )
+        await db.commit()
+    await engine.dispose()
+
+
+async def finish(args: argparse.Namespace) -> None:
+    engine = create_engine(args.db_url, echo=False)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        await history_service.rebuild_score_rollups(db)
+        await db.commit()
+    await engine.dispose()
+
+
+def run(args: argparse.Namespace) -> None:
+    """Executa a geracao descrita por ``args`` (ver ``parse_args``)."""
+    if not args.db_url:
+        sys.exit("ERRO: DB_URL nao configurado no .env")
+    if _is_sqlite(args.db_url) and args.workers > 1:
+        print("SQLite aceita um escritor por vez: usando --workers 1")
+        args.workers = 1
+    workers = max(1, min(args.workers, args.projects))
+
+    asyncio.run(prepare(args))
+    print(
+        f"Gerando {args.projects} projetos x {args.executions} execucoes x "
+        f"{args.tests} testes (seed={args.seed}, workers={workers})..."
+    )
+    t0 = time.perf_counter()
+    slices = [list(range(w, args.projects, workers)) for w in range(workers)]
+    if workers == 1:
+        totals = [_worker(args, slices[0])]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            totals = list(pool.map(_worker, [args] * workers, slices))
+    elapsed = time.perf_counter() - t0
+
+    print("Recalculando score_rollups...")
+    asyncio.run(finish(args))
+    executions = sum(e for e, _ in totals)
+    results = sum(r for _, r in totals)
+    print(
+        f"\nConcluido: {args.projects} projetos, {executions} execucoes, {results} resultados "
+        f"em {elapsed:.1f}s ({results / max(elapsed, 1e-9):,.0f} resultados/s)"
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gerador de dados sinteticos")
+    parser.add_argument("--projects", type=int, default=len(PROJECTS), help="projetos")
+    parser.add_argument("--executions", type=int, default=6, help="execucoes por projeto")
+    parser.add_argument("--tests", type=int, default=len(TEMPLATES), help="testes por execucao")
+    parser.add_argument("--seed", type=int, default=42, help="semente (mesma semente, mesmos dados)")
+    parser.add_argument("--workers", type=int, default=1, help="processos gravando em paralelo")
+    parser.add_argument("--batch-rows", type=int, default=50_000, help="resultados por lote (commit)")
+    parser.add_argument("--days", type=float, default=30, help="janela de tempo das execucoes (dias)")
+    parser.add_argument(
+        "--until", type=datetime.fromisoformat, default=None,
+        help="fim da janela, ISO 8601 (padrao: agora); fixe para reproduzir os timestamps",
+    )
+    parser.add_argument("--prefix", default=None, help="prefixo dos nomes (padrao: projetos demo + projeto-N)")
+    parser.add_argument("--reset", action="store_true", help="apaga todos os dados antes de gerar")
+    parser.add_argument("--db-url", default=settings.db_url, help="banco de destino (padrao: DB_URL)")
+    args = parser.parse_args(argv)
+    if min(args.projects, args.executions, args.tests) < 1:
+        parser.error("--projects, --executions e --tests devem ser >= 1")
+    if args.until is None:
+        args.until = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    elif args.until.tzinfo is None:
+        args.until = args.until.replace(tzinfo=timezone.utc)
+    return args
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -1,36 +1,61 @@
-"""Coder Compliance API — FastAPI backend."""
+"""Coder Compliance API — FastAPI backend.
+
+``create_app`` monta o app; engines, aquecimento e bridge de eventos vivem no
+lifespan (``app/core/lifespan.py``). Desenvolvimento: ``python main.py``
+(reload). Producao, com varios processos: ``python serve.py``.
+"""
 
 from __future__ import annotations
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import executions, health, projects, runs
+from app.api import executions, health, metrics, projects, runs, search
+from app.core.metrics import MetricsMiddleware
 from app.core.config import settings
+from app.core.lifespan import StartupTimingMiddleware, lifespan
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.replicas import ReadYourWritesMiddleware
+from app.services.runners import register_builtin_runners
+
+
+def create_app() -> FastAPI:
+    register_builtin_runners()
+    app = FastAPI(
+        title="Coder Compliance API",
+        description="API do motor automatizado de auditoria e integridade de codigo — UEMA",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+    )
+    app.add_middleware(MetricsMiddleware)
+    if settings.replica_urls:
+        app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(StartupTimingMiddleware)
+
+    app.include_router(health.router, prefix="/api", tags=["health"])
+    app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
+    app.include_router(executions.router, prefix="/api/executions", tags=["executions"])
+    app.include_router(runs.router, prefix="/api/runs", tags=["runs"])
+    app.include_router(search.router, prefix="/api/search", tags=["search"])
+    app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
+
+    @app.get("/")
+    async def root():
+        return {"message": "Coder Compliance API", "version": "0.1.0"}
+
+    return app
+
 
-app = FastAPI(
-    title="Coder Compliance API",
-    description="API do motor automatizado de auditoria e integridade de codigo — UEMA",
-    version="0.1.0",
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(health.router, prefix="/api", tags=["health"])
-app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
-app.include_router(executions.router, prefix="/api/executions", tags=["executions"])
-app.include_router(runs.router, prefix="/api/runs", tags=["runs"])
-
-
-@app.get("/")
-async def root():
-    return {"message": "Coder Compliance API", "version": "0.1.0"}
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""Comandos de manutencao do banco.
+
+Uso (a partir de ``backend/``):
+
+    python manage.py backfill-summary
+    python manage.py backfill-rollups
+    python manage.py partitions [--months-ahead N]
+    python manage.py archive [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import create_engine, init_schema
+from app.services import archive_service, history_service
+
+
+async def backfill_summary(db: AsyncSession, args: argparse.Namespace) -> None:
+    """Reconstroi ``project_summary`` a partir de ``executions``."""
+    count = await history_service.rebuild_project_summaries(db)
+    await db.commit()
+    print(f"project_summary reconstruido para {count} projetos")
+
+
+async def backfill_rollups(db: AsyncSession, args: argparse.Namespace) -> None:
+    """Reconstroi ``score_rollups`` a partir de ``score_history``."""
+    await history_service.rebuild_score_rollups(db)
+    await db.commit()
+    print("score_rollups reconstruido")
+
+
+async def partitions(db: AsyncSession, args: argparse.Namespace) -> None:
+    """Cria as particoes mensais futuras de test_results e score_history."""
+    names = await archive_service.ensure_partitions(db, args.months_ahead)
+    await db.commit()
+    print(f"{len(names)} particoes garantidas: {', '.join(names)}")
+
+
+async def archive(db: AsyncSession, args: argparse.Namespace) -> None:
+    """Arquiva execucoes alem da retencao e descarta particoes vazias."""
+    stats = await archive_service.archive_expired(db, dry_run=args.dry_run)
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(
+        f"{prefix}{stats['executions']} execucoes em {stats['groups']} grupos "
+        f"({stats['results']} resultados, {stats['scores']} scores arquivados)"
+    )
+    for name in stats.get("dropped_partitions", []):
+        print(f"  - particao removida: {name}")
+
+
+COMMANDS = {
+    "backfill-summary": backfill_summary,
+    "backfill-rollups": backfill_rollups,
+    "partitions": partitions,
+    "archive": archive,
+}
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not settings.db_url:
+        print("ERRO: DB_URL nao configurado no .env")
+        return
+
+    engine = create_engine(settings.db_url, echo=False)
+    await init_schema(engine)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as db:
+            await COMMANDS[args.command](db, args)
+    finally:
+        await engine.dispose()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Manutencao do Coder Compliance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill-summary", help="reconstroi a tabela project_summary")
+    sub.add_parser("backfill-rollups", help="reconstroi a tabela score_rollups")
+    p = sub.add_parser("partitions", help="cria particoes mensais futuras")
+    p.add_argument("--months-ahead", type=int, default=None)
+    p = sub.add_parser("archive", help="arquiva execucoes alem da retencao")
+    p.add_argument("--dry-run", action="store_true")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
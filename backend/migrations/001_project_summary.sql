@@ -0,0 +1,74 @@
+-- Coder Compliance — Migracao 001: resumo por projeto (project_summary)
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql.
+--
+-- O resumo e preenchido a partir das execucoes finalizadas, como
+-- refresh_project_summary: ultimas 10 execucoes (SUMMARY_WINDOW padrao) para
+-- pass_rate e tendencia, contagem de todas. Com outro SUMMARY_WINDOW, rodar
+-- depois `python manage.py backfill-summary`.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS project_summary (
+    project_id        UUID PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    last_execution_id UUID REFERENCES executions(id) ON DELETE SET NULL,
+    last_score        FLOAT,
+    last_started_at   TIMESTAMPTZ,
+    previous_score    FLOAT,
+    trend             FLOAT,
+    execution_count   INTEGER NOT NULL DEFAULT 0,
+    pass_rate         FLOAT,
+    updated_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- ── Backfill ───────────────────────────────────────────────
+WITH ranked AS (
+    SELECT
+        project_id, id, score, started_at, total, passed,
+        row_number() OVER w AS rn,
+        count(*) OVER (PARTITION BY project_id) AS execution_count
+    FROM executions
+    WHERE finished_at IS NOT NULL
+    WINDOW w AS (PARTITION BY project_id ORDER BY started_at DESC, id DESC)
+),
+recent AS (
+    SELECT
+        project_id,
+        (array_agg(id ORDER BY rn))[1]         AS last_execution_id,
+        (array_agg(score ORDER BY rn))[1]      AS last_score,
+        (array_agg(started_at ORDER BY rn))[1] AS last_started_at,
+        (array_agg(score ORDER BY rn))[2]      AS previous_score,
+        count(*)                               AS window_size,
+        max(execution_count)                   AS execution_count,
+        sum(coalesce(total, 0))                AS window_total,
+        sum(coalesce(passed, 0))               AS window_passed
+    FROM ranked
+    WHERE rn <= 10
+    GROUP BY project_id
+)
+INSERT INTO project_summary (
+    project_id, last_execution_id, last_score, last_started_at,
+    previous_score, trend, execution_count, pass_rate, updated_at
+)
+SELECT
+    project_id,
+    last_execution_id,
+    last_score,
+    last_started_at,
+    previous_score,
+    CASE WHEN window_size > 1 THEN
+        round((coalesce(last_score, 0) - coalesce(previous_score, 0))::numeric, 1)::float
+    END,
+    execution_count,
+    CASE WHEN window_total > 0 THEN
+        round(window_passed * 100.0 / window_total, 1)::float
+    ELSE 0.0 END,
+    NOW()
+FROM recent
+ON CONFLICT (project_id) DO NOTHING;
+
+-- ── RLS ────────────────────────────────────────────────────
+ALTER TABLE project_summary ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "allow_all_project_summary" ON project_summary FOR ALL USING (true) WITH CHECK (true);
+
+COMMIT;
@@ -0,0 +1,56 @@
+-- Coder Compliance — Migracao 002: agregados de score (score_rollups)
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql.
+--
+-- A chave primaria e o alvo do ON CONFLICT da ingestao (_update_rollups).
+-- O historico existente e agregado aqui pelo mesmo INSERT ... SELECT de
+-- rebuild_score_rollups; para recalcular depois (ex.: apos restaurar
+-- score_history), rodar `python manage.py backfill-rollups`.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS score_rollups (
+    project_id       UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    runner_type      VARCHAR(50) NOT NULL,
+    bucket           VARCHAR(10) NOT NULL,
+    bucket_start     TIMESTAMPTZ NOT NULL,
+    samples          INTEGER NOT NULL DEFAULT 0,
+    score_sum        FLOAT NOT NULL DEFAULT 0.0,
+    score_min        FLOAT,
+    score_max        FLOAT,
+    last_score       FLOAT,
+    last_recorded_at TIMESTAMPTZ,
+    total_sum        INTEGER NOT NULL DEFAULT 0,
+    passed_sum       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, runner_type, bucket, bucket_start)
+);
+
+-- ── Backfill (hour/day/week) ───────────────────────────────
+INSERT INTO score_rollups (
+    project_id, runner_type, bucket, bucket_start, samples, score_sum,
+    score_min, score_max, last_score, last_recorded_at, total_sum, passed_sum
+)
+SELECT
+    project_id,
+    runner_type,
+    b.bucket,
+    date_trunc(b.bucket, recorded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    count(*),
+    sum(coalesce(score, 0)),
+    min(score),
+    max(score),
+    (array_agg(score ORDER BY recorded_at DESC))[1],
+    max(recorded_at),
+    sum(coalesce(total, 0)),
+    sum(coalesce(passed, 0))
+FROM score_history
+CROSS JOIN (VALUES ('hour'), ('day'), ('week')) AS b(bucket)
+WHERE recorded_at IS NOT NULL
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (project_id, runner_type, bucket, bucket_start) DO NOTHING;
+
+-- ── RLS ────────────────────────────────────────────────────
+ALTER TABLE score_rollups ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "allow_all_score_rollups" ON score_rollups FOR ALL USING (true) WITH CHECK (true);
+
+COMMIT;
@@ -0,0 +1,121 @@
+-- Coder Compliance — Migracao 003: particionamento mensal + retencao/arquivamento
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql. Roda numa unica transacao; test_results e
+-- score_history ficam bloqueadas durante a copia.
+
+BEGIN;
+
+-- ── Retencao e arquivamento ────────────────────────────────
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS retention_days INTEGER;
+ALTER TABLE executions ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ;
+ALTER TABLE executions ADD COLUMN IF NOT EXISTS archive_path VARCHAR(500);
+
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', month)::date;
+    part     TEXT := parent || '_' || to_char(start_at, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        part,
+        parent,
+        start_at::text || ' 00:00:00+00',
+        (start_at + INTERVAL '1 month')::date::text || ' 00:00:00+00'
+    );
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ── test_results ───────────────────────────────────────────
+ALTER TABLE test_results RENAME TO test_results_legacy;
+ALTER TABLE test_results_legacy RENAME CONSTRAINT test_results_pkey TO test_results_legacy_pkey;
+ALTER TABLE test_results_legacy
+    RENAME CONSTRAINT test_results_execution_id_fkey TO test_results_legacy_execution_id_fkey;
+DROP INDEX IF EXISTS idx_test_results_execution;
+DROP INDEX IF EXISTS idx_test_results_execution_order;
+
+CREATE TABLE test_results (
+    id           UUID NOT NULL DEFAULT gen_random_uuid(),
+    execution_id UUID NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
+    nome         VARCHAR(200) NOT NULL,
+    tipo         VARCHAR(50) NOT NULL,
+    status       VARCHAR(20) NOT NULL,
+    duracao_ms   FLOAT DEFAULT 0.0,
+    detalhes     TEXT DEFAULT '',
+    severidade   VARCHAR(20) DEFAULT 'info',
+    grupo        VARCHAR(100) DEFAULT '',
+    created_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE test_results_default PARTITION OF test_results DEFAULT;
+
+-- ── score_history ──────────────────────────────────────────
+ALTER TABLE score_history RENAME TO score_history_legacy;
+ALTER TABLE score_history_legacy RENAME CONSTRAINT score_history_pkey TO score_history_legacy_pkey;
+ALTER TABLE score_history_legacy
+    RENAME CONSTRAINT score_history_execution_id_fkey TO score_history_legacy_execution_id_fkey;
+ALTER TABLE score_history_legacy
+    RENAME CONSTRAINT score_history_project_id_fkey TO score_history_legacy_project_id_fkey;
+DROP INDEX IF EXISTS idx_score_history_project;
+DROP INDEX IF EXISTS idx_score_history_execution;
+DROP INDEX IF EXISTS idx_score_history_project_recorded_id;
+
+CREATE TABLE score_history (
+    id           UUID NOT NULL DEFAULT gen_random_uuid(),
+    execution_id UUID NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
+    project_id   UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    runner_type  VARCHAR(50) NOT NULL,
+    score        FLOAT DEFAULT 0.0,
+    total        INTEGER DEFAULT 0,
+    passed       INTEGER DEFAULT 0,
+    recorded_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE TABLE score_history_default PARTITION OF score_history DEFAULT;
+
+-- ── Particoes cobrindo os dados existentes + 3 meses a frente ──
+SELECT create_monthly_partition(t.parent, m::date)
+FROM (VALUES ('test_results'), ('score_history')) AS t(parent),
+     generate_series(
+         date_trunc('month', coalesce((SELECT min(started_at) FROM executions), NOW())),
+         date_trunc('month', NOW()) + INTERVAL '3 months',
+         INTERVAL '1 month'
+     ) AS m;
+
+-- ── Copia dos dados ────────────────────────────────────────
+INSERT INTO test_results (
+    id, execution_id, nome, tipo, status, duracao_ms, detalhes, severidade, grupo, created_at
+)
+SELECT r.id, r.execution_id, r.nome, r.tipo, r.status, r.duracao_ms, r.detalhes,
+       r.severidade, r.grupo, e.started_at
+FROM test_results_legacy r
+JOIN executions e ON e.id = r.execution_id;
+
+INSERT INTO score_history (
+    id, execution_id, project_id, runner_type, score, total, passed, recorded_at
+)
+SELECT h.id, h.execution_id, h.project_id, h.runner_type, h.score, h.total, h.passed,
+       coalesce(h.recorded_at, e.finished_at, e.started_at)
+FROM score_history_legacy h
+JOIN executions e ON e.id = h.execution_id;
+
+DROP TABLE test_results_legacy;
+DROP TABLE score_history_legacy;
+
+-- ── Indices (propagados para todas as particoes) ───────────
+CREATE INDEX idx_test_results_execution ON test_results(execution_id);
+CREATE INDEX idx_test_results_execution_order ON test_results(execution_id, tipo, nome, id);
+CREATE INDEX idx_score_history_project ON score_history(project_id);
+CREATE INDEX idx_score_history_execution ON score_history(execution_id);
+CREATE INDEX idx_score_history_project_recorded_id ON score_history(project_id, recorded_at, id);
+
+-- ── RLS (politicas eram da tabela antiga) ──────────────────
+ALTER TABLE test_results ENABLE ROW LEVEL SECURITY;
+ALTER TABLE score_history ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "allow_all_test_results" ON test_results FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY "allow_all_score_history" ON score_history FOR ALL USING (true) WITH CHECK (true);
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- Coder Compliance — Migracao 004: fila de auditorias (runs)
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql. Necessaria antes de subir worker.py ou
+-- aceitar POST /api/runs.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS runs (
+    id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    project_name     VARCHAR(100) NOT NULL,
+    types            JSONB NOT NULL DEFAULT '[]',
+    environment      VARCHAR(50) NOT NULL DEFAULT 'local',
+    options          JSONB NOT NULL DEFAULT '{}',
+    status           VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL DEFAULT 3,
+    worker_id        VARCHAR(100),
+    lease_expires_at TIMESTAMPTZ,
+    heartbeat_at     TIMESTAMPTZ,
+    progress_total   INTEGER NOT NULL DEFAULT 0,
+    progress_done    INTEGER NOT NULL DEFAULT 0,
+    execution_id     UUID REFERENCES executions(id) ON DELETE SET NULL,
+    error            TEXT,
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at       TIMESTAMPTZ,
+    finished_at      TIMESTAMPTZ
+);
+
+-- claim: mais antiga por status (queued, ou running com lease vencido)
+CREATE INDEX IF NOT EXISTS idx_runs_status_created ON runs(status, created_at);
+
+-- ── RLS ────────────────────────────────────────────────────
+ALTER TABLE runs ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "allow_all_runs" ON runs FOR ALL USING (true) WITH CHECK (true);
+
+COMMIT;
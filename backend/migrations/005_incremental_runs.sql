@@ -0,0 +1,13 @@
+-- Coder Compliance — Migracao 005: modo incremental de auditorias
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql (requer 004).
+
+BEGIN;
+
+-- sha256 do caso de teste (alvo, requisicao, config); nulo em resultados antigos
+ALTER TABLE test_results ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64);
+
+-- Quantos resultados a auditoria copiou da execucao anterior
+ALTER TABLE runs ADD COLUMN IF NOT EXISTS reused INTEGER NOT NULL DEFAULT 0;
+
+COMMIT;
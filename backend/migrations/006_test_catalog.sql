@@ -0,0 +1,102 @@
+-- Coder Compliance — Migracao 006: catalogo de testes (test_results codificada)
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql (requer 003 e 005). Roda numa unica
+-- transacao; test_results fica bloqueada durante a copia.
+--
+-- nome/tipo/grupo passam para test_catalog (uma linha por teste e projeto);
+-- status e severidade viram codigos SMALLINT. Os resultados sao renumerados
+-- por execucao (seq) na ordem (tipo, nome, id) e o id exposto pela API passa
+-- a ser result_id(execution_id, seq). Severidades fora de
+-- info/low/medium/high/critical viram info.
+
+BEGIN;
+
+-- ── Catalogo ───────────────────────────────────────────────
+CREATE TABLE test_catalog (
+    id          INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    project_id  UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    tipo        VARCHAR(50) NOT NULL,
+    grupo       VARCHAR(100) NOT NULL DEFAULT '',
+    nome        VARCHAR(200) NOT NULL,
+    created_at  TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_test_catalog_test UNIQUE (project_id, tipo, grupo, nome)
+);
+
+INSERT INTO test_catalog (project_id, tipo, grupo, nome, created_at)
+SELECT e.project_id, r.tipo, coalesce(r.grupo, ''), r.nome, min(r.created_at)
+FROM test_results r
+JOIN executions e ON e.id = r.execution_id
+GROUP BY 1, 2, 3, 4;
+
+CREATE OR REPLACE FUNCTION result_id(execution_id UUID, seq INTEGER)
+RETURNS UUID AS $$
+    SELECT md5(execution_id::text || ':' || seq::text)::uuid
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- ── Resultados codificados (staging fora da tabela particionada) ──
+CREATE TEMP TABLE test_results_encoded ON COMMIT DROP AS
+SELECT
+    r.execution_id,
+    (row_number() OVER (PARTITION BY r.execution_id ORDER BY r.tipo, r.nome, r.id) - 1)::int AS seq,
+    r.created_at,
+    c.id AS catalog_id,
+    (CASE r.status WHEN 'pass' THEN 0 WHEN 'fail' THEN 1 WHEN 'error' THEN 2 ELSE 3 END)::smallint
+        AS status_code,
+    (CASE r.severidade
+        WHEN 'low' THEN 1 WHEN 'medium' THEN 2 WHEN 'high' THEN 3 WHEN 'critical' THEN 4 ELSE 0
+     END)::smallint AS severidade_code,
+    r.duracao_ms,
+    nullif(r.detalhes, '') AS detalhes,
+    r.fingerprint
+FROM test_results r
+JOIN executions e ON e.id = r.execution_id
+JOIN test_catalog c
+  ON c.project_id = e.project_id
+ AND c.tipo = r.tipo
+ AND c.grupo = coalesce(r.grupo, '')
+ AND c.nome = r.nome;
+
+-- Remove a tabela antiga com todas as particoes (e indices)
+DROP TABLE test_results;
+
+CREATE TABLE test_results (
+    execution_id    UUID NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
+    seq             INTEGER NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    catalog_id      INTEGER NOT NULL REFERENCES test_catalog(id),
+    status_code     SMALLINT NOT NULL,
+    severidade_code SMALLINT NOT NULL DEFAULT 0,
+    duracao_ms      FLOAT DEFAULT 0.0,
+    detalhes        TEXT,
+    fingerprint     VARCHAR(64),
+    PRIMARY KEY (execution_id, seq, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE test_results_default PARTITION OF test_results DEFAULT;
+
+SELECT create_monthly_partition('test_results', m::date)
+FROM generate_series(
+    date_trunc('month', coalesce((SELECT min(created_at) FROM test_results_encoded), NOW())),
+    date_trunc('month', NOW()) + INTERVAL '3 months',
+    INTERVAL '1 month'
+) AS m;
+
+INSERT INTO test_results (
+    execution_id, seq, created_at, catalog_id, status_code, severidade_code,
+    duracao_ms, detalhes, fingerprint
+)
+SELECT execution_id, seq, created_at, catalog_id, status_code, severidade_code,
+       duracao_ms, detalhes, fingerprint
+FROM test_results_encoded
+ORDER BY execution_id, seq;
+
+-- ── RLS ────────────────────────────────────────────────────
+ALTER TABLE test_catalog ENABLE ROW LEVEL SECURITY;
+ALTER TABLE test_results ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "allow_all_test_catalog" ON test_catalog FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY "allow_all_test_results" ON test_results FOR ALL USING (true) WITH CHECK (true);
+
+ANALYZE test_catalog;
+ANALYZE test_results;
+
+COMMIT;
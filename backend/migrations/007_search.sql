@@ -0,0 +1,29 @@
+-- Coder Compliance — Migracao 007: indices da busca (/api/search)
+-- Executar uma vez no SQL Editor do Supabase em bancos criados antes desta
+-- versao do supabase_schema.sql (requer 006). Os indices de test_results sao
+-- criados na tabela particionada e propagados para todas as particoes.
+--
+-- mode=fts usa to_tsvector('simple', ...) — a mesma expressao dos indices;
+-- mode=substring (ILIKE) usa os indices de trigramas (pg_trgm).
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_test_catalog_nome_fts
+    ON test_catalog USING GIN (to_tsvector('simple'::regconfig, nome));
+CREATE INDEX IF NOT EXISTS idx_test_catalog_nome_trgm
+    ON test_catalog USING GIN (nome gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_test_results_catalog ON test_results(catalog_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_test_results_detalhes_fts
+    ON test_results USING GIN (to_tsvector('simple'::regconfig, detalhes))
+    WHERE detalhes IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_test_results_detalhes_trgm
+    ON test_results USING GIN (detalhes gin_trgm_ops)
+    WHERE detalhes IS NOT NULL;
+
+ANALYZE test_catalog;
+ANALYZE test_results;
+
+COMMIT;
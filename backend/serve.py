@@ -0,0 +1,83 @@
+"""Servidor de producao: varios processos da API, com drenagem no shutdown.
+
+Uso (a partir de ``backend/``):
+
+    python serve.py                       # API_WORKERS processos (0 = CPUs)
+    python serve.py --workers 4 --port 8000 --graceful-timeout 30
+
+O processo pai abre o socket e sobe ``--workers`` processos do uvicorn que o
+compartilham; cada um monta o app com ``main.create_app`` e cria os seus
+engines no lifespan (nunca herdados do pai), aquecendo pool e SQL antes de
+aceitar conexoes. Processo que morre e reposto pelo pai.
+
+SIGTERM/SIGINT: cada processo para de aceitar conexoes, espera os requests
+em andamento ate ``--graceful-timeout`` segundos (streams SSE abertos sao
+cortados ao fim do prazo), roda o shutdown do lifespan — bridge de eventos e
+pools fechados — e sai.
+
+Cache de respostas: cada processo tem o seu, invalidado entre processos pelo
+``NOTIFY`` dos eventos (PostgreSQL com ``EVENTS_ENABLED``). Sem esse canal,
+mais de um worker serviria respostas velhas de outro processo; o cache e
+desligado (``CACHE_ENABLED=false`` nos processos filhos).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+
+import uvicorn
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servidor de producao da API")
+    parser.add_argument("--host", default=settings.api_host)
+    parser.add_argument("--port", type=int, default=settings.api_port)
+    parser.add_argument(
+        "--workers", type=int, default=settings.api_workers or os.cpu_count() or 1,
+        help="processos da API (padrao: API_WORKERS ou numero de CPUs)",
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=settings.api_graceful_timeout,
+        help="segundos para drenar requests em andamento no shutdown",
+    )
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true", help="desliga o log por request")
+    return parser.parse_args(argv)
+
+
+def cross_process_invalidation() -> bool:
+    """Os processos recebem as invalidacoes de cache uns dos outros (bridge de eventos)?"""
+    return (
+        settings.events_enabled
+        and bool(settings.db_url)
+        and make_url(settings.db_url).get_backend_name() == "postgresql"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.workers > 1 and settings.cache_enabled and not cross_process_invalidation():
+        logger.warning("cache de respostas desligado: varios workers sem PostgreSQL/eventos para invalidar")
+        os.environ["CACHE_ENABLED"] = "false"
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+        access_log=not args.no_access_log,
+        lifespan="on",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 -- Coder Compliance — Schema PostgreSQL (Supabase)
 -- Executar no SQL Editor do Supabase
 
+-- Busca por substring (/api/search?mode=substring)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- ══════════════════════════════════════════════════════
 -- 1. Tabela: projects
 -- ══════════════════════════════════════════════════════
@@ -9,6 +12,7 @@ CREATE TABLE IF NOT EXISTS projects (
     nome        VARCHAR(100) NOT NULL UNIQUE,
     descricao   TEXT DEFAULT '',
     stack       VARCHAR(50) DEFAULT '',
+    retention_days INTEGER,  -- NULL = RETENTION_DAYS global; 0 = sem expiracao
     created_at  TIMESTAMPTZ DEFAULT NOW(),
     updated_at  TIMESTAMPTZ DEFAULT NOW()
 );
@@ -30,45 +34,178 @@ CREATE TABLE IF NOT EXISTS executions (
     failed      INTEGER DEFAULT 0,
     errors      INTEGER DEFAULT 0,
     skipped     INTEGER DEFAULT 0,
-    duracao_ms  FLOAT DEFAULT 0.0
+    duracao_ms  FLOAT DEFAULT 0.0,
+    archived_at  TIMESTAMPTZ,
+    archive_path VARCHAR(500)
 );
 
 CREATE INDEX IF NOT EXISTS idx_executions_project ON executions(project_id);
 CREATE INDEX IF NOT EXISTS idx_executions_started ON executions(started_at DESC);
+-- Paginacao keyset por (started_at, id)
+CREATE INDEX IF NOT EXISTS idx_executions_started_id ON executions(started_at, id);
+CREATE INDEX IF NOT EXISTS idx_executions_project_started_id ON executions(project_id, started_at, id);
 
 -- ══════════════════════════════════════════════════════
--- 3. Tabela: test_results
+-- 3. Particionamento mensal (test_results e score_history)
 -- ══════════════════════════════════════════════════════
-CREATE TABLE IF NOT EXISTS test_results (
-    id           UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    execution_id UUID NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
-    nome         VARCHAR(200) NOT NULL,
-    tipo         VARCHAR(50) NOT NULL,
-    status       VARCHAR(20) NOT NULL,
-    duracao_ms   FLOAT DEFAULT 0.0,
-    detalhes     TEXT DEFAULT '',
-    severidade   VARCHAR(20) DEFAULT 'info',
-    grupo        VARCHAR(100) DEFAULT ''
+-- Cria (se nao existir) a particao mensal <parent>_YYYY_MM que contem `month`.
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', month)::date;
+    part     TEXT := parent || '_' || to_char(start_at, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        part,
+        parent,
+        start_at::text || ' 00:00:00+00',
+        (start_at + INTERVAL '1 month')::date::text || ' 00:00:00+00'
+    );
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ══════════════════════════════════════════════════════
+-- 3a. Tabela: test_catalog (dicionario de testes por projeto)
+-- ══════════════════════════════════════════════════════
+CREATE TABLE IF NOT EXISTS test_catalog (
+    id          INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    project_id  UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    tipo        VARCHAR(50) NOT NULL,
+    grupo       VARCHAR(100) NOT NULL DEFAULT '',
+    nome        VARCHAR(200) NOT NULL,
+    created_at  TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_test_catalog_test UNIQUE (project_id, tipo, grupo, nome)
 );
 
-CREATE INDEX IF NOT EXISTS idx_test_results_execution ON test_results(execution_id);
+-- Busca (/api/search): texto completo e trigramas sobre o nome do teste
+CREATE INDEX IF NOT EXISTS idx_test_catalog_nome_fts
+    ON test_catalog USING GIN (to_tsvector('simple'::regconfig, nome));
+CREATE INDEX IF NOT EXISTS idx_test_catalog_nome_trgm
+    ON test_catalog USING GIN (nome gin_trgm_ops);
+
+-- ══════════════════════════════════════════════════════
+-- 3b. Tabela: test_results (particionada por created_at = inicio da execucao)
+-- ══════════════════════════════════════════════════════
+-- Linhas compactas: catalog_id + codigos de status/severidade.
+--   status_code:     0 pass, 1 fail, 2 error, 3 skip
+--   severidade_code: 0 info, 1 low, 2 medium, 3 high, 4 critical
+CREATE TABLE IF NOT EXISTS test_results (
+    execution_id    UUID NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
+    seq             INTEGER NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    catalog_id      INTEGER NOT NULL REFERENCES test_catalog(id),
+    status_code     SMALLINT NOT NULL,
+    severidade_code SMALLINT NOT NULL DEFAULT 0,
+    duracao_ms      FLOAT DEFAULT 0.0,
+    detalhes        TEXT,  -- NULL quando vazio
+    fingerprint     VARCHAR(64),
+    PRIMARY KEY (execution_id, seq, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS test_results_default PARTITION OF test_results DEFAULT;
+
+-- Busca (/api/search): resultados de um teste do catalogo e texto dos detalhes
+CREATE INDEX IF NOT EXISTS idx_test_results_catalog ON test_results(catalog_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_test_results_detalhes_fts
+    ON test_results USING GIN (to_tsvector('simple'::regconfig, detalhes))
+    WHERE detalhes IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_test_results_detalhes_trgm
+    ON test_results USING GIN (detalhes gin_trgm_ops)
+    WHERE detalhes IS NOT NULL;
+
+-- Id publico de um resultado (mesmo calculo de db_models.result_id)
+CREATE OR REPLACE FUNCTION result_id(execution_id UUID, seq INTEGER)
+RETURNS UUID AS $$
+    SELECT md5(execution_id::text || ':' || seq::text)::uuid
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
 
 -- ══════════════════════════════════════════════════════
--- 4. Tabela: score_history
+-- 4. Tabela: score_history (particionada por recorded_at)
 -- ══════════════════════════════════════════════════════
 CREATE TABLE IF NOT EXISTS score_history (
-    id           UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id           UUID NOT NULL DEFAULT gen_random_uuid(),
     execution_id UUID NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
     project_id   UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
     runner_type  VARCHAR(50) NOT NULL,
     score        FLOAT DEFAULT 0.0,
     total        INTEGER DEFAULT 0,
     passed       INTEGER DEFAULT 0,
-    recorded_at  TIMESTAMPTZ DEFAULT NOW()
-);
+    recorded_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE TABLE IF NOT EXISTS score_history_default PARTITION OF score_history DEFAULT;
 
 CREATE INDEX IF NOT EXISTS idx_score_history_project ON score_history(project_id);
 CREATE INDEX IF NOT EXISTS idx_score_history_execution ON score_history(execution_id);
+CREATE INDEX IF NOT EXISTS idx_score_history_project_recorded_id ON score_history(project_id, recorded_at, id);
+
+-- Particoes do mes corrente e dos proximos 3 (depois: `python manage.py partitions`)
+SELECT create_monthly_partition(t.parent, (date_trunc('month', NOW()) + m * INTERVAL '1 month')::date)
+FROM (VALUES ('test_results'), ('score_history')) AS t(parent), generate_series(0, 3) AS m;
+
+-- ══════════════════════════════════════════════════════
+-- 4b. Tabela: project_summary (mantida pela ingestao)
+-- ══════════════════════════════════════════════════════
+CREATE TABLE IF NOT EXISTS project_summary (
+    project_id        UUID PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    last_execution_id UUID REFERENCES executions(id) ON DELETE SET NULL,
+    last_score        FLOAT,
+    last_started_at   TIMESTAMPTZ,
+    previous_score    FLOAT,
+    trend             FLOAT,
+    execution_count   INTEGER NOT NULL DEFAULT 0,
+    pass_rate         FLOAT,
+    updated_at        TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- ══════════════════════════════════════════════════════
+-- 4c. Tabela: score_rollups (agregados por hora/dia/semana)
+-- ══════════════════════════════════════════════════════
+CREATE TABLE IF NOT EXISTS score_rollups (
+    project_id       UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    runner_type      VARCHAR(50) NOT NULL,
+    bucket           VARCHAR(10) NOT NULL,
+    bucket_start     TIMESTAMPTZ NOT NULL,
+    samples          INTEGER NOT NULL DEFAULT 0,
+    score_sum        FLOAT NOT NULL DEFAULT 0.0,
+    score_min        FLOAT,
+    score_max        FLOAT,
+    last_score       FLOAT,
+    last_recorded_at TIMESTAMPTZ,
+    total_sum        INTEGER NOT NULL DEFAULT 0,
+    passed_sum       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, runner_type, bucket, bucket_start)
+);
+
+-- ══════════════════════════════════════════════════════
+-- 4d. Tabela: runs (fila de auditorias — ver worker.py)
+-- ══════════════════════════════════════════════════════
+CREATE TABLE IF NOT EXISTS runs (
+    id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    project_name     VARCHAR(100) NOT NULL,
+    types            JSONB NOT NULL DEFAULT '[]',
+    environment      VARCHAR(50) NOT NULL DEFAULT 'local',
+    options          JSONB NOT NULL DEFAULT '{}',
+    status           VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL DEFAULT 3,
+    worker_id        VARCHAR(100),
+    lease_expires_at TIMESTAMPTZ,
+    heartbeat_at     TIMESTAMPTZ,
+    progress_total   INTEGER NOT NULL DEFAULT 0,
+    progress_done    INTEGER NOT NULL DEFAULT 0,
+    reused           INTEGER NOT NULL DEFAULT 0,
+    execution_id     UUID REFERENCES executions(id) ON DELETE SET NULL,
+    error            TEXT,
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at       TIMESTAMPTZ,
+    finished_at      TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_runs_status_created ON runs(status, created_at);
 
 -- ══════════════════════════════════════════════════════
 -- 5. Trigger: updated_at automatico em projects
@@ -91,11 +228,19 @@ CREATE TRIGGER trg_projects_updated
 -- ══════════════════════════════════════════════════════
 ALTER TABLE projects ENABLE ROW LEVEL SECURITY;
 ALTER TABLE executions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE test_catalog ENABLE ROW LEVEL SECURITY;
 ALTER TABLE test_results ENABLE ROW LEVEL SECURITY;
 ALTER TABLE score_history ENABLE ROW LEVEL SECURITY;
+ALTER TABLE project_summary ENABLE ROW LEVEL SECURITY;
+ALTER TABLE score_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE runs ENABLE ROW LEVEL SECURITY;
 
 -- Politica aberta para MVP (sem auth)
 CREATE POLICY IF NOT EXISTS "allow_all_projects" ON projects FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY IF NOT EXISTS "allow_all_executions" ON executions FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY IF NOT EXISTS "allow_all_test_catalog" ON test_catalog FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY IF NOT EXISTS "allow_all_test_results" ON test_results FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY IF NOT EXISTS "allow_all_score_history" ON score_history FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY IF NOT EXISTS "allow_all_project_summary" ON project_summary FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY IF NOT EXISTS "allow_all_score_rollups" ON score_rollups FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY IF NOT EXISTS "allow_all_runs" ON runs FOR ALL USING (true) WITH CHECK (true);
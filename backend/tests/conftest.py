@@ -0,0 +1,117 @@
+"""Fixtures dos testes: banco descartavel por teste, em SQLite e PostgreSQL.
+
+Os testes que usam ``db_url`` (direta ou indiretamente) rodam uma vez por
+backend. SQLite (``sqlite+aiosqlite``) roda sempre, num arquivo temporario.
+PostgreSQL roda quando ``TEST_PG_URL`` aponta para um banco descartavel com
+``supabase_schema.sql`` e as migrations aplicados; as tabelas sao esvaziadas
+antes de cada teste.
+
+Uso (a partir de ``backend/``):
+
+    python -m pytest
+    TEST_PG_URL=postgresql+asyncpg://postgres:pg@localhost:5432/cc_test python -m pytest
+"""
+
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database, metrics
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import create_engine, init_schema
+from app.models.db_models import Base
+
+from tests.factories import ingest_dataset
+
+TEST_PG_URL = os.environ.get("TEST_PG_URL", "")
+
+BACKENDS = [
+    pytest.param("sqlite", id="sqlite"),
+    pytest.param(
+        "postgresql",
+        id="postgresql",
+        marks=pytest.mark.skipif(not TEST_PG_URL, reason="TEST_PG_URL nao configurada"),
+    ),
+]
+
+
+class QueryCounter:
+    """Conta comandos SQL e linhas trazidas num engine (hooks do SQLAlchemy)."""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.rows = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements += 1
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.rows += metrics._rows_of(cursor)
+
+    def reset(self) -> None:
+        self.statements = self.rows = 0
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=BACKENDS)
+def db_url(request, tmp_path) -> str:
+    if request.param == "sqlite":
+        return f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    return TEST_PG_URL
+
+
+@pytest.fixture
+async def engine(db_url):
+    engine = create_engine(db_url)
+    await init_schema(engine)
+    if engine.dialect.name == "postgresql":
+        tables = ", ".join(t.name for t in Base.metadata.sorted_tables)
+        async with engine.begin() as conn:
+            await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(engine):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+async def dataset(db) -> dict:
+    return await ingest_dataset(db)
+
+
+@pytest.fixture
+async def client(db_url, engine, monkeypatch):
+    """Cliente HTTP do app (em processo) contra o banco do teste, sem cache."""
+    import main
+
+    monkeypatch.setattr(settings, "db_url", db_url)
+    monkeypatch.setattr(settings, "db_replica_urls", "")
+    monkeypatch.setattr(response_cache, "enabled", False)
+    await database.dispose()
+    database.connect()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    await database.dispose()
+
+
+@pytest.fixture
+def queries(client) -> QueryCounter:
+    """Contador de SQL no engine usado pelo app (zere antes do request medido)."""
+    return QueryCounter(database.engine)
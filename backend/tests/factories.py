@@ -0,0 +1,59 @@
+"""Dados de teste: resultados deterministicos e um dataset pequeno via ingestao."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import history_service
+
+STATUSES = ["pass"] * 6 + ["fail", "error", "skip"]
+DETAILS = [
+    "Expected status 200, got 500 — Internal Server Error",
+    "Response time 3200ms exceeded threshold 2000ms",
+    "Header 'X-Frame-Options' not found in response",
+]
+START = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+
+
+def make_results(tests: int, seed: int = 0) -> list[dict]:
+    """``tests`` resultados com status, latencia e detalhes variados."""
+    rng = random.Random(seed)
+    results = []
+    for i in range(tests):
+        status = rng.choice(STATUSES)
+        results.append({
+            "nome": f"GET /api/recurso/{i} — caso {i}",
+            "tipo": "api" if i % 3 else "security",
+            "grupo": f"grupo-{i % 4}",
+            "status": status,
+            "duracao_ms": round(rng.uniform(5, 900), 1),
+            "detalhes": rng.choice(DETAILS) if status in ("fail", "error") else "",
+            "severidade": rng.choice(["low", "medium", "high"]),
+        })
+    return results
+
+
+async def ingest_dataset(db: AsyncSession, projects: int = 2, executions: int = 3, tests: int = 20) -> dict:
+    """Grava ``projects`` x ``executions`` execucoes finalizadas (uma hora entre elas).
+
+    Retorna ``project_id`` e ``executions`` (ids em ordem cronologica) do
+    primeiro projeto, e a contagem total de projetos.
+    """
+    ids: dict = {"projects": projects, "executions": []}
+    for p in range(projects):
+        for e in range(executions):
+            execution = await history_service.ingest_execution(
+                db,
+                f"projeto-{p}",
+                "ci",
+                make_results(tests, seed=p * 100 + e),
+                started_at=START + timedelta(hours=e, minutes=p),
+            )
+            if p == 0:
+                ids["project_id"] = execution.project_id
+                ids["executions"].append(execution.id)
+    await db.commit()
+    return ids
@@ -0,0 +1,32 @@
+"""Particoes mensais para cargas de datas passadas."""
+
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.services import archive_service
+
+from tests.factories import START, ingest_dataset
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_partitions_between_cover_window(db):
+    created = await archive_service.ensure_partitions_between(db, date(2025, 11, 20), date(2026, 1, 5))
+    if db.bind.dialect.name != "postgresql":
+        assert created == []
+        return
+    assert created == [
+        f"{table}_{month}"
+        for table in archive_service.PARTITIONED_TABLES
+        for month in ("2025_11", "2025_12", "2026_01")
+    ]
+
+    await ingest_dataset(db, projects=1, executions=1, tests=5)
+    partitions = (
+        await db.execute(text("SELECT DISTINCT tableoid::regclass::text FROM test_results"))
+    ).scalars().all()
+    assert partitions == [f"test_results_{START:%Y_%m}"]
@@ -0,0 +1,65 @@
+"""Cache de respostas e read-your-writes."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.core.cache import MemoryCacheBackend, response_cache
+from app.core.replicas import CONSISTENCY_HEADER, READ_PRIMARY_COOKIE
+from app.services import history_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def cache(client, monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", True)
+    monkeypatch.setattr(response_cache, "backend", MemoryCacheBackend())
+    return response_cache
+
+
+async def _names(client, **kwargs) -> set[str]:
+    response = await client.get("/api/projects", **kwargs)
+    assert response.status_code == 200
+    return {p["nome"] for p in response.json()}
+
+
+async def _write_behind_cache(db) -> None:
+    """Grava direto no banco, sem ``bump`` (como outro processo ou uma replica atrasada)."""
+    await history_service.get_or_create_project(db, "novo")
+    await db.commit()
+
+
+async def test_cached_until_bump(client, cache, db, dataset):
+    before = await _names(client)
+    await _write_behind_cache(db)
+    assert await _names(client) == before
+    await cache.bump("qualquer")
+    assert "novo" in await _names(client)
+
+
+async def test_consistency_header_skips_cache(client, cache, db, dataset):
+    before = await _names(client)
+    await _write_behind_cache(db)
+    assert "novo" in await _names(client, headers={CONSISTENCY_HEADER: "primary"})
+    # a leitura do primario nao grava no cache
+    assert await _names(client) == before
+
+
+async def test_write_cookie_skips_cache(client, cache, db, dataset):
+    before = await _names(client)
+    await _write_behind_cache(db)
+    client.cookies.set(READ_PRIMARY_COOKIE, f"{time.time() + 30:.3f}")
+    assert "novo" in await _names(client)
+    client.cookies.clear()
+    assert await _names(client) == before
+
+
+async def test_invalidate_from_other_process(client, cache, db, dataset):
+    before = await _names(client)
+    await _write_behind_cache(db)
+    assert await _names(client) == before
+    await cache.invalidate(None)  # bridge reconectou: avisos perdidos
+    assert "novo" in await _names(client)
@@ -0,0 +1,127 @@
+"""Broker de eventos ao vivo: buffer limitado, ``lagged`` e entrega no commit."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from app.core import events
+from app.core.events import NOTIFY_MAX_BYTES, EventBroker, Subscription
+from app.services import history_service
+from tests.factories import make_results
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lagged_is_delivered_with_empty_queue():
+    # Queda da bridge sem eventos na fila: o cliente precisa saber (e reler o estado)
+    sub = Subscription("k", maxsize=4)
+    waiter = asyncio.create_task(sub.get())
+    await asyncio.sleep(0)
+    sub.mark_lagged()
+    assert await asyncio.wait_for(waiter, 1) == {"type": "lagged", "dropped": 1}
+
+
+async def test_overflow_emits_lagged_before_newest_events():
+    sub = Subscription("k", maxsize=2)
+    for i in range(5):
+        sub.put({"type": "progress", "n": i})
+    assert await sub.get() == {"type": "lagged", "dropped": 3}
+    assert [(await sub.get())["n"] for _ in range(2)] == [3, 4]
+
+
+async def test_broker_mark_lagged_reaches_idle_subscribers():
+    broker = EventBroker()
+    sub = broker.subscribe("exec", maxsize=4)
+    broker.mark_lagged()
+    assert (await asyncio.wait_for(sub.get(), 1))["type"] == "lagged"
+
+
+def test_payloads_fit_notify_limit():
+    results = [{**r, "detalhes": "x" * 20_000} for r in make_results(50)]
+    payloads = events._encode_payloads("exec", [{"type": "results", "results": results}])
+    assert all(len(p.encode()) <= NOTIFY_MAX_BYTES for p in payloads)
+    assert sum(len(json.loads(p)["event"]["results"]) for p in payloads) == 50
+
+
+async def test_events_are_delivered_only_after_commit(db):
+    if db.get_bind().dialect.name != "sqlite":
+        pytest.skip("em PostgreSQL a entrega passa pela bridge LISTEN/NOTIFY")
+    execution = await history_service.open_execution(db, "projeto-eventos", "ci")
+    await db.commit()
+    sub = events.broker.subscribe(str(execution.id))
+    try:
+        await history_service.append_results(
+            db, execution.id, execution.project_id, execution.started_at, make_results(3),
+        )
+        await asyncio.sleep(0)
+        assert not sub._queue
+        await db.commit()
+        assert (await asyncio.wait_for(sub.get(), 1))["type"] == "results"
+    finally:
+        events.broker.unsubscribe(sub)
+
+
+async def test_notify_batch_reaches_bridge(db, db_url):
+    if db.get_bind().dialect.name != "postgresql":
+        pytest.skip("LISTEN/NOTIFY so existe em PostgreSQL")
+    target = EventBroker()
+    sub = target.subscribe("exec-batch", maxsize=100)
+    bridge = events.PgEventBridge(db_url, target=target)
+    bridge.start()
+    try:
+        await asyncio.sleep(0.5)  # conexao LISTEN
+        batch = [{"type": "progress", "n": i} for i in range(3)]
+        await events.publish(db, "exec-batch", batch)
+        await db.commit()
+        received = [await asyncio.wait_for(sub.get(), 5) for _ in batch]
+        assert [e["n"] for e in received] == [0, 1, 2]
+    finally:
+        await bridge.stop()
+
+
+def test_project_tags_one_payload_per_batch():
+    batch = [{"type": "results", "results": [{"nome": "a"}]}, {"type": "progress", "total": 1}]
+    payloads = [json.loads(p) for p in events._encode_payloads("exec", batch, project_id="proj")]
+    assert [p.get("project") for p in payloads] == [None, "proj"]
+    assert [p["event"]["type"] for p in payloads] == ["results", "progress"]
+
+
+async def test_bridge_forwards_project_invalidations():
+    calls = []
+
+    async def on_project(project_id):
+        calls.append(project_id)
+
+    target = EventBroker()
+    sub = target.subscribe("exec", maxsize=10)
+    bridge = events.PgEventBridge("postgresql://u@localhost/db", target=target, on_project=on_project)
+    bridge._on_notify(None, 0, events.EVENTS_CHANNEL, json.dumps({"project": "p1"}))
+    bridge._on_notify(
+        None, 0, events.EVENTS_CHANNEL,
+        json.dumps({"key": "exec", "project": "p2", "event": {"type": "finished"}}),
+    )
+    bridge._on_notify(None, 0, events.EVENTS_CHANNEL, "nao-e-json")
+    await asyncio.sleep(0)
+    assert calls == ["p1", "p2"]
+    assert (await asyncio.wait_for(sub.get(), 1))["type"] == "finished"
+
+
+async def test_ingest_notifies_project_across_processes(db, db_url):
+    if db.get_bind().dialect.name != "postgresql":
+        pytest.skip("LISTEN/NOTIFY so existe em PostgreSQL")
+    invalidated = asyncio.Queue()
+    bridge = events.PgEventBridge(db_url, target=EventBroker(), on_project=invalidated.put)
+    bridge.start()
+    try:
+        await asyncio.sleep(0.5)  # conexao LISTEN
+        execution = await history_service.open_execution(db, "projeto-n", "ci")
+        await db.commit()
+        assert await asyncio.wait_for(invalidated.get(), 5) == str(execution.project_id)
+        await history_service.ingest_execution(db, "projeto-n", "ci", make_results(3))
+        await db.commit()
+        assert await asyncio.wait_for(invalidated.get(), 5) == str(execution.project_id)
+    finally:
+        await bridge.stop()
@@ -0,0 +1,41 @@
+"""``GET /api/projects/{id}/history``: rollups reduzidos por ``max_points``."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+from app.models.db_models import ScoreRollup
+
+from tests.factories import START
+
+pytestmark = pytest.mark.anyio
+
+
+def _url(dataset) -> str:
+    return f"/api/projects/{dataset['project_id']}/history"
+
+
+async def test_max_points_requires_bucket(client, dataset):
+    response = await client.get(_url(dataset), params={"max_points": 10})
+    assert response.status_code == 400
+
+
+async def test_max_points_skips_empty_buckets(client, db, dataset):
+    db.add(ScoreRollup(
+        project_id=dataset["project_id"], runner_type="api", bucket="hour",
+        bucket_start=START + timedelta(hours=5), samples=0, score_sum=0.0,
+    ))
+    await db.commit()
+
+    everything = (await client.get(_url(dataset), params={"bucket": "hour"})).json()
+    assert [r["score"] for r in everything].count(None) == 1
+
+    response = await client.get(_url(dataset), params={"bucket": "hour", "max_points": 3})
+    assert response.status_code == 200
+    rows = response.json()
+    assert all(r["score"] is not None for r in rows)
+    assert sorted((r["runner_type"], r["bucket_start"]) for r in rows) == sorted(
+        (r["runner_type"], r["bucket_start"]) for r in everything if r["score"] is not None
+    )
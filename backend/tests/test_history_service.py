@@ -0,0 +1,227 @@
+"""Servicos de historico e fila contra SQLite e PostgreSQL.
+
+Cada teste roda nos dois backends (``db_url``) e compara a saida do banco
+com o valor calculado em Python a partir de ``make_results``.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models import db_models
+from app.services import history_service, run_queue
+
+from tests.factories import START, make_results
+
+pytestmark = pytest.mark.anyio
+
+
+def _seed(execution: int, project: int = 0) -> int:
+    return project * 100 + execution
+
+
+# ── Ingestao ───────────────────────────────────────────────────────────
+
+async def test_ingest_totals_and_results(db, dataset):
+    expected = make_results(20, seed=_seed(2))
+    execution = await history_service.get_execution_row(db, dataset["executions"][2])
+    assert execution.total == 20
+    assert execution.passed == sum(r["status"] == "pass" for r in expected)
+    assert execution.failed == sum(r["status"] == "fail" for r in expected)
+    assert execution.errors == sum(r["status"] == "error" for r in expected)
+    assert execution.skipped == sum(r["status"] == "skip" for r in expected)
+
+    rows = await history_service.get_test_results(db, execution.id)
+    assert [r.seq for r in rows] == list(range(20))
+    assert [(r.nome, r.tipo, r.status, r.duracao_ms) for r in rows] == [
+        (r["nome"], r["tipo"], r["status"], r["duracao_ms"]) for r in expected
+    ]
+
+
+async def test_ingest_redacts_details(db):
+    results = make_results(3)
+    results[1] = {**results[1], "status": "fail", "detalhes": "Authorization: Bearer abc123def456ghi"}
+    execution = await history_service.ingest_execution(db, "projeto-r", "ci", results)
+    await db.commit()
+
+    rows = await history_service.get_test_results(db, execution.id)
+    assert rows[1].detalhes == "Authorization: Bearer [REDACTED:bearer]"
+
+
+async def test_streamed_execution_matches_bulk(db):
+    results = make_results(25, seed=7)
+    execution = await history_service.open_execution(db, "projeto-s", "ci", started_at=START)
+    for start in range(0, 25, 10):
+        await history_service.append_results(
+            db, execution.id, execution.project_id, START, results[start:start + 10],
+        )
+    assert await history_service.finalize_execution(db, execution.id, execution.project_id, START)
+    assert not await history_service.finalize_execution(db, execution.id, execution.project_id, START)
+    await db.commit()
+
+    row = await history_service.get_execution_row(db, execution.id)
+    assert row.finished_at is not None
+    assert (row.total, row.passed) == (25, sum(r["status"] == "pass" for r in results))
+    rows = await history_service.get_test_results(db, execution.id)
+    assert [r.seq for r in rows] == list(range(25))
+    assert [r.nome for r in rows] == [r["nome"] for r in results]
+
+
+# ── Paginacao ──────────────────────────────────────────────────────────
+
+async def test_executions_keyset_pages(db, dataset):
+    seen, after = [], None
+    while True:
+        page = await history_service.get_executions(db, dataset["project_id"], limit=2, after=after)
+        if not page:
+            break
+        seen.extend(r.id for r in page)
+        after = (page[-1].started_at, page[-1].id)
+    assert seen == dataset["executions"][::-1]
+
+
+async def test_results_keyset_pages(db, dataset):
+    execution_id = dataset["executions"][0]
+    seen, after = [], None
+    while True:
+        page = await history_service.get_test_results(db, execution_id, limit=6, after=after)
+        if not page:
+            break
+        seen.extend(r.seq for r in page)
+        after = (page[-1].seq,)
+    assert seen == list(range(20))
+
+
+# ── Estatisticas ───────────────────────────────────────────────────────
+
+def _expected_stats() -> dict[str, tuple[int, int, int, str]]:
+    """``nome -> (runs, passed, flips, last_status)``, ignorando ``skip``."""
+    history: dict[str, list[str]] = {}
+    for e in range(3):
+        for r in make_results(20, seed=_seed(e)):
+            if r["status"] != "skip":
+                history.setdefault(r["nome"], []).append(r["status"])
+    expected = {}
+    for nome, statuses in history.items():
+        passes = [s == "pass" for s in statuses]
+        flips = sum(a != b for a, b in zip(passes, passes[1:]))
+        expected[nome] = (len(statuses), sum(passes), flips, statuses[-1])
+    return expected
+
+
+async def test_stats_match_history(db, dataset):
+    rows = await history_service.get_test_stats(db, dataset["project_id"], executions=3)
+    assert {r.nome: (r.runs, r.passed, r.flips, r.last_status) for r in rows} == _expected_stats()
+
+
+async def test_stats_flaky_only(db, dataset):
+    rows = await history_service.get_test_stats(db, dataset["project_id"], executions=3, flaky_only=True)
+    assert {r.nome for r in rows} == {n for n, s in _expected_stats().items() if s[2] > 0}
+
+
+# ── Diff ───────────────────────────────────────────────────────────────
+
+async def test_diff_matches_classify(db, dataset):
+    first, second = dataset["executions"][:2]
+    a = await history_service.get_execution_state(db, first)
+    b = await history_service.get_execution_state(db, second)
+    entries = await history_service.diff_executions(db, a, b)
+
+    expected = {}
+    for ra, rb in zip(make_results(20, seed=_seed(0)), make_results(20, seed=_seed(1))):
+        change = history_service.classify_diff(
+            ra["status"], rb["status"], ra["duracao_ms"], rb["duracao_ms"], 0.5, 100.0,
+        )
+        if change is not None:
+            expected[ra["nome"]] = change
+    assert expected
+    assert {e["nome"]: e["change"] for e in entries} == expected
+
+
+# ── Busca ──────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("mode", ["fts", "substring"])
+async def test_search_details(db, dataset, mode):
+    needle = "X-Frame-Options" if mode == "substring" else "Frame"
+    expected = sum(
+        needle in r["detalhes"] for e in range(3) for r in make_results(20, seed=_seed(e))
+    )
+    rows = await history_service.search_results(
+        db, needle, mode=mode, project_id=dataset["project_id"], limit=100,
+    )
+    assert expected
+    assert len(rows) == expected
+    assert all(r.project_id == dataset["project_id"] for r in rows)
+
+
+async def test_search_recent_pages(db, dataset):
+    kwargs = {"mode": "substring", "project_id": dataset["project_id"], "sort": "recent"}
+    everything = await history_service.search_results(db, "recurso", limit=100, **kwargs)
+    seen, after = [], None
+    while True:
+        page = await history_service.search_results(db, "recurso", limit=7, after=after, **kwargs)
+        if not page:
+            break
+        seen.extend((r.execution_id, r.seq) for r in page)
+        after = (page[-1].started_at, page[-1].execution_id, page[-1].seq)
+    assert len(everything) == 60
+    assert seen == [(r.execution_id, r.seq) for r in everything]
+
+
+# ── Rollups ────────────────────────────────────────────────────────────
+
+async def test_rollups_incremental_matches_rebuild(db, dataset):
+    project_id = dataset["project_id"]
+    incremental = {
+        bucket: [tuple(r) for r in await history_service.get_score_rollups(db, project_id, bucket)]
+        for bucket in history_service.ROLLUP_BUCKETS
+    }
+    await history_service.rebuild_score_rollups(db)
+    await db.commit()
+    rebuilt = {
+        bucket: [tuple(r) for r in await history_service.get_score_rollups(db, project_id, bucket)]
+        for bucket in history_service.ROLLUP_BUCKETS
+    }
+    assert incremental == rebuilt
+
+    for bucket, rows in incremental.items():
+        samples: dict[str, int] = {}
+        for r in rows:
+            samples[r[0]] = samples.get(r[0], 0) + r[-1]
+        assert samples == {"api": 3, "security": 3}, bucket
+
+
+# ── Fila ───────────────────────────────────────────────────────────────
+
+async def test_claim_oldest_once(db):
+    first = await run_queue.enqueue(db, "projeto-q", ["api"], "ci")
+    second = await run_queue.enqueue(db, "projeto-q", ["security"], "ci")
+    second.created_at = first.created_at + timedelta(seconds=1)
+    expected = [first.id, second.id, None]
+    await db.commit()
+
+    claimed = []
+    for i in range(3):
+        run = await run_queue.claim(db, f"w{i}")
+        claimed.append(run.id if run else None)
+    assert claimed == expected
+
+    runs = (await db.execute(select(db_models.Run).order_by(db_models.Run.created_at))).scalars().all()
+    assert [(r.status, r.worker_id, r.attempts) for r in runs] == [
+        (run_queue.RUNNING, "w0", 1),
+        (run_queue.RUNNING, "w1", 1),
+    ]
+
+
+async def test_claim_expired_lease(db):
+    run_id = (await run_queue.enqueue(db, "projeto-q", ["api"], "ci")).id
+    await db.commit()
+    assert (await run_queue.claim(db, "w0", lease_seconds=-1)).id == run_id
+    assert (await run_queue.claim(db, "w1")).id == run_id
+
+    db.expire_all()
+    run = await run_queue.get_run(db, run_id)
+    assert (run.worker_id, run.attempts) == ("w1", 2)
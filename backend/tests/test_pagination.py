@@ -0,0 +1,62 @@
+"""Cursores de paginacao: ida e volta e cursores forjados (400, nunca 500)."""
+
+from __future__ import annotations
+
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.pagination import (
+    EXECUTION_CURSOR,
+    RESULT_CURSOR,
+    SEARCH_RELEVANCE_CURSOR,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    key = (datetime(2026, 1, 5, tzinfo=timezone.utc), uuid.uuid4())
+    assert decode_cursor(encode_cursor(key), EXECUTION_CURSOR) == key
+
+
+@pytest.mark.parametrize(
+    ("values", "types"),
+    [
+        (["2026-01-05T00:00:00+00:00", 123], EXECUTION_CURSOR),
+        ([1, "8c1f0a9e-8f5b-4c43-9d7a-2a3f1c5e6b7d"], EXECUTION_CURSOR),
+        (["7"], RESULT_CURSOR),
+        (["api", "nome", "8c1f0a9e-8f5b-4c43-9d7a-2a3f1c5e6b7d"], RESULT_CURSOR),
+        ([True, "2026-01-05T00:00:00+00:00", "8c1f0a9e-8f5b-4c43-9d7a-2a3f1c5e6b7d", 1], SEARCH_RELEVANCE_CURSOR),
+        ([0.5, "2026-01-05T00:00:00+00:00", "8c1f0a9e-8f5b-4c43-9d7a-2a3f1c5e6b7d", "1"], SEARCH_RELEVANCE_CURSOR),
+        ({"a": 1}, EXECUTION_CURSOR),
+        (["2026-01-05T00:00:00+00:00"], EXECUTION_CURSOR),
+    ],
+)
+def test_crafted_cursor_is_rejected(values, types):
+    with pytest.raises(ValueError):
+        decode_cursor(_raw_cursor(values), types)
+
+
+def test_garbage_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("%%%nao-base64", EXECUTION_CURSOR)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "path",
+    ["/api/executions", "/api/projects/{project_id}/executions", "/api/executions/{execution_id}/results"],
+)
+async def test_crafted_cursor_returns_400(client, dataset, path):
+    url = path.format(project_id=dataset["project_id"], execution_id=dataset["executions"][0])
+    cursor = _raw_cursor(["2026-01-05T00:00:00+00:00", 123, 5])
+    response = await client.get(url, params={"cursor": cursor, "limit": 5})
+    assert response.status_code == 400
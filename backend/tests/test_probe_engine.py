@@ -0,0 +1,80 @@
+"""Runners ``api``/``security`` contra o alvo local ``benchmarks.probe_target``."""
+
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.services import compliance_service, probe_engine
+from app.services.probe_engine import ProbeEngine
+from app.services.runners import API_CASES, SECURITY_CASES, engine_for, register_builtin_runners
+from benchmarks.probe_target import create_target_app
+
+pytestmark = pytest.mark.anyio
+
+TARGET_URL = "http://target.local"
+
+
+@pytest.fixture(autouse=True)
+async def _close_gates():
+    # Limites por alvo ficam presos ao event loop; cada teste tem o seu
+    yield
+    await probe_engine.aclose_clients()
+
+
+async def _run(secure: bool, cases, **kwargs) -> dict[str, dict]:
+    transport = httpx.ASGITransport(app=create_target_app(secure=secure))
+    async with httpx.AsyncClient(transport=transport) as client:
+        results = await ProbeEngine(TARGET_URL, client=client, **kwargs).run(cases)
+    return {r["nome"]: r for r in results}
+
+
+async def test_secure_target_passes_everything():
+    results = await _run(True, API_CASES + SECURITY_CASES)
+    failed = {nome: r["detalhes"] for nome, r in results.items() if r["status"] != "pass"}
+    assert failed == {}
+    assert all(r["duracao_ms"] > 0 for r in results.values())
+
+
+async def test_insecure_target_fails_security_cases():
+    results = await _run(False, SECURITY_CASES)
+    assert sum(r["status"] == "fail" for r in results.values()) >= len(SECURITY_CASES) // 2
+    assert all(r["detalhes"] for r in results.values() if r["status"] == "fail")
+
+
+async def test_results_follow_case_order_and_type():
+    results = await _run(True, API_CASES)
+    assert list(results) == [c.nome for c in API_CASES]
+    assert {r["tipo"] for r in results.values()} == {"api"}
+
+
+async def test_incremental_reuses_baseline():
+    first = await _run(True, API_CASES)
+    baseline = {r["fingerprint"]: r for r in first.values() if r["status"] == "pass"}
+    second = await _run(True, API_CASES, baseline=baseline)
+    assert all(r.get("reused") for r in second.values())
+
+
+async def test_builtin_runners_are_registered_explicitly(monkeypatch):
+    monkeypatch.setattr(compliance_service, "RUNNERS", {})
+    with pytest.raises(compliance_service.RunnerUnavailableError):
+        compliance_service.resolve_types(["all"])
+    register_builtin_runners()
+    assert compliance_service.resolve_types(["all"]) == ["api", "security"]
+
+
+async def test_http_runner_requires_target_url():
+    job = compliance_service.AuditJob(project_name="p", types=["api"])
+    with pytest.raises(compliance_service.RunnerUnavailableError):
+        engine_for(job)
+
+
+@pytest.mark.parametrize("body", [{}, {"target_url": "http://127.0.0.1:9"}], ids=["sem-alvo", "com-alvo"])
+async def test_run_request_target_url_is_optional(client, body):
+    response = await client.post("/api/runs", json={"project_name": "p", "types": ["api"], **body})
+    assert response.status_code == 202
+
+
+async def test_run_request_rejects_bad_target_url(client):
+    response = await client.post("/api/runs", json={"project_name": "p", "target_url": "ftp://x"})
+    assert response.status_code == 422
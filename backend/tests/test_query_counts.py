@@ -0,0 +1,56 @@
+"""Comandos SQL e linhas trazidas por endpoint de leitura.
+
+As listagens usam projecoes de colunas e os relacionamentos sao
+``lazy="raise"``: o numero de comandos e fixo e as linhas trazidas dependem
+da pagina pedida, nunca do tamanho do historico (resultados das execucoes
+nao sao carregados junto).
+"""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from app.models import db_models
+from tests.factories import ingest_dataset
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    ("path", "statements", "rows"),
+    [
+        # (rota, comandos, linhas trazidas)
+        ("/api/projects", 1, 2),
+        ("/api/projects/{project_id}", 1, 1),
+        ("/api/projects/{project_id}/executions?limit=2", 2, 1 + 3),
+        ("/api/executions?limit=2", 1, 3),
+        ("/api/executions/{execution_id}", 1, 1),
+    ],
+)
+async def test_read_endpoint_queries(client, queries, dataset, path, statements, rows):
+    url = path.format(project_id=dataset["project_id"], execution_id=dataset["executions"][-1])
+    queries.reset()
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert (queries.statements, queries.rows) == (statements, rows)
+
+
+async def test_rows_do_not_grow_with_results(client, queries, db, dataset):
+    """Mais resultados por execucao nao mudam o custo da listagem de execucoes."""
+    queries.reset()
+    await client.get("/api/executions?limit=2")
+    before = (queries.statements, queries.rows)
+
+    await ingest_dataset(db, projects=1, executions=1, tests=200)
+    queries.reset()
+    await client.get("/api/executions?limit=2")
+    assert (queries.statements, queries.rows) == before
+
+
+async def test_relationships_raise_on_lazy_load(db, dataset):
+    execution = await db.get(db_models.Execution, dataset["executions"][0])
+    with pytest.raises(InvalidRequestError):
+        execution.test_results
+    with pytest.raises(InvalidRequestError):
+        execution.project
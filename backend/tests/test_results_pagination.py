@@ -0,0 +1,56 @@
+"""Paginacao dos resultados de uma execucao pela PK ``(execution_id, seq)``."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+from app.services import history_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pages_cover_all_results_in_seq_order(client, dataset):
+    execution_id = dataset["executions"][0]
+    everything = (await client.get(f"/api/executions/{execution_id}/results")).json()
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(f"/api/executions/{execution_id}/results", params=params)
+        assert response.status_code == 200
+        pages.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert [r["id"] for r in pages] == [r["id"] for r in everything]
+    assert len(pages) == 20
+
+
+async def test_results_page_needs_no_sort(db, dataset):
+    """O plano da pagina usa o indice da PK, sem ordenar a execucao inteira."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    sync_engine = db.get_bind()
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        state = await history_service.get_execution_state(db, dataset["executions"][0])
+        await history_service.get_test_results(
+            db, state.id, limit=5, after=(3,), started_at=state.started_at,
+        )
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+
+    conn = await db.connection()
+    if conn.dialect.name == "sqlite":
+        rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plan = " ".join(str(r[-1]) for r in rows)
+        assert "TEMP B-TREE" not in plan
+    else:
+        rows = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plan = " ".join(r[0] for r in rows)
+        assert " Sort " not in f" {plan} "
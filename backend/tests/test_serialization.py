@@ -0,0 +1,71 @@
+"""``RowEncoder``: mesmo corpo que os modelos Pydantic, inclusive com UUIDs do asyncpg."""
+
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.core.cache import encode_json
+from app.core.serialization import RowEncoder
+from app.schemas.responses import ExecutionResponse
+
+pytestmark = pytest.mark.anyio
+
+ENCODER = RowEncoder(ExecutionResponse)
+
+
+def _row(make_uuid, **overrides) -> dict:
+    row = {
+        "id": make_uuid("8c1f0a9e-8f5b-4c43-9d7a-2a3f1c5e6b7d"),
+        "project_id": make_uuid("1b9d6bcd-bbfd-4b2d-9b5d-ab8dfbbd4bed"),
+        "projeto_nome": "projeto",
+        "ambiente": "ci",
+        "started_at": datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc),
+        "finished_at": None,
+        "score": 0,
+        "total": 20,
+        "passed": 18,
+        "failed": 1,
+        "errors": 1,
+        "skipped": 0,
+        "duracao_ms": Decimal("1234.5"),
+    }
+    return {**row, **overrides}
+
+
+def _expected(rows: list[dict]) -> bytes:
+    return encode_json([ExecutionResponse(**r) for r in rows])
+
+
+@pytest.mark.parametrize("make_uuid", [uuid.UUID, str], ids=["uuid", "text"])
+def test_matches_pydantic(make_uuid):
+    rows = [_row(make_uuid), _row(make_uuid, projeto_nome="outro", score=87.5)]
+    assert json.loads(ENCODER.dumps(rows)) == json.loads(_expected(rows))
+
+
+def test_asyncpg_uuid():
+    pgproto = pytest.importorskip("asyncpg.pgproto.pgproto")
+    rows = [_row(pgproto.UUID)]
+    assert type(rows[0]["id"]) is not uuid.UUID
+    body = ENCODER.dumps(rows)
+    assert json.loads(body) == json.loads(_expected(rows))
+    assert ENCODER.rows(rows)[0]["id"] == uuid.UUID("8c1f0a9e-8f5b-4c43-9d7a-2a3f1c5e6b7d")
+
+
+def test_missing_defaults():
+    rows = [{k: v for k, v in _row(uuid.UUID).items() if k != "projeto_nome"}]
+    assert ENCODER.rows(rows)[0]["projeto_nome"] == ""
+
+
+async def test_pg_rows_encode(db, dataset):
+    """Linhas reais do driver (no PostgreSQL, UUIDs do asyncpg) codificam."""
+    from app.services import history_service
+
+    rows = await history_service.get_executions(db, dataset["project_id"])
+    assert [e["id"] for e in json.loads(ENCODER.dumps(rows))] == [
+        str(i) for i in dataset["executions"][::-1]
+    ]
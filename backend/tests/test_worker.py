@@ -0,0 +1,75 @@
+"""Heartbeat do worker: falhas transitorias, lease vencido e erro fatal."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import uuid
+
+import pytest
+
+import worker
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def fast_lease(monkeypatch):
+    monkeypatch.setattr(settings, "run_heartbeat_seconds", 0.01)
+    monkeypatch.setattr(settings, "run_lease_seconds", 0.1)
+
+
+def _fake_heartbeat(monkeypatch, outcomes: list):
+    """``run_queue.heartbeat`` devolve/lanca ``outcomes`` em ordem (o ultimo se repete)."""
+    calls = []
+
+    @contextlib.asynccontextmanager
+    async def open_session():
+        yield None
+
+    async def heartbeat(db, run_id, slot_id, **progress):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(outcome)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(worker, "open_session", open_session)
+    monkeypatch.setattr(worker.run_queue, "heartbeat", heartbeat)
+    return calls
+
+
+async def _beat(lost: asyncio.Event, timeout: float = 2) -> asyncio.Task:
+    task = asyncio.create_task(
+        worker.Worker(1, "w")._heartbeat(uuid.uuid4(), "w/0", {"done": 0, "total": 0}, lost)
+    )
+    await asyncio.wait({task}, timeout=timeout)
+    return task
+
+
+async def test_transient_errors_are_retried(monkeypatch, fast_lease):
+    calls = _fake_heartbeat(monkeypatch, [OSError("reset"), OSError("reset"), True, False])
+    lost = asyncio.Event()
+    task = await _beat(lost)
+    assert task.done() and task.exception() is None
+    assert lost.is_set()
+    assert [c if isinstance(c, bool) else "error" for c in calls] == ["error", "error", True, False]
+
+
+async def test_lost_after_lease_deadline(monkeypatch, fast_lease):
+    calls = _fake_heartbeat(monkeypatch, [OSError("down")])
+    lost = asyncio.Event()
+    task = await _beat(lost)
+    assert task.done() and task.exception() is None
+    assert lost.is_set()
+    assert len(calls) > 1
+
+
+async def test_fatal_error_sets_lost(monkeypatch, fast_lease):
+    _fake_heartbeat(monkeypatch, [ValueError("bug")])
+    lost = asyncio.Event()
+    task = await _beat(lost)
+    assert lost.is_set()
+    assert isinstance(task.exception(), ValueError)
+    assert worker._lease_lost(task, lost, uuid.uuid4())
@@ -0,0 +1,236 @@
+"""Worker da fila de auditorias (tabela ``runs``).
+
+Uso (a partir de ``backend/``):
+
+    python worker.py --concurrency 8
+
+Cada processo roda N slots concorrentes; varios processos/nos podem consumir
+a mesma fila (claim com SKIP LOCKED). Cada job mantem um lease renovado por
+heartbeat; se o lease for perdido (outro worker assumiu apos expiracao), o
+job local e cancelado e sua ingestao descartada. SIGINT/SIGTERM param de
+reservar jobs novos e aguardam os que estao em andamento.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+
+from app.core.config import settings
+from app.core import database
+from app.core.database import open_session
+from app.models.db_models import Run
+from app.services import compliance_service, history_service, probe_engine, run_queue
+from app.services.compliance_service import AuditJob, RunnerUnavailableError
+from app.services.runners import register_builtin_runners
+
+logger = logging.getLogger("coder_compliance.worker")
+
+# Falhas de conexao/rede no heartbeat: repetidas enquanto o lease vale
+TRANSIENT_ERRORS = (DBAPIError, PoolTimeoutError, OSError, asyncio.TimeoutError)
+
+
+class Worker:
+    """Processo consumidor da fila com ``concurrency`` slots."""
+
+    def __init__(self, concurrency: int, worker_id: str | None = None):
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Para de reservar jobs; os em andamento terminam normalmente."""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info("worker %s iniciado com %d slots", self.worker_id, self.concurrency)
+        reaper = asyncio.create_task(self._reap())
+        await asyncio.gather(*(self._slot(i) for i in range(self.concurrency)))
+        reaper.cancel()
+        await probe_engine.aclose_clients()
+        logger.info("worker %s encerrado", self.worker_id)
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except TimeoutError:
+            pass
+
+    async def _slot(self, n: int) -> None:
+        slot_id = f"{self.worker_id}/{n}"
+        while not self._stopping.is_set():
+            try:
+                async with open_session() as db:
+                    run = await run_queue.claim(db, slot_id)
+            except Exception:
+                logger.exception("falha ao reservar job")
+                await self._sleep(settings.run_poll_seconds)
+                continue
+            if run is None:
+                await self._sleep(settings.run_poll_seconds)
+                continue
+            await self._process(run, slot_id)
+
+    async def _reap(self) -> None:
+        """Falha jobs cujo lease venceu sem tentativas restantes."""
+        while True:
+            await asyncio.sleep(settings.run_lease_seconds)
+            try:
+                async with open_session() as db:
+                    n = await run_queue.fail_exhausted(db)
+                if n:
+                    logger.warning("%d job(s) marcados como failed por lease expirado", n)
+            except Exception:
+                logger.exception("falha ao reciclar jobs expirados")
+
+    async def _heartbeat(self, run_id: uuid.UUID, slot_id: str, progress: dict, lost: asyncio.Event):
+        """Renova o lease do job; marca ``lost`` quando nao pode mais garanti-lo.
+
+        Falhas de conexao sao repetidas a cada intervalo enquanto o ultimo
+        lease renovado nao vence. Renovacao recusada, lease vencido ou erro
+        inesperado marcam ``lost`` (o erro inesperado e relancado).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.run_lease_seconds
+        try:
+            while True:
+                await asyncio.sleep(settings.run_heartbeat_seconds)
+                try:
+                    async with open_session() as db:
+                        ok = await run_queue.heartbeat(
+                            db, run_id, slot_id,
+                            progress_done=progress["done"],
+                            progress_total=progress["total"],
+                        )
+                except TRANSIENT_ERRORS as exc:
+                    if loop.time() >= deadline:
+                        logger.error("job %s: heartbeat falhou ate o fim do lease (%s)", run_id, exc)
+                        lost.set()
+                        return
+                    logger.warning("job %s: heartbeat falhou, nova tentativa (%s)", run_id, exc)
+                    continue
+                if not ok:
+                    lost.set()
+                    return
+                deadline = loop.time() + settings.run_lease_seconds
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            lost.set()
+            raise
+
+    async def _process(self, run: Run, slot_id: str) -> None:
+        logger.info("job %s (%s) reservado por %s, tentativa %d", run.id, run.project_name, slot_id, run.attempts)
+        started_at = datetime.now(timezone.utc)
+        progress = {"done": 0, "total": 0}
+
+        async def on_progress(done: int, total: int) -> None:
+            progress["done"] += done
+            progress["total"] += total
+
+        job = AuditJob(
+            project_name=run.project_name,
+            types=list(run.types or []),
+            environment=run.environment,
+            options=dict(run.options or {}),
+        )
+
+        async def audit_job() -> list[dict]:
+            if job.options.get("incremental"):
+                async with open_session() as db:
+                    job.baseline = await history_service.get_reusable_results(
+                        db, job.project_name, job.environment,
+                    )
+            return await compliance_service.execute_audit(job, on_progress)
+
+        lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(run.id, slot_id, progress, lost))
+        audit = asyncio.create_task(audit_job())
+        lost_wait = asyncio.create_task(lost.wait())
+        try:
+            await asyncio.wait({audit, lost_wait, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            if _lease_lost(heartbeat, lost, run.id):
+                audit.cancel()
+                return
+            results = audit.result()
+
+            async with open_session() as db:
+                execution = await history_service.ingest_execution(
+                    db,
+                    project_name=job.project_name,
+                    ambiente=job.environment,
+                    results=results,
+                    started_at=started_at,
+                )
+                reused = sum(1 for r in results if r.get("reused"))
+                if _lease_lost(heartbeat, lost, run.id):
+                    await db.rollback()
+                    return
+                if not await run_queue.complete(db, run.id, slot_id, execution.id, reused):
+                    await db.rollback()
+                    logger.warning("job %s: lease perdido antes do commit, ingestao descartada", run.id)
+                    return
+                await db.commit()
+            logger.info(
+                "job %s concluido: execucao %s (%d testes, %d reaproveitados)",
+                run.id, execution.id, len(results), reused,
+            )
+        except RunnerUnavailableError as exc:
+            async with open_session() as db:
+                await run_queue.fail(db, run.id, slot_id, str(exc), retry=False)
+        except Exception as exc:
+            logger.exception("job %s falhou", run.id)
+            async with open_session() as db:
+                await run_queue.fail(db, run.id, slot_id, f"{type(exc).__name__}: {exc}")
+        finally:
+            heartbeat.cancel()
+            lost_wait.cancel()
+
+
+def _lease_lost(heartbeat: asyncio.Task, lost: asyncio.Event, run_id: uuid.UUID) -> bool:
+    """``True`` (e registra o motivo) se o heartbeat parou de garantir o lease."""
+    if not (lost.is_set() or heartbeat.done()):
+        return False
+    exc = None if heartbeat.cancelled() or not heartbeat.done() else heartbeat.exception()
+    if exc is not None:
+        logger.error("job %s: heartbeat falhou, execucao local descartada", run_id, exc_info=exc)
+    else:
+        logger.warning("job %s: lease perdido, execucao local descartada", run_id)
+    return True
+
+
+async def main(concurrency: int) -> None:
+    if not settings.db_url:
+        print("ERRO: DB_URL nao configurado no .env")
+        return
+
+    register_builtin_runners()
+    database.connect()
+    await database.init_schema(database.engine)
+    worker = Worker(concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        await worker.run()
+    finally:
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker da fila de auditorias")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main(args.concurrency))